@@ -3,12 +3,15 @@ app.py — Beach Volley Tournament Manager Pro v4
 """
 import streamlit as st
 import sys
-from data_manager import load_state, save_state, get_trofei_atleta, calcola_overall_fifa, get_atleta_by_id, TROFEI_DEFINIZIONE
+from data_manager import load_state, save_state, statistiche_salvataggi, get_trofei_atleta, get_prossimo_trofeo, trofei_recenti, calcola_overall_fifa, get_atleta_by_id, TROFEI_DEFINIZIONE
 from theme_manager import (
     load_theme_config, save_theme_config, inject_theme_css,
     render_personalization_page, render_banner, render_sponsors_sidebar
 )
-from ranking_page import build_ranking_data, _render_schede_atleti, CARD_ANIMATIONS, _render_global_trophy_board
+from blob_store import salva_upload, blob_data_uri
+from ranking import build_ranking_data
+from ranking_page import _render_schede_atleti, CARD_ANIMATIONS, _render_global_trophy_board
+from registro_scambi import pulisci_checkpoint
 
 st.set_page_config(
     page_title="🏐 Beach Volley Tournament",
@@ -19,6 +22,8 @@ st.set_page_config(
 
 if "state" not in st.session_state:
     st.session_state.state = load_state()
+    # Una volta per sessione: checkpoint live di partite confermate altrove o di tornei passati
+    pulisci_checkpoint(st.session_state.state)
 if "theme_cfg" not in st.session_state:
     st.session_state.theme_cfg = load_theme_config()
 if "current_page" not in st.session_state:
@@ -106,8 +111,8 @@ def render_atleta_popup(atleta_id, ranking):
     if not atleta_data:
         return
     a = atleta_data
-    foto = a["atleta"].get("foto_b64")
-    foto_html = f'<img src="data:image/png;base64,{foto}" style="width:44px;height:44px;border-radius:50%;object-fit:cover;border:2px solid var(--accent1);flex-shrink:0">' if foto else '<div style="width:44px;height:44px;border-radius:50%;background:var(--bg-card);display:flex;align-items:center;justify-content:center;font-size:1.3rem;flex-shrink:0">👤</div>'
+    foto = blob_data_uri(a["atleta"].get("foto_blob"), "avatar")
+    foto_html = f'<img src="{foto}" style="width:44px;height:44px;border-radius:50%;object-fit:cover;border:2px solid var(--accent1);flex-shrink:0">' if foto else '<div style="width:44px;height:44px;border-radius:50%;background:var(--bg-card);display:flex;align-items:center;justify-content:center;font-size:1.3rem;flex-shrink:0">👤</div>'
 
     st.markdown(f"""
     <div style="background:var(--bg-card2);border:2px solid var(--accent1);border-radius:12px;padding:14px;margin:8px 0">
@@ -168,17 +173,16 @@ def render_trofei_showcase(state):
         with col_img:
             banner_trophy = st.file_uploader("📷 Banner superiore", type=["png","jpg","jpeg"], key="trophy_banner_up")
             if banner_trophy:
-                import base64
-                st.session_state.trophy_banner_b64 = base64.b64encode(banner_trophy.read()).decode()
+                st.session_state.trophy_banner_blob = salva_upload(banner_trophy)
                 st.rerun()
-            if st.session_state.get("trophy_banner_b64") and st.button("🗑️ Rimuovi banner", key="rm_trophy_banner"):
-                st.session_state.trophy_banner_b64 = None
+            if st.session_state.get("trophy_banner_blob") and st.button("🗑️ Rimuovi banner", key="rm_trophy_banner"):
+                st.session_state.trophy_banner_blob = None
                 st.rerun()
         with col_info:
             st.info("Passa il cursore su un trofeo per vedere come ottenerlo. I trofei si animano all'hover!")
 
-    if st.session_state.get("trophy_banner_b64"):
-        st.markdown(f'<img src="data:image/png;base64,{st.session_state.trophy_banner_b64}" style="width:100%;border-radius:12px;margin-bottom:20px;max-height:200px;object-fit:cover">', unsafe_allow_html=True)
+    if st.session_state.get("trophy_banner_blob"):
+        st.markdown(f'<img src="{blob_data_uri(st.session_state.trophy_banner_blob)}" style="width:100%;border-radius:12px;margin-bottom:20px;max-height:200px;object-fit:cover">', unsafe_allow_html=True)
 
     st.markdown("### 🌟 Tutti i Trofei")
     st.caption("Passa il cursore su un trofeo per vedere come ottenerlo")
@@ -210,6 +214,16 @@ def render_trofei_showcase(state):
                 </div>
                 """, unsafe_allow_html=True)
 
+    recenti = trofei_recenti(state)
+    if recenti:
+        st.markdown("### 🆕 Sbloccati di Recente")
+        html = ""
+        for atleta, trofeo, info in recenti:
+            dove = f" · {info['torneo']}" if info.get("torneo") else ""
+            quando = info["data"][:10] if info.get("data") else "—"
+            html += f'<div style="display:flex;gap:10px;align-items:center;padding:6px 0;border-bottom:1px solid var(--border);font-size:0.8rem"><span style="font-size:1.3rem">{trofeo["icona"]}</span><div><strong>{atleta["nome"]}</strong> ha sbloccato <strong>{trofeo["nome"]}</strong><div style="font-size:0.65rem;color:var(--text-secondary)">{quando}{dove}</div></div></div>'
+        st.markdown(html, unsafe_allow_html=True)
+
     st.divider()
     st.markdown("### 👥 Stato Trofei per Atleta")
     ranking = build_ranking_data(state)
@@ -230,8 +244,8 @@ with st.sidebar:
     </div>
     """, unsafe_allow_html=True)
 
-    if theme_cfg.get("banner_position") == "Nella sidebar" and theme_cfg.get("banner_b64"):
-        st.markdown(f'<img src="data:image/png;base64,{theme_cfg["banner_b64"]}" style="width:100%;border-radius:8px;margin-bottom:8px">', unsafe_allow_html=True)
+    if theme_cfg.get("banner_position") == "Nella sidebar" and theme_cfg.get("banner_blob"):
+        st.markdown(f'<img src="{blob_data_uri(theme_cfg["banner_blob"])}" style="width:100%;border-radius:8px;margin-bottom:8px">', unsafe_allow_html=True)
 
     st.markdown("<hr style='border-color:var(--border);margin:0 0 12px'>", unsafe_allow_html=True)
     st.markdown('<div style="font-size:0.6rem;letter-spacing:3px;text-transform:uppercase;color:var(--accent1);font-weight:700;margin-bottom:8px">⚡ NAVIGAZIONE TORNEO</div>', unsafe_allow_html=True)
@@ -334,10 +348,10 @@ with st.sidebar:
         thtml = '<div style="background:var(--bg-card2);border:1px solid var(--border);border-radius:var(--radius);padding:10px;margin-bottom:8px">'
         shown = 0
         for atleta in atleti_con_dati[:3]:
-            trofei = get_trofei_atleta(atleta)
-            prossimo = next((t for t, u in trofei if not u), None)
+            prossimo = get_prossimo_trofeo(atleta)
             if prossimo and shown < 3:
-                thtml += f'<div style="display:flex;gap:8px;align-items:center;padding:5px 0;border-bottom:1px solid var(--border);font-size:0.73rem"><span style="font-size:1rem;opacity:0.35">{prossimo["icona"]}</span><div><div style="font-weight:600">{atleta["nome"]}</div><div style="font-size:0.58rem;color:var(--text-secondary)">{prossimo["descrizione"]}</div></div></div>'
+                trofeo, progresso = prossimo
+                thtml += f'<div style="display:flex;gap:8px;align-items:center;padding:5px 0;border-bottom:1px solid var(--border);font-size:0.73rem"><span style="font-size:1rem;opacity:0.35">{trofeo["icona"]}</span><div style="flex:1"><div style="font-weight:600">{atleta["nome"]}</div><div style="font-size:0.58rem;color:var(--text-secondary)">{trofeo["descrizione"]} · {int(progresso * 100)}%</div><div style="background:var(--border);border-radius:4px;height:3px;margin-top:3px"><div style="background:var(--accent-gold);height:100%;width:{int(progresso * 100)}%;border-radius:4px"></div></div></div></div>'
                 shown += 1
         thtml += '</div>'
         if shown > 0:
@@ -358,12 +372,12 @@ with st.sidebar:
     if st.session_state.get("show_reset", False):
         st.warning("⚠️ Cancellerà il torneo corrente. Atleti e ranking mantenuti.")
         if st.button("🔴 CONFERMA RESET", use_container_width=True, key="btn_reset_confirm"):
-            from data_manager import empty_state
-            atleti_bkp = state["atleti"]
-            nuovo = empty_state(); nuovo["atleti"] = atleti_bkp
+            from data_manager import nuovo_torneo
+            nuovo = nuovo_torneo(state)
             st.session_state.state = nuovo; save_state(nuovo)
             st.session_state.show_reset = False; st.session_state.current_page = "torneo"; st.rerun()
-    st.markdown('<div style="font-size:0.65rem;color:var(--text-secondary);text-align:center;margin-top:4px">📁 beach_volley_data.json</div>', unsafe_allow_html=True)
+    io = statistiche_salvataggi(state)
+    st.markdown(f'<div style="font-size:0.65rem;color:var(--text-secondary);text-align:center;margin-top:4px">📁 beach_volley_data.json · v{io.get("versione", 0)} · {io["salvataggi_al_minuto"]} salv/min · {io["byte_scritti"]/1024:.0f} KB scritti</div>', unsafe_allow_html=True)
 
 
 # ─── MAIN ROUTING ────────────────────────────────────────────────────────────
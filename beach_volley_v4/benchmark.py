@@ -0,0 +1,146 @@
+"""
+benchmark.py — Tempi delle operazioni pesanti su leghe sintetiche di varie taglie
+
+    python benchmark.py                          # tutte le taglie, entrambi i backend
+    python benchmark.py --taglie piccola media --output report.json
+
+Il report JSON riporta per ogni taglia e backend il minimo e la mediana di
+ogni operazione, così le regressioni si vedono confrontando due report.
+"""
+import argparse, json, os, platform, statistics, sys, tempfile, time
+from datetime import datetime
+
+import data_manager as dm
+from lega_sintetica import genera_lega, iscrivi_squadre
+
+TAGLIE = {
+    "piccola": {"n_atleti": 200, "n_tornei": 20},
+    "media": {"n_atleti": 1000, "n_tornei": 100},
+    "grande": {"n_atleti": 3000, "n_tornei": 300},
+}
+BACKEND = ["journal", "sqlite"]
+
+
+def _cronometra(fn, ripetizioni, prepara=None):
+    """Minimo e mediana di `ripetizioni` chiamate; `prepara` (non cronometrata) fornisce l'argomento."""
+    tempi = []
+    for _ in range(ripetizioni):
+        args = (prepara(),) if prepara else ()
+        t0 = time.perf_counter()
+        fn(*args)
+        tempi.append(time.perf_counter() - t0)
+    return {"min_s": round(min(tempi), 6), "mediana_s": round(statistics.median(tempi), 6)}
+
+
+def _usa_backend(backend):
+    """Punta data_manager al backend scelto nella cartella corrente."""
+    if dm._sqlite["conn"] is not None:
+        dm._sqlite["conn"].close()
+        dm._sqlite["conn"] = None
+    dm.STORAGE_BACKEND = backend
+
+
+def _incassi_sintetici(state):
+    return {"tornei": {r["nome"]: {"data": r["data"], "quota_iscrizione": 20.0, "pagamenti": []}
+                       for r in state["registro_tornei"]}}
+
+
+def misura(state, backend, ripetizioni):
+    """Tempi delle operazioni su `state`, salvato e ricaricato con `backend`."""
+    from ranking import build_ranking_data, ranking_frame
+    from ranking_page import _genera_pdf_ranking
+    from incassi import _genera_pdf_incassi
+
+    _usa_backend(backend)
+    risultati = {}
+
+    def salva_completo():
+        state.completo = True
+        dm.save_state(state)
+    risultati["save_state"] = _cronometra(salva_completo, ripetizioni)
+
+    atleta = state["atleti"][0]
+    def salva_incrementale():
+        atleta["stats"]["punti_fatti"] += 1
+        dm.save_state(state)
+    risultati["save_state_incrementale"] = _cronometra(salva_incrementale, ripetizioni)
+
+    def carica():
+        _usa_backend(backend)
+        return dm.load_state()
+    risultati["load_state"] = _cronometra(carica, ripetizioni)
+
+    # A freddo: stato appena caricato, senza cache di indici e ranking
+    risultati["build_ranking_data"] = _cronometra(build_ranking_data, ripetizioni, prepara=carica)
+    caldo = carica()
+    build_ranking_data(caldo)
+    risultati["build_ranking_data_in_cache"] = _cronometra(lambda: build_ranking_data(caldo), ripetizioni)
+
+    risultati["get_trofei_atleta_tutti"] = _cronometra(
+        lambda: [dm.get_trofei_atleta(a) for a in caldo["atleti"]], ripetizioni)
+
+    iscrivi_squadre(caldo, min(32, len(caldo["atleti"]) // 2))   # 8 gironi: il massimo di genera_gironi
+    ids = [sq["id"] for sq in caldo["squadre"]]
+    risultati["genera_gironi_ranking"] = _cronometra(
+        lambda: dm.genera_gironi(ids, max(2, len(ids) // 4), use_ranking=True, state=caldo), ripetizioni)
+
+    risultati["pdf_ranking"] = _cronometra(lambda: _genera_pdf_ranking(caldo, ranking_frame(caldo)), ripetizioni)
+    incassi = _incassi_sintetici(caldo)
+    risultati["pdf_incassi"] = _cronometra(
+        lambda: _genera_pdf_incassi(caldo, incassi, "Benchmark", True, True), ripetizioni)
+    return risultati
+
+
+def esegui(taglie, backend, ripetizioni=3, seme=0):
+    report = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "piattaforma": platform.platform(),
+        "ripetizioni": ripetizioni, "seme": seme,
+        "taglie": {},
+    }
+    cartella_origine = os.getcwd()
+    for nome in taglie:
+        parametri = TAGLIE[nome]
+        t0 = time.perf_counter()
+        state = genera_lega(seme=seme, **parametri)
+        voce = {
+            **parametri,
+            "voci_storico": sum(len(a["stats"]["storico_posizioni"]) for a in state["atleti"]),
+            "generazione_s": round(time.perf_counter() - t0, 3),
+            "backend": {},
+        }
+        for b in backend:
+            # Ogni misura in una cartella vuota: i file dei backend sono relativi alla cwd
+            with tempfile.TemporaryDirectory() as cartella:
+                os.chdir(cartella)
+                try:
+                    voce["backend"][b] = misura(state, b, ripetizioni)
+                    voce["backend"][b]["dimensione_file_kb"] = round(
+                        sum(os.path.getsize(f) for f in os.listdir(".") if os.path.isfile(f)) / 1024, 1)
+                finally:
+                    _usa_backend(b)
+                    os.chdir(cartella_origine)
+            print(f"{nome:8} {b:8} " + "  ".join(
+                f"{k}={v['mediana_s'] * 1000:.1f}ms" for k, v in voce["backend"][b].items() if isinstance(v, dict)),
+                file=sys.stderr)
+        report["taglie"][nome] = voce
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--taglie", nargs="+", choices=list(TAGLIE), default=list(TAGLIE))
+    parser.add_argument("--backend", nargs="+", choices=BACKEND, default=BACKEND)
+    parser.add_argument("--ripetizioni", type=int, default=3)
+    parser.add_argument("--seme", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_report.json")
+    args = parser.parse_args(argv)
+    report = esegui(args.taglie, args.backend, args.ripetizioni, args.seme)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Report scritto in {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
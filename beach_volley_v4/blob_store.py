@@ -0,0 +1,149 @@
+"""
+blob_store.py — Archivio immagini content-addressed (SHA-256) per foto, loghi e banner
+"""
+import base64, hashlib, io, os, threading
+from collections import OrderedDict
+from pathlib import Path
+
+try:
+    from PIL import Image, ImageOps, features
+    _FORMATO_MINIATURE = "WEBP" if features.check("webp") else "JPEG"
+except ImportError:  # senza Pillow si servono gli originali
+    Image = None
+    _FORMATO_MINIATURE = None
+
+BLOB_DIR = "beach_volley_blobs"
+CACHE_URI_BYTE = 8 * 1024 * 1024     # budget della cache dei data URI (LRU)
+CACHE_URI_MAX_VOCE = 64 * 1024       # solo URI da miniatura: originali, banner e loghi grandi si rileggono
+
+# Miniature generate al caricamento delle foto atleta (2x per schermi retina):
+# icona → lista atleti in setup (20px), avatar → popup sidebar (44px),
+# card → foto delle card FIFA (200×90 / 160×75)
+MINIATURE = {
+    "icona": (48, 48),
+    "avatar": (96, 96),
+    "card": (400, 180),
+}
+
+_MAGIC = [
+    (b"\x89PNG", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF8", "image/gif"),
+    (b"RIFF", "image/webp"),
+]
+
+
+def _percorso(h):
+    # Sottocartelle per prefisso per non avere migliaia di file in una sola directory
+    return Path(BLOB_DIR) / h[:2] / h
+
+
+def salva_blob(dati):
+    """Salva i byte e restituisce il loro SHA-256; upload identici occupano un solo file."""
+    h = hashlib.sha256(dati).hexdigest()
+    path = _percorso(h)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(h + ".tmp")
+        tmp.write_bytes(dati)
+        os.replace(tmp, path)
+    return h
+
+
+def salva_upload(file_caricato):
+    """Salva un file di st.file_uploader e ne restituisce l'hash."""
+    return salva_blob(file_caricato.getvalue())
+
+
+def salva_foto(file_caricato):
+    """Come salva_upload, ma prepara subito le miniature per i renderer."""
+    h = salva_upload(file_caricato)
+    genera_miniature(h)
+    return h
+
+
+def salva_b64(b64):
+    """Migra un'immagine base64 inline nell'archivio."""
+    return salva_blob(base64.b64decode(b64))
+
+
+def leggi_blob(h):
+    if not h:
+        return None
+    path = _percorso(h)
+    return path.read_bytes() if path.exists() else None
+
+
+def mime_blob(dati):
+    for firma, mime in _MAGIC:
+        if dati.startswith(firma):
+            return mime
+    return "application/octet-stream"
+
+
+def _percorso_miniatura(h, nome):
+    return _percorso(h).with_name(f"{h}.{nome}.{_FORMATO_MINIATURE.lower()}")
+
+
+def genera_miniature(h):
+    """Ridimensiona e ricomprime l'immagine in tutte le misure di MINIATURE (una volta sola)."""
+    if Image is None:
+        return
+    mancanti = [n for n in MINIATURE if not _percorso_miniatura(h, n).exists()]
+    dati = leggi_blob(h) if mancanti else None
+    if not dati:
+        return
+    try:
+        img = ImageOps.exif_transpose(Image.open(io.BytesIO(dati))).convert("RGB")
+    except Exception:
+        return  # non è un'immagine leggibile: si userà l'originale
+    for nome in mancanti:
+        buf = io.BytesIO()
+        ImageOps.fit(img, MINIATURE[nome], Image.LANCZOS).save(buf, _FORMATO_MINIATURE, quality=80)
+        path = _percorso_miniatura(h, nome)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(buf.getvalue())
+        os.replace(tmp, path)
+
+
+_cache_uri = OrderedDict()   # (hash, miniatura) → data URI, dal meno recente
+_cache_uri_stato = {"byte": 0, "lock": threading.Lock()}
+
+
+def blob_data_uri(h, miniatura=None):
+    """
+    Data URI pronto per <img src>. Con `miniatura` (chiave di MINIATURE)
+    restituisce la versione ridotta, generandola se manca (es. foto migrate).
+    Il contenuto di un hash non cambia mai, quindi gli URI piccoli restano in
+    una LRU limitata a CACHE_URI_BYTE; un blob mancante non viene memorizzato
+    (può arrivare più tardi).
+    """
+    chiave = (h, miniatura)
+    with _cache_uri_stato["lock"]:
+        uri = _cache_uri.get(chiave)
+        if uri is not None:
+            _cache_uri.move_to_end(chiave)
+            return uri
+    uri = _data_uri(h, miniatura)
+    if uri is not None and len(uri) <= CACHE_URI_MAX_VOCE:
+        with _cache_uri_stato["lock"]:
+            if chiave not in _cache_uri:
+                _cache_uri[chiave] = uri
+                _cache_uri_stato["byte"] += len(uri)
+            while _cache_uri_stato["byte"] > CACHE_URI_BYTE:
+                _, vecchio = _cache_uri.popitem(last=False)
+                _cache_uri_stato["byte"] -= len(vecchio)
+    return uri
+
+
+def _data_uri(h, miniatura):
+    if miniatura and Image is not None and h:
+        path = _percorso_miniatura(h, miniatura)
+        if not path.exists():
+            genera_miniature(h)
+        if path.exists():
+            return f"data:image/{_FORMATO_MINIATURE.lower()};base64,{base64.b64encode(path.read_bytes()).decode()}"
+    dati = leggi_blob(h)
+    if dati is None:
+        return None
+    return f"data:{mime_blob(dati)};base64,{base64.b64encode(dati).decode()}"
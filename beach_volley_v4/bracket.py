@@ -0,0 +1,154 @@
+"""
+bracket.py — Tabellone a eliminazione diretta come heap di nodi
+
+Il nodo 1 è la finale e i figli del nodo i sono 2i e 2i+1: la vincente del
+nodo i entra nello slot (sq1 se i è pari, sq2 se dispari) del nodo i // 2.
+Il nodo 0 è la finale per il 3° posto, alimentata dalle perdenti delle
+semifinali (nodi 2 e 3). Una partita esiste solo se entrambi i suoi rami
+hanno squadre: un ramo vuoto (bye) fa salire la squadra al nodo superiore.
+"""
+from data_manager import new_partita, get_partita_nodo
+
+NOMI_ROUND = ["🏆 FINALE", "🥇 SEMIFINALI", "⚡ QUARTI DI FINALE", "⚡ OTTAVI DI FINALE",
+              "⚡ SEDICESIMI DI FINALE", "⚡ TRENTADUESIMI DI FINALE"]
+NOME_TERZO_POSTO = "🥉 FINALE 3° POSTO"
+
+
+def dimensione(n):
+    """Slot del primo turno: la potenza di due che contiene n squadre."""
+    return max(2, 1 << (n - 1).bit_length())
+
+
+def livello(nodo):
+    """0 per la finale, 1 per le semifinali, 2 per i quarti, ..."""
+    return nodo.bit_length() - 1
+
+
+def ordine_teste_di_serie(n_slot):
+    """Testa di serie (da 1) di ogni slot del primo turno: 1 e 2 si possono incontrare solo in finale."""
+    ordine = [1]
+    while len(ordine) < n_slot:
+        somma = 2 * len(ordine) + 1
+        ordine = [x for s in ordine for x in (s, somma - s)]
+    return ordine
+
+
+def slot_da_teste_di_serie(teste):
+    """Slot del primo turno dalle squadre in ordine di testa di serie; i bye (None) toccano alle prime."""
+    return [teste[s - 1] if s <= len(teste) else None for s in ordine_teste_di_serie(dimensione(len(teste)))]
+
+
+def nome_round(partita):
+    nodo = partita.get("nodo")
+    if nodo == 0:
+        return NOME_TERZO_POSTO
+    if nodo is None or livello(nodo) >= len(NOMI_ROUND):
+        return f"⚡ Turno {partita.get('round', 1)}"
+    return NOMI_ROUND[livello(nodo)]
+
+
+def perdente(partita):
+    return partita["sq2"] if partita["vincitore"] == partita["sq1"] else partita["sq1"]
+
+
+def _colloca(trova, nodo, sid):
+    """Porta `sid` dal nodo `nodo` alla prima partita esistente sopra di lui."""
+    while nodo > 1:
+        padre = nodo // 2
+        p = trova(padre)
+        if p is not None:
+            p["sq1" if nodo % 2 == 0 else "sq2"] = sid
+            return p
+        nodo = padre
+    return None
+
+
+def crea_bracket(slot, terzo_posto=True):
+    """
+    Tabellone con le squadre nell'ordine degli slot del primo turno (0 contro 1,
+    2 contro 3, ...; None = bye). Tutte le partite vengono create subito, quelle
+    dei turni successivi con sq1/sq2 da definire.
+    """
+    if sum(sid is not None for sid in slot) < 2:
+        raise ValueError("Servono almeno 2 squadre per il tabellone.")
+    n_slot = dimensione(len(slot))
+    slot = list(slot) + [None] * (n_slot - len(slot))
+    # Squadre presenti in ogni sottoalbero (foglie da n_slot a 2*n_slot-1)
+    conta = [0] * n_slot + [int(sid is not None) for sid in slot]
+    for i in range(n_slot - 1, 0, -1):
+        conta[i] = conta[2 * i] + conta[2 * i + 1]
+    n_round = livello(n_slot)
+    partite = {}
+    for i in range(1, n_slot):
+        if conta[2 * i] and conta[2 * i + 1]:
+            partite[i] = new_partita(None, None, "eliminazione")
+            partite[i]["nodo"] = i
+            partite[i]["round"] = n_round - livello(i)
+    if terzo_posto and 2 in partite and 3 in partite:
+        partite[0] = new_partita(None, None, "eliminazione")
+        partite[0]["nodo"] = 0
+        partite[0]["round"] = n_round
+    for k, sid in enumerate(slot):
+        if sid is not None:
+            _colloca(partite.get, n_slot + k, sid)
+    return sorted(partite.values(), key=lambda p: (p["round"], p["nodo"] != 0, p["nodo"]))
+
+
+def _avanza(trova, partita):
+    nodo = partita.get("nodo")
+    if not partita["confermata"] or not nodo:
+        return None
+    if nodo in (2, 3):
+        terzo = trova(0)
+        if terzo is not None:
+            terzo["sq1" if nodo == 2 else "sq2"] = perdente(partita)
+    return _colloca(trova, nodo, partita["vincitore"])
+
+
+def avanza(state, partita):
+    """Confermata `partita`, sposta la vincente nel nodo padre (e la perdente di una semifinale al 3° posto)."""
+    return _avanza(lambda n: get_partita_nodo(state, n), partita)
+
+
+def pronte(bracket):
+    """Partite da giocare: entrambe le squadre note e risultato non ancora confermato."""
+    return [p for p in bracket if not p["confermata"] and p["sq1"] and p["sq2"]]
+
+
+def podio(state):
+    """[(1, sid), (2, sid), (3, sid)] a tabellone concluso, altrimenti []."""
+    finale = get_partita_nodo(state, 1)
+    terzo = get_partita_nodo(state, 0)
+    if finale is None or not finale["confermata"] or (terzo is not None and not terzo["confermata"]):
+        return []
+    podio = [(1, finale["vincitore"]), (2, perdente(finale))]
+    if terzo is not None:
+        podio.append((3, terzo["vincitore"]))
+    else:
+        # Senza finalina il 3° posto va alle perdenti delle semifinali giocate
+        for nodo in (2, 3):
+            semi = get_partita_nodo(state, nodo)
+            if semi is not None and semi["confermata"]:
+                podio.append((3, perdente(semi)))
+    return podio
+
+
+def da_primo_turno(partite):
+    """
+    Converte un bracket in formato lista (partite per turno, senza nodi) in un
+    tabellone costruito dal primo turno, riportando i risultati già confermati.
+    """
+    primo = [p for p in partite if p.get("round", 1) == 1]
+    nuovo = crea_bracket([sid for p in primo for sid in (p["sq1"], p["sq2"])])
+    per_nodo = {p["nodo"]: p for p in nuovo}
+    for vecchia in sorted(partite, key=lambda p: p.get("round", 1)):
+        if not vecchia["confermata"]:
+            continue
+        p = next((p for p in nuovo if not p["confermata"]
+                  and {p["sq1"], p["sq2"]} == {vecchia["sq1"], vecchia["sq2"]}), None)
+        if p is None:
+            continue
+        p.update({k: vecchia[k] for k in ("id", "sq1", "sq2", "punteggi", "set_sq1", "set_sq2",
+                                          "vincitore", "in_battuta", "confermata")})
+        _avanza(per_nodo.get, p)
+    return nuovo
@@ -0,0 +1,157 @@
+"""
+calendario.py — Campi e orari delle partite (gironi, turni svizzeri, tabellone)
+
+Le partite diventano attività con dipendenze: un turno svizzero aspetta il
+precedente, il tabellone aspetta la fine dei gironi, ogni partita del
+tabellone aspetta quelle che la alimentano. Le partite non ancora generate
+(turni svizzeri futuri, tabellone durante i gironi) entrano come segnaposto,
+così durata e fine della giornata si conoscono dall'inizio. La pianificazione
+è a lista: appena un campo si libera vi va la partita che può iniziare prima,
+rispettando il riposo minimo di ogni squadra tra due partite.
+"""
+import math
+
+SECONDI_PER_SCAMBIO = 40   # scambio + pausa fino alla battuta successiva
+CAMBIO_CAMPO_MIN = 5       # riscaldamento e cambio squadre tra due partite
+PUNTI_TIE_BREAK = 15
+
+
+def durata_partita(torneo):
+    """Minuti stimati di una partita, arrotondati a 5, secondo formato set e punteggio massimo."""
+    def scambi(limite):
+        return limite * 1.75   # chi perde il set arriva in media a ~3/4 del limite
+    if torneo.get("formato_set") == "Best of 3":
+        totale = 2 * scambi(torneo["punteggio_max"]) + 0.5 * scambi(PUNTI_TIE_BREAK)
+    else:
+        totale = scambi(torneo["punteggio_max"])
+    minuti = totale * SECONDI_PER_SCAMBIO / 60 + CAMBIO_CAMPO_MIN
+    return 5 * math.ceil(minuti / 5)
+
+
+def minuti(orario):
+    h, m = orario.split(":")
+    return int(h) * 60 + int(m)
+
+
+def orario(minuti_dal_mattino):
+    return f"{minuti_dal_mattino // 60:02d}:{minuti_dal_mattino % 60:02d}"
+
+
+def _segnaposto():
+    return {"sq1": None, "sq2": None}
+
+
+def _attivita(state):
+    """
+    [(partita, dipendenze, prevista)] in ordine di priorità. `dipendenze` sono
+    indici di attività precedenti; le previste sono segnaposto non salvati.
+    """
+    attivita = []
+
+    def aggiungi(partite, dipendenze=(), prevista=False):
+        inizio = len(attivita)
+        attivita.extend((p, list(dipendenze), prevista) for p in partite)
+        return list(range(inizio, len(attivita)))
+
+    gironi = state["gironi"]
+    svizzera = gironi[0] if gironi and gironi[0].get("svizzera") else None
+    if svizzera:
+        precedente = []
+        turni = {}
+        for p in svizzera["partite"]:
+            turni.setdefault(p["turno"], []).append(p)
+        for t in range(1, svizzera["turni"] + 1):
+            partite, prevista = turni.get(t), False
+            if partite is None:
+                partite, prevista = [_segnaposto() for _ in range(len(svizzera["squadre"]) // 2)], True
+            precedente = aggiungi(partite, precedente, prevista)
+        fine_gironi = precedente
+    else:
+        # Gironi intrecciati turno per turno, così tutti i campi lavorano dall'inizio
+        partite = sorted((p for g in gironi for p in g["partite"]),
+                         key=lambda p: (p.get("turno", 0), p.get("girone") or 0))
+        fine_gironi = aggiungi(partite)
+
+    tabellone, prevista = state["bracket"], False
+    if not tabellone and gironi:
+        from bracket import crea_bracket, slot_da_teste_di_serie
+        qualificate = (svizzera["qualificate"] if svizzera
+                       else sum(min(2, len(g["squadre"])) for g in gironi))
+        tabellone, prevista = crea_bracket(slot_da_teste_di_serie(list(range(1, qualificate + 1)))), True
+        for p in tabellone:
+            p["sq1"] = p["sq2"] = None
+    indici = aggiungi(tabellone, fine_gironi if gironi else (), prevista)
+    per_nodo = {p["nodo"]: i for p, i in zip(tabellone, indici)}
+    for p, i in zip(tabellone, indici):
+        for dest in _destinazioni(p, per_nodo):
+            attivita[dest][1].append(i)
+    return attivita
+
+
+def _destinazioni(partita, per_nodo):
+    """Nodi (come indici di attività) delle partite che aspettano il risultato di `partita`."""
+    if "vincente_a" in partita:   # doppia eliminazione: puntatori espliciti
+        nodi = [d[0] for d in (partita["vincente_a"], partita["perdente_a"]) if d]
+        nodi += [partita["spareggio"]] if partita.get("spareggio") else []
+        return [per_nodo[n] for n in nodi]
+    nodo = partita["nodo"]
+    destinazioni = [per_nodo[0]] if nodo in (2, 3) and 0 in per_nodo else []
+    while nodo > 1:
+        nodo //= 2
+        if nodo in per_nodo:
+            return destinazioni + [per_nodo[nodo]]
+    return destinazioni
+
+
+def pianifica(state, campi=2, riposo=10, durata=None, inizio="09:00", assegna=True):
+    """
+    Assegna campo e orario a ogni partita (con `assegna`) e restituisce il
+    riepilogo: durata stimata, fine della giornata e utilizzo dei campi.
+    """
+    durata = durata or durata_partita(state["torneo"])
+    attivita = _attivita(state)
+    successive = [[] for _ in attivita]
+    mancanti = [len(dip) for _, dip, _ in attivita]
+    for i, (_, dip, _) in enumerate(attivita):
+        for d in dip:
+            successive[d].append(i)
+    pronta = [0] * len(attivita)            # fine delle partite da cui dipende (+ riposo)
+    disponibili = [i for i, m in enumerate(mancanti) if m == 0]
+    liberi = [0] * campi                    # minuto in cui ogni campo si libera
+    riposa = {}                             # sid → minuto da cui può tornare in campo
+    piano = [None] * len(attivita)
+
+    def avvio(i, campo):
+        p = attivita[i][0]
+        return max([liberi[campo], pronta[i]] + [riposa.get(sid, 0) for sid in (p["sq1"], p["sq2"]) if sid])
+
+    while disponibili:
+        campo = min(range(campi), key=liberi.__getitem__)
+        i = min(disponibili, key=lambda i: (avvio(i, campo), i))
+        disponibili.remove(i)
+        t = avvio(i, campo)
+        piano[i] = (campo, t)
+        liberi[campo] = t + durata
+        p = attivita[i][0]
+        for sid in (p["sq1"], p["sq2"]):
+            if sid:
+                riposa[sid] = t + durata + riposo
+        for s in successive[i]:
+            pronta[s] = max(pronta[s], t + durata + riposo)
+            mancanti[s] -= 1
+            if mancanti[s] == 0:
+                disponibili.append(s)
+
+    base = minuti(inizio)
+    if assegna:
+        for (p, _, prevista), (campo, t) in zip(attivita, piano):
+            if not prevista:
+                p["campo"] = campo + 1
+                p["orario"] = orario(base + t)
+    totale = max((t + durata for _, t in piano), default=0)
+    return {
+        "campi": campi, "durata_partita": durata, "riposo": riposo,
+        "partite": len(attivita), "previste": sum(prevista for *_, prevista in attivita),
+        "inizio": inizio, "fine": orario(base + totale), "durata_totale": totale,
+        "utilizzo": len(attivita) * durata / (campi * totale) if totale else 0.0,
+    }
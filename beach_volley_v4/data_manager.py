@@ -1,13 +1,21 @@
 """
-data_manager.py — Gestione persistenza JSON e modelli dati v4
+data_manager.py — Persistenza (JSON + journal o SQLite) e modelli dati v4
 """
-import json, os, random
+import json, math, os, random, time, sqlite3, threading
+from collections import deque
+from itertools import groupby
 from datetime import datetime
 from pathlib import Path
+from blob_store import salva_b64
 
 DATA_FILE = "beach_volley_data.json"
+JOURNAL_FILE = "beach_volley_journal.jsonl"
+JOURNAL_COMPATTA_OGNI = 200
+DB_FILE = "beach_volley.db"
+# "journal" (snapshot JSON + journal delle modifiche) oppure "sqlite"
+STORAGE_BACKEND = os.environ.get("BVL_STORAGE", "journal")
 
-def empty_state():
+def _stato_vuoto():
     return {
         "fase": "setup",
         "torneo": {
@@ -16,30 +24,736 @@ def empty_state():
             "data": str(datetime.today().date()),
             "tipo_gioco": "2x2",
             "usa_ranking_teste_serie": False,
+            "modello_simulazione": "Casuale",
+            "spareggio_finale": True,
+            "turni_svizzera": 0, "qualificate_svizzera": 8,
+            "campi": 2, "riposo_min": 10, "ora_inizio": "09:00",
         },
         "atleti": [], "squadre": [], "gironi": [], "bracket": [],
-        "ranking_globale": [], "vincitore": None,
+        "ranking_globale": [], "registro_tornei": [], "vincitore": None,
         "simulazione_al_ranking": True,
         "podio": [],
     }
 
+def empty_state():
+    return StatoTorneo(_stato_vuoto(), completo=True)
+
+def nuovo_torneo(state):
+    """Stato vuoto per il torneo successivo: atleti, ranking e registro tornei restano."""
+    nuovo = empty_state()
+    for k in ("atleti", "ranking_globale", "registro_tornei"):
+        nuovo[k] = state.get(k, [])
+    return nuovo
+
 def load_state():
+    """Carica lo stato dal backend configurato in STORAGE_BACKEND."""
+    carica, _ = _BACKENDS[STORAGE_BACKEND]
+    data = carica()
+    return StatoTorneo(data, completo=_prepara(data))
+
+def _prepara(data):
+    """Campi nuovi ai valori di default e migrazione dei formati precedenti; True se ha migrato."""
+    base = _stato_vuoto()
+    for k, v in base.items():
+        data.setdefault(k, v)
+    if "tipo_gioco" not in data.get("torneo", {}):
+        data["torneo"]["tipo_gioco"] = "2x2"
+    if "usa_ranking_teste_serie" not in data.get("torneo", {}):
+        data["torneo"]["usa_ranking_teste_serie"] = False
+    data["torneo"].setdefault("modello_simulazione", "Casuale")
+    data["torneo"].setdefault("spareggio_finale", True)
+    data["torneo"].setdefault("turni_svizzera", 0)
+    data["torneo"].setdefault("qualificate_svizzera", 8)
+    for k in ("campi", "riposo_min", "ora_inizio"):
+        data["torneo"].setdefault(k, base["torneo"][k])
+    return (_migra_foto_inline(data) | _migra_storico(data) | _migra_trofei(data)
+            | _migra_bracket(data) | _migra_classifica(data))
+
+def _migra_foto_inline(data):
+    """Sposta le foto base64 inline (formato precedente) nell'archivio blob; restituisce True se ha migrato."""
+    migrato = False
+    for a in data.get("atleti", []):
+        if "foto_b64" in a:
+            if a["foto_b64"]:
+                a["foto_blob"] = salva_b64(a["foto_b64"])
+            del a["foto_b64"]
+            migrato = True
+    return migrato
+
+def _migra_storico(data):
+    """
+    Converte lo storico (nome torneo, posizione) del formato precedente in voci
+    legate al registro tornei. Dei tornei passati non si conosce il numero di
+    squadre: si congelano i punti che il ranking mostrava finora.
+    """
+    registro = data["registro_tornei"]
+    per_nome = {t["nome"]: t for t in registro}
+    n_squadre = max(len(data.get("squadre", [])), 4)
+    migrato = False
+    for a in data.get("atleti", []):
+        storico = a["stats"].get("storico_posizioni", [])
+        for i, voce in enumerate(storico):
+            if isinstance(voce, dict):
+                continue
+            nome, pos = voce
+            if nome not in per_nome:
+                per_nome[nome] = _voce_registro(nome, None, n_squadre, None)
+                registro.append(per_nome[nome])
+            storico[i] = _voce_storico(per_nome[nome], pos)
+            migrato = True
+    return migrato
+
+def _migra_bracket(data):
+    """Bracket salvati come lista di partite del primo turno: si ricostruisce il tabellone a nodi."""
+    bracket = data.get("bracket", [])
+    if not bracket or all("nodo" in p for p in bracket):
+        return False
+    from bracket import da_primo_turno
+    data["bracket"] = da_primo_turno(bracket)
+    return True
+
+def _migra_classifica(data):
+    """
+    Partite confermate prima del flag in_classifica: se le statistiche delle
+    squadre coincidono con la fold di tutte le confermate, erano tutte in classifica.
+    """
+    partite = [p for g in data.get("gironi", []) for p in g.get("partite", [])] + data.get("bracket", [])
+    confermate = [p for p in partite if p["confermata"]]
+    if not confermate or any("in_classifica" in p for p in partite):
+        return False
+    for p in confermate:
+        p["in_classifica"] = True
+    stats = classifica_da_partite(confermate, [sq["id"] for sq in data.get("squadre", [])])
+    if any(stats[sq["id"]][k] != sq.get(k, 0) for sq in data.get("squadre", []) for k in CAMPI_CLASSIFICA):
+        for p in confermate:
+            p["in_classifica"] = False
+    return True
+
+def _migra_trofei(data):
+    """Atleti salvati prima dei trofei persistiti: si registrano quelli già raggiunti, senza torneo."""
+    migrato = False
+    for a in data.get("atleti", []):
+        if "trofei" not in a:
+            valuta_trofei(a)
+            for info in a["trofei"].values():
+                info["data"] = None
+            migrato = True
+    return migrato
+
+def save_state(state):
+    """
+    Salva solo le sezioni sporche dall'ultimo salvataggio tramite il backend
+    configurato. Se nulla è cambiato non tocca il disco; uno stato non
+    tracciato (dict semplice) viene riscritto per intero.
+    """
+    _, salva = _BACKENDS[STORAGE_BACKEND]
+    if isinstance(state, StatoTorneo) and not state.sporco():
+        _metriche["saltati"] += 1
+        return
+    _metriche["istanti"].append(time.monotonic())
+    _metriche["totali"] += 1
+    if not isinstance(state, StatoTorneo):
+        salva(state, completo=True)
+        return
+    salva(state, completo=state.completo)
+    state.pulisci()
+
+def statistiche_salvataggi(state=None):
+    """Contatori di I/O: salvataggi nell'ultimo minuto, byte scritti, salvataggi evitati."""
+    ora = time.monotonic()
+    recenti = _metriche["istanti"]
+    while recenti and ora - recenti[0] > 60:
+        recenti.popleft()
+    stats = {
+        "salvataggi_al_minuto": len(recenti),
+        "salvataggi_totali": _metriche["totali"],
+        "salvataggi_saltati": _metriche["saltati"],
+        "byte_scritti": _metriche["byte_scritti"],
+        "voci_journal": _persistito["voci_journal"],
+    }
+    if isinstance(state, StatoTorneo):
+        stats["versione"] = state.versione
+        stats["sezioni_sporche"] = sorted(state.sezioni_sporche())
+    return stats
+
+# ─── STATO TRACCIATO ─────────────────────────────────────────────────────────
+# StatoTorneo è un dict che avvolge ricorsivamente liste e dict annidati:
+# ogni mutazione incrementa la versione e segna come sporca la coppia
+# (sezione, chiave). chiave è None per modifiche strutturali della sezione,
+# altrimenti l'id del record di atleti/squadre o della partita toccata.
+#
+# Inserire un dict o una lista nello stato lo COPIA in un contenitore
+# tracciato (un dict Python non può cambiare classe sul posto): il riferimento
+# del chiamante resta un dict semplice, e modificarlo dopo l'inserimento non
+# tocca lo stato né viene salvato. Chi deve continuare a modificare un record
+# lo riprende dallo stato (es. `lista[-1]` dopo un append), come fanno
+# registra_torneo e genera_turno_svizzero.
+
+_COLLEZIONI = ("atleti", "squadre")
+_CON_PARTITE = ("gironi", "bracket")
+
+def _tag_figlio(tag, valore):
+    sezione, chiave = tag
+    if chiave is None and isinstance(valore, dict) and "id" in valore:
+        if sezione in _COLLEZIONI or (sezione in _CON_PARTITE and "sq1" in valore):
+            return (sezione, valore["id"])
+    return tag
+
+def _avvolgi(valore, radice, tag, campo=None):
+    """
+    Copia tracciata di `valore` (dict/list, ricorsivamente); gli altri valori
+    passano invariati. `campo` è la chiave sotto cui sta nel record (es.
+    "atleti" per la rosa di una squadra), attribuita alle sue mutazioni.
+    """
+    if isinstance(valore, (_DictTracciato, _ListaTracciata)):
+        if valore._radice is radice and valore._tag == tag and valore._campo == campo:
+            return valore
+        valore = dict(valore) if isinstance(valore, dict) else list(valore)
+    if isinstance(valore, dict):
+        return _DictTracciato(valore, radice, tag, campo)
+    if isinstance(valore, list):
+        return _ListaTracciata(valore, radice, tag, campo)
+    return valore
+
+
+class _Tracciato:
+    __slots__ = ()
+
+    def _segna(self, *nuovi, campo=None):
+        self._radice._segna(*self._tag, campo if campo is not None else self._campo)
+        for v in nuovi:
+            tag = getattr(v, "_tag", None)
+            if tag is not None and tag != self._tag:
+                self._radice._segna(*tag)
+
+    def _figlio(self, valore, campo=None):
+        tag = _tag_figlio(self._tag, valore)
+        # Un record nuovo (atleta, squadra, partita) riparte senza campo
+        campo = None if tag != self._tag else (campo if campo is not None else self._campo)
+        return _avvolgi(valore, self._radice, tag, campo)
+
+    def _adotta(self, valori, campo=None):
+        """Avvolge i figli in ingresso; restituisce anche quelli appena avvolti (non spostati)."""
+        figli = [self._figlio(v, campo) for v in valori]
+        return figli, [f for f, v in zip(figli, valori) if f is not v]
+
+
+class _DictTracciato(_Tracciato, dict):
+    __slots__ = ("_radice", "_tag", "_campo")
+
+    def __init__(self, valori, radice, tag, campo=None):
+        self._radice, self._tag, self._campo = radice, tag, campo
+        dict.__init__(self, ((k, self._figlio(v, k)) for k, v in valori.items()))
+
+    def __reduce_ex__(self, protocol):
+        return (dict, (dict(self),))
+
+    def __setitem__(self, k, v):
+        if k in self and dict.__getitem__(self, k) == v:
+            return
+        (v,), nuovi = self._adotta([v], k)
+        dict.__setitem__(self, k, v)
+        self._segna(*nuovi, campo=k)
+
+    def __delitem__(self, k):
+        dict.__delitem__(self, k)
+        self._segna(campo=k)
+
+    def __ior__(self, altro):
+        self.update(altro)
+        return self
+
+    def update(self, *args, **kwargs):
+        for k, v in dict(*args, **kwargs).items():
+            self[k] = v
+
+    def setdefault(self, k, default=None):
+        if k not in self:
+            self[k] = default
+        return dict.__getitem__(self, k)
+
+    def pop(self, k, *default):
+        if k in self:
+            self._segna(campo=k)
+        return dict.pop(self, k, *default)
+
+    def popitem(self):
+        item = dict.popitem(self)
+        self._segna()
+        return item
+
+    def clear(self):
+        if self:
+            dict.clear(self)
+            self._segna()
+
+
+class _ListaTracciata(_Tracciato, list):
+    __slots__ = ("_radice", "_tag", "_campo")
+
+    def __init__(self, valori, radice, tag, campo=None):
+        self._radice, self._tag, self._campo = radice, tag, campo
+        list.__init__(self, (self._figlio(v) for v in valori))
+
+    def __reduce_ex__(self, protocol):
+        return (list, (list(self),))
+
+    def __setitem__(self, i, v):
+        if isinstance(i, slice):
+            v, nuovi = self._adotta(list(v))
+        else:
+            (v,), nuovi = self._adotta([v])
+        list.__setitem__(self, i, v)
+        self._segna(*nuovi)
+
+    def __delitem__(self, i):
+        list.__delitem__(self, i)
+        self._segna()
+
+    def __iadd__(self, altri):
+        self.extend(altri)
+        return self
+
+    def __imul__(self, n):
+        list.__imul__(self, n)
+        self._segna()
+        return self
+
+    def append(self, v):
+        (v,), nuovi = self._adotta([v])
+        list.append(self, v)
+        self._segna(*nuovi)
+
+    def extend(self, altri):
+        altri, nuovi = self._adotta(list(altri))
+        list.extend(self, altri)
+        self._segna(*nuovi)
+
+    def insert(self, i, v):
+        (v,), nuovi = self._adotta([v])
+        list.insert(self, i, v)
+        self._segna(*nuovi)
+
+    def pop(self, i=-1):
+        v = list.pop(self, i)
+        self._segna()
+        return v
+
+    def remove(self, v):
+        list.remove(self, v)
+        self._segna()
+
+    def clear(self):
+        if self:
+            list.clear(self)
+            self._segna()
+
+    def sort(self, *args, **kwargs):
+        list.sort(self, *args, **kwargs)
+        self._segna()
+
+    def reverse(self):
+        list.reverse(self)
+        self._segna()
+
+
+class StatoTorneo(dict):
+    """
+    Stato del torneo con versione monotona e sezioni sporche.
+    `completo` indica uno stato nuovo (es. dopo un reset) che va riscritto per intero.
+    """
+
+    def __init__(self, valori=(), completo=False):
+        self.versione = 0
+        self.versioni = {}
+        self.versioni_struttura = {}
+        self.versioni_campi = {}
+        self.indici = {}
+        self.completo = completo
+        self._sporche = {}
+        dict.__init__(self)
+        for k, v in dict(valori).items():
+            dict.__setitem__(self, k, _avvolgi(v, self, (k, None)))
+
+    def __reduce_ex__(self, protocol):
+        return (dict, (dict(self),))
+
+    def _segna(self, sezione, chiave, campo=None):
+        self.versione += 1
+        self.versioni[sezione] = self.versione
+        if chiave is None:
+            self.versioni_struttura[sezione] = self.versione
+        self.versioni_campi[sezione, campo] = self.versione
+        self._sporche.setdefault(sezione, set()).add(chiave)
+
+    def __setitem__(self, k, v):
+        if k in self and dict.__getitem__(self, k) == v:
+            return
+        dict.__setitem__(self, k, _avvolgi(v, self, (k, None)))
+        self._segna(k, None)
+
+    def __delitem__(self, k):
+        dict.__delitem__(self, k)
+        self._segna(k, None)
+
+    def update(self, *args, **kwargs):
+        for k, v in dict(*args, **kwargs).items():
+            self[k] = v
+
+    def setdefault(self, k, default=None):
+        if k not in self:
+            self[k] = default
+        return dict.__getitem__(self, k)
+
+    def pop(self, k, *default):
+        if k in self:
+            self._segna(k, None)
+        return dict.pop(self, k, *default)
+
+    def versione_sezione(self, sezione):
+        return self.versioni.get(sezione, 0)
+
+    def versione_struttura(self, sezione):
+        return self.versioni_struttura.get(sezione, 0)
+
+    def versione_campi(self, sezione, campi):
+        """
+        Ultima versione in cui la sezione è cambiata in uno dei `campi` dei suoi
+        record (a qualsiasi profondità) o in modo non attribuibile a un campo.
+        """
+        v = self.versioni_campi
+        return max([v.get((sezione, c), 0) for c in campi] + [v.get((sezione, None), 0)])
+
+    def sezioni_sporche(self):
+        return set(self._sporche)
+
+    def sporco(self):
+        return self.completo or bool(self._sporche)
+
+    def pulisci(self):
+        self._sporche = {}
+        self.completo = False
+
+# ─── JOURNAL ─────────────────────────────────────────────────────────────────
+# Ogni riga del journal è {"ts": ..., "ops": [...]} con operazioni assolute:
+#   sez     → sostituisce un'intera sezione di primo livello (torneo, fase, ...)
+#   rec     → inserisce/sostituisce un record di atleti/squadre per id
+#   ordine  → fissa ordine e appartenenza dei record (le eliminazioni passano da qui)
+#   partita → sostituisce una partita di gironi/bracket per id
+
+_persistito = {"voci_journal": 0}
+_metriche = {"istanti": deque(), "totali": 0, "saltati": 0, "byte_scritti": 0}
+
+def _partite_sezione(k, valore):
+    if k == "gironi":
+        return [p for g in valore for p in g.get("partite", [])]
+    return list(valore)
+
+def _modifiche_sporche(state):
+    modifiche = []
+    for k, chiavi in state._sporche.items():
+        if k not in state:
+            continue
+        v = state[k]
+        if k in _COLLEZIONI:
+            per_id = {r["id"]: r for r in v}
+            modifiche += [{"op": "rec", "k": k, "v": per_id[c]} for c in chiavi if c in per_id]
+            if None in chiavi:
+                modifiche.append({"op": "ordine", "k": k, "ids": [r["id"] for r in v]})
+        elif k in _CON_PARTITE and None not in chiavi:
+            per_id = {p["id"]: p for p in _partite_sezione(k, v)}
+            modifiche += [{"op": "partita", "v": per_id[c]} for c in chiavi if c in per_id]
+        else:
+            modifiche.append({"op": "sez", "k": k, "v": v})
+    return modifiche
+
+def _applica_modifiche(state, modifiche):
+    for op in modifiche:
+        tipo = op["op"]
+        if tipo == "sez":
+            state[op["k"]] = op["v"]
+        elif tipo == "rec":
+            records = state.setdefault(op["k"], [])
+            pos = next((i for i, r in enumerate(records) if r["id"] == op["v"]["id"]), None)
+            if pos is None: records.append(op["v"])
+            else: records[pos] = op["v"]
+        elif tipo == "ordine":
+            per_id = {r["id"]: r for r in state.get(op["k"], [])}
+            state[op["k"]] = [per_id[i] for i in op["ids"] if i in per_id]
+        elif tipo == "partita":
+            for k in _CON_PARTITE:
+                for p in _partite_sezione(k, state.get(k, [])):
+                    if p["id"] == op["v"]["id"]:
+                        p.clear(); p.update(op["v"])
+
+def _carica_journal():
+    """Snapshot JSON + riapplicazione del journal."""
     if Path(DATA_FILE).exists():
         with open(DATA_FILE, "r", encoding="utf-8") as f:
             data = json.load(f)
-        base = empty_state()
-        for k, v in base.items():
-            data.setdefault(k, v)
-        if "tipo_gioco" not in data.get("torneo", {}):
-            data["torneo"]["tipo_gioco"] = "2x2"
-        if "usa_ranking_teste_serie" not in data.get("torneo", {}):
-            data["torneo"]["usa_ranking_teste_serie"] = False
-        return data
-    return empty_state()
+    else:
+        data = _stato_vuoto()
+    _persistito["voci_journal"] = _riapplica_journal(data)
+    return data
 
-def save_state(state):
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
+def _salva_journal(state, completo=False):
+    """
+    Accoda al journal le modifiche sporche; ogni JOURNAL_COMPATTA_OGNI voci
+    lo stato viene riscritto in un nuovo snapshot (compattazione).
+    """
+    if completo or not Path(DATA_FILE).exists():
+        _scrivi_snapshot(state)
+        return
+    _accoda_journal(_modifiche_sporche(state))
+    if _persistito["voci_journal"] >= JOURNAL_COMPATTA_OGNI:
+        _scrivi_snapshot(state)
+
+def _riapplica_journal(state):
+    if not Path(JOURNAL_FILE).exists():
+        return 0
+    n = valido = 0
+    with open(JOURNAL_FILE, "rb+") as f:
+        for riga in f:
+            try:
+                voce = json.loads(riga)
+            except json.JSONDecodeError:
+                # Ultima riga troncata da un crash: il resto non è affidabile e
+                # si taglia, così le voci successive si accodano dopo l'ultima integra
+                f.truncate(valido)
+                break
+            _applica_modifiche(state, voce["ops"])
+            n += 1
+            valido += len(riga)
+    return n
+
+def _registra_scrittura(n_byte):
+    _metriche["byte_scritti"] += n_byte
+
+def _accoda_journal(modifiche):
+    riga = json.dumps({"ts": datetime.now().isoformat(timespec="seconds"), "ops": modifiche}, ensure_ascii=False) + "\n"
+    with open(JOURNAL_FILE, "a", encoding="utf-8") as f:
+        f.write(riga)
+        f.flush()
+        os.fsync(f.fileno())
+    _persistito["voci_journal"] += 1
+    _registra_scrittura(len(riga.encode("utf-8")))
+
+def _scrivi_snapshot(state):
+    tmp = DATA_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, DATA_FILE)
+    if Path(JOURNAL_FILE).exists():
+        os.remove(JOURNAL_FILE)
+    _persistito["voci_journal"] = 0
+    _registra_scrittura(os.path.getsize(DATA_FILE))
+
+# ─── BACKEND SQLITE ──────────────────────────────────────────────────────────
+# Tabelle vere per atleti, squadre (con appartenenza indicizzata), gironi,
+# partite di gironi e bracket, storico posizioni; le altre sezioni (torneo,
+# fase, podio, ...) finiscono in `meta` come JSON. Le colonne `dati` tengono
+# il resto del record, così i campi nuovi non richiedono migrazioni.
+
+_SCHEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS meta (chiave TEXT PRIMARY KEY, valore TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS atleti (
+    id TEXT PRIMARY KEY, ordine INTEGER NOT NULL, nome TEXT NOT NULL, dati TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_atleti_nome ON atleti(nome);
+CREATE TABLE IF NOT EXISTS storico_posizioni (
+    atleta_id TEXT NOT NULL, n INTEGER NOT NULL, torneo TEXT, posizione INTEGER,
+    torneo_id TEXT, punti INTEGER,
+    PRIMARY KEY (atleta_id, n));
+CREATE TABLE IF NOT EXISTS squadre (
+    id TEXT PRIMARY KEY, ordine INTEGER NOT NULL, nome TEXT NOT NULL, dati TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS squadra_atleti (
+    squadra_id TEXT NOT NULL, atleta_id TEXT NOT NULL, n INTEGER NOT NULL,
+    PRIMARY KEY (squadra_id, atleta_id));
+CREATE INDEX IF NOT EXISTS idx_squadra_atleti_atleta ON squadra_atleti(atleta_id);
+CREATE TABLE IF NOT EXISTS gironi (idx INTEGER PRIMARY KEY, nome TEXT NOT NULL, dati TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS partite (
+    id TEXT PRIMARY KEY, sezione TEXT NOT NULL, girone INTEGER, ordine INTEGER NOT NULL,
+    sq1 TEXT, sq2 TEXT, confermata INTEGER NOT NULL, vincitore TEXT, dati TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_partite_sezione ON partite(sezione, girone, ordine);
+CREATE INDEX IF NOT EXISTS idx_partite_sq1 ON partite(sq1);
+CREATE INDEX IF NOT EXISTS idx_partite_sq2 ON partite(sq2);
+"""
+
+_sqlite = {"conn": None, "lock": threading.Lock()}
+
+def _connessione():
+    if _sqlite["conn"] is None:
+        conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA_SQLITE)
+        # Database creati prima del registro tornei
+        colonne = {r[1] for r in conn.execute("PRAGMA table_info(storico_posizioni)")}
+        for col, tipo in (("torneo_id", "TEXT"), ("punti", "INTEGER")):
+            if col not in colonne:
+                conn.execute(f"ALTER TABLE storico_posizioni ADD COLUMN {col} {tipo}")
+        _sqlite["conn"] = conn
+    return _sqlite["conn"]
+
+def _json(v):
+    return json.dumps(v, ensure_ascii=False)
+
+def _carica_sqlite():
+    conn = _connessione()
+    with _sqlite["lock"]:
+        if conn.execute("SELECT COUNT(*) FROM meta").fetchone()[0] == 0:
+            # Primo avvio con SQLite: importa i dati dal formato JSON se presenti,
+            # già migrati (le tabelle vogliono lo storico nel formato attuale)
+            data = _carica_journal()
+            _prepara(data)
+            with conn:
+                _scrivi_tutto_sqlite(conn, data)
+            return data
+        data = {k: json.loads(v) for k, v in conn.execute("SELECT chiave, valore FROM meta")}
+        storico = {}
+        for aid, tid, torneo, pos, punti in conn.execute(
+                "SELECT atleta_id, torneo_id, torneo, posizione, punti FROM storico_posizioni ORDER BY atleta_id, n"):
+            # Righe senza torneo_id: formato precedente, convertito da _migra_storico
+            voce = (torneo, pos) if tid is None else {"torneo_id": tid, "torneo": torneo, "pos": pos, "punti": punti}
+            storico.setdefault(aid, []).append(voce)
+        data["atleti"] = []
+        for aid, dati in conn.execute("SELECT id, dati FROM atleti ORDER BY ordine"):
+            a = json.loads(dati)
+            a["stats"]["storico_posizioni"] = storico.get(aid, [])
+            data["atleti"].append(a)
+        membri = {}
+        for sid, aid in conn.execute("SELECT squadra_id, atleta_id FROM squadra_atleti ORDER BY squadra_id, n"):
+            membri.setdefault(sid, []).append(aid)
+        data["squadre"] = []
+        for sid, dati in conn.execute("SELECT id, dati FROM squadre ORDER BY ordine"):
+            sq = json.loads(dati)
+            sq["atleti"] = membri.get(sid, [])
+            data["squadre"].append(sq)
+        data["gironi"] = [dict(json.loads(dati), partite=[])
+                          for _, dati in conn.execute("SELECT idx, dati FROM gironi ORDER BY idx")]
+        data["bracket"] = []
+        for sezione, girone, dati in conn.execute(
+                "SELECT sezione, girone, dati FROM partite ORDER BY sezione, girone, ordine"):
+            if sezione == "gironi" and girone is not None and girone < len(data["gironi"]):
+                data["gironi"][girone]["partite"].append(json.loads(dati))
+            elif sezione == "bracket":
+                data["bracket"].append(json.loads(dati))
+        return data
+
+def _salva_sqlite(state, completo=False):
+    conn = _connessione()
+    with _sqlite["lock"], conn:
+        if completo:
+            _scrivi_tutto_sqlite(conn, state)
+            return
+        for k, chiavi in state._sporche.items():
+            if k not in state:
+                conn.execute("DELETE FROM meta WHERE chiave = ?", (k,))
+            elif k == "atleti":
+                _sqlite_atleti(conn, state[k], chiavi)
+            elif k == "squadre":
+                _sqlite_squadre(conn, state[k], chiavi)
+            elif k in _CON_PARTITE:
+                if None in chiavi:
+                    _sqlite_sezione_partite(conn, k, state[k])
+                else:
+                    per_id = {p["id"]: p for p in _partite_sezione(k, state[k])}
+                    for pid in chiavi:
+                        if pid in per_id:
+                            _sqlite_aggiorna_partita(conn, per_id[pid])
+            else:
+                _sqlite_meta(conn, k, state[k])
+
+def _scrivi_tutto_sqlite(conn, state):
+    for tabella in ("meta", "atleti", "storico_posizioni", "squadre", "squadra_atleti", "gironi", "partite"):
+        conn.execute(f"DELETE FROM {tabella}")
+    for k, v in state.items():
+        if k == "atleti":
+            _sqlite_atleti(conn, v, {r["id"] for r in v} | {None})
+        elif k == "squadre":
+            _sqlite_squadre(conn, v, {r["id"] for r in v} | {None})
+        elif k in _CON_PARTITE:
+            _sqlite_sezione_partite(conn, k, v)
+        else:
+            _sqlite_meta(conn, k, v)
+
+def _sqlite_meta(conn, k, v):
+    riga = _json(v)
+    conn.execute("INSERT OR REPLACE INTO meta (chiave, valore) VALUES (?, ?)", (k, riga))
+    _registra_scrittura(len(riga))
+
+def _sqlite_atleti(conn, atleti, chiavi):
+    ordine = {a["id"]: i for i, a in enumerate(atleti)}
+    scritti = 0
+    for a in atleti:
+        if a["id"] not in chiavi:
+            continue
+        dati = _json({**a, "stats": {k: v for k, v in a["stats"].items() if k != "storico_posizioni"}})
+        conn.execute("INSERT OR REPLACE INTO atleti (id, ordine, nome, dati) VALUES (?, ?, ?, ?)",
+                     (a["id"], ordine[a["id"]], a["nome"], dati))
+        conn.execute("DELETE FROM storico_posizioni WHERE atleta_id = ?", (a["id"],))
+        conn.executemany(
+            "INSERT INTO storico_posizioni (atleta_id, n, torneo_id, torneo, posizione, punti) VALUES (?, ?, ?, ?, ?, ?)",
+            [(a["id"], n, v["torneo_id"], v["torneo"], v["pos"], v["punti"])
+             for n, v in enumerate(a["stats"].get("storico_posizioni", []))])
+        scritti += len(dati)
+    if None in chiavi:
+        _sqlite_riordina(conn, "atleti", ordine)
+        conn.execute("DELETE FROM storico_posizioni WHERE atleta_id NOT IN (SELECT id FROM atleti)")
+    _registra_scrittura(scritti)
+
+def _sqlite_squadre(conn, squadre, chiavi):
+    ordine = {s["id"]: i for i, s in enumerate(squadre)}
+    scritti = 0
+    for sq in squadre:
+        if sq["id"] not in chiavi:
+            continue
+        dati = _json({k: v for k, v in sq.items() if k != "atleti"})
+        conn.execute("INSERT OR REPLACE INTO squadre (id, ordine, nome, dati) VALUES (?, ?, ?, ?)",
+                     (sq["id"], ordine[sq["id"]], sq["nome"], dati))
+        conn.execute("DELETE FROM squadra_atleti WHERE squadra_id = ?", (sq["id"],))
+        conn.executemany("INSERT OR IGNORE INTO squadra_atleti (squadra_id, atleta_id, n) VALUES (?, ?, ?)",
+                         [(sq["id"], aid, n) for n, aid in enumerate(sq["atleti"])])
+        scritti += len(dati)
+    if None in chiavi:
+        _sqlite_riordina(conn, "squadre", ordine)
+        conn.execute("DELETE FROM squadra_atleti WHERE squadra_id NOT IN (SELECT id FROM squadre)")
+    _registra_scrittura(scritti)
+
+def _sqlite_riordina(conn, tabella, ordine):
+    esistenti = {r[0] for r in conn.execute(f"SELECT id FROM {tabella}")}
+    conn.executemany(f"DELETE FROM {tabella} WHERE id = ?", [(i,) for i in esistenti - ordine.keys()])
+    conn.executemany(f"UPDATE {tabella} SET ordine = ? WHERE id = ?", [(n, i) for i, n in ordine.items()])
+
+def _riga_partita(p):
+    return (p.get("sq1"), p.get("sq2"), int(bool(p.get("confermata"))), p.get("vincitore"), _json(p))
+
+def _sqlite_sezione_partite(conn, k, valore):
+    conn.execute("DELETE FROM partite WHERE sezione = ?", (k,))
+    righe = []
+    if k == "gironi":
+        conn.execute("DELETE FROM gironi")
+        for gi, g in enumerate(valore):
+            conn.execute("INSERT INTO gironi (idx, nome, dati) VALUES (?, ?, ?)",
+                         (gi, g.get("nome", ""), _json({kk: vv for kk, vv in g.items() if kk != "partite"})))
+            righe += [(p["id"], k, gi, n) + _riga_partita(p) for n, p in enumerate(g.get("partite", []))]
+    else:
+        righe = [(p["id"], k, None, n) + _riga_partita(p) for n, p in enumerate(valore)]
+    conn.executemany(
+        "INSERT OR REPLACE INTO partite (id, sezione, girone, ordine, sq1, sq2, confermata, vincitore, dati) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", righe)
+    _registra_scrittura(sum(len(r[-1]) for r in righe))
+
+def _sqlite_aggiorna_partita(conn, p):
+    """Conferma/modifica di una partita: un solo UPDATE di riga."""
+    riga = _riga_partita(p)
+    conn.execute("UPDATE partite SET sq1 = ?, sq2 = ?, confermata = ?, vincitore = ?, dati = ? WHERE id = ?",
+                 riga + (p["id"],))
+    _registra_scrittura(len(riga[-1]))
+
+_BACKENDS = {
+    "journal": (_carica_journal, _salva_journal),
+    "sqlite": (_carica_sqlite, _salva_sqlite),
+}
 
 def new_atleta(nome, cognome=""):
     full_name = f"{nome} {cognome}".strip() if cognome else nome
@@ -48,7 +762,8 @@ def new_atleta(nome, cognome=""):
         "nome": full_name,
         "nome_proprio": nome,
         "cognome": cognome,
-        "foto_b64": None,
+        "foto_blob": None,
+        "trofei": {}, "prossimo_trofeo": None,
         "stats": {
             "tornei": 0, "vittorie": 0, "sconfitte": 0,
             "set_vinti": 0, "set_persi": 0,
@@ -64,10 +779,10 @@ def new_atleta(nome, cognome=""):
     }
 
 def get_atleta_by_id(state, aid):
-    for a in state["atleti"]:
-        if a["id"] == aid:
-            return a
-    return None
+    return _trova(state, "atleti_id", "atleti", _per_id, aid, lambda a: a["id"] == aid)
+
+def get_atleta_by_nome(state, nome):
+    return _trova(state, "atleti_nome", "atleti", _per_nome, nome, lambda a: a["nome"] == nome)
 
 def new_squadra(nome, atleta_ids, quota_pagata=0.0):
     return {
@@ -79,15 +794,73 @@ def new_squadra(nome, atleta_ids, quota_pagata=0.0):
     }
 
 def get_squadra_by_id(state, sid):
-    for s in state["squadre"]:
-        if s["id"] == sid:
-            return s
-    return None
+    return _trova(state, "squadre_id", "squadre", _per_id, sid, lambda s: s["id"] == sid)
+
+def get_squadra_di_atleta(state, aid):
+    return _trova(state, "squadre_atleta", "squadre", _per_atleta, aid, lambda s: aid in s["atleti"])
+
+def get_partita_nodo(state, nodo):
+    """Partita del tabellone nella posizione `nodo` dell'heap (1 = finale, 0 = finale 3° posto)."""
+    return _trova(state, "bracket_nodo", "bracket", _per_nodo, nodo, lambda p: p.get("nodo") == nodo)
 
 def nome_squadra(state, sid):
     s = get_squadra_by_id(state, sid)
     return s["nome"] if s else "?"
 
+def nomi_atleti_squadra(state, sq):
+    return [a["nome"] for a in (get_atleta_by_id(state, aid) for aid in sq["atleti"]) if a]
+
+# ─── INDICI ──────────────────────────────────────────────────────────────────
+# id → record, nome → atleta, atleta → squadra, nodo → partita del bracket.
+# Gli indici vivono sullo StatoTorneo e si ricostruiscono quando cambia la
+# struttura della sezione (inserimenti, eliminazioni, riordini). Nome e
+# composizione delle squadre cambiano sul posto: ogni risultato viene
+# verificato e, se superato, l'indice si ricostruisce al più una volta per
+# versione della sezione.
+
+def _per_id(records):
+    return {r["id"]: r for r in records}
+
+def _per_nome(atleti):
+    # A parità di nome vince il primo, come nella scansione lineare
+    return {a["nome"]: a for a in reversed(atleti)}
+
+def _per_nodo(bracket):
+    return {p["nodo"]: p for p in bracket if "nodo" in p}
+
+def _per_atleta(squadre):
+    idx = {}
+    for sq in squadre:
+        for aid in sq["atleti"]:
+            idx.setdefault(aid, sq)
+    return idx
+
+def _indice(state, nome, sezione, costruisci, aggiorna=False):
+    voce = state.indici.get(nome)
+    ver = state.versione_struttura(sezione)
+    if voce is None or voce[0] != ver or (aggiorna and voce[1] != state.versione_sezione(sezione)):
+        voce = (ver, state.versione_sezione(sezione), costruisci(state.get(sezione, [])))
+        state.indici[nome] = voce
+    return voce[2]
+
+def memorizzato(state, nome, chiave, calcola):
+    """Dato derivato dallo stato (es. il ranking), ricalcolato solo quando cambia `chiave`."""
+    if not isinstance(state, StatoTorneo):
+        return calcola(state)
+    voce = state.indici.get(nome)
+    if voce is None or voce[0] != chiave:
+        voce = (chiave, calcola(state))
+        state.indici[nome] = voce
+    return voce[1]
+
+def _trova(state, nome, sezione, costruisci, chiave, valido):
+    if not isinstance(state, StatoTorneo):
+        return next((r for r in state.get(sezione, []) if valido(r)), None)
+    r = _indice(state, nome, sezione, costruisci).get(chiave)
+    if r is None or not valido(r):
+        r = _indice(state, nome, sezione, costruisci, aggiorna=True).get(chiave)
+    return r if r is not None and valido(r) else None
+
 def new_partita(sq1_id, sq2_id, fase="girone", girone=None):
     return {
         "id": f"p_{random.randint(100000,999999)}",
@@ -96,11 +869,54 @@ def new_partita(sq1_id, sq2_id, fase="girone", girone=None):
         "in_battuta": 1, "confermata": False, "vincitore": None,
     }
 
-def simula_set(pmax, tie_break=False):
+# ─── MODELLO DI GIOCO ────────────────────────────────────────────────────────
+# "Casuale": ogni scambio è 50/50. "Attributi": la probabilità di vincere lo
+# scambio dipende da attacco (attacco, battuta, alzata) contro difesa (difesa,
+# muro, ricezione) delle due squadre. Le forze si calcolano una volta per
+# squadra e restano in cache finché non cambiano gli attributi degli atleti
+# o le rose delle squadre (versione_campi), non a ogni risultato confermato.
+
+MODELLI_SIMULAZIONE = ["Casuale", "Attributi"]
+_PESI_ATTACCO = {"attacco": 1.3, "battuta": 0.9, "alzata": 0.6}
+_PESI_DIFESA = {"difesa": 1.2, "muro": 1.0, "ricezione": 1.0}
+_SCALA_FORZA = 100.0   # 20 punti di vantaggio netto ≈ 55% degli scambi
+_CAMPI_FORZA = ("stats", *_PESI_ATTACCO, *_PESI_DIFESA)
+
+def _media_pesata(atleti, pesi):
+    return sum(sum(a["stats"].get(k, 50) * p for k, p in pesi.items()) / sum(pesi.values())
+               for a in atleti) / len(atleti)
+
+def _forza_squadra(state, sq):
+    atleti = [a for a in (get_atleta_by_id(state, aid) for aid in sq["atleti"]) if a]
+    if not atleti:
+        return (50.0, 50.0)
+    return (_media_pesata(atleti, _PESI_ATTACCO), _media_pesata(atleti, _PESI_DIFESA))
+
+def forze_squadre(state):
+    """{squadra_id: (attacco, difesa)}. Gli stati di lavoro delle simulazioni possono portarle già calcolate."""
+    if "forze_squadre" in state:
+        return state["forze_squadre"]
+    calcola = lambda s: {sq["id"]: _forza_squadra(s, sq) for sq in s["squadre"]}
+    if not isinstance(state, StatoTorneo):
+        return calcola(state)
+    # Solo attributi degli atleti e rose delle squadre: le statistiche che ogni risultato aggiorna non contano
+    chiave = (state.versione_campi("atleti", _CAMPI_FORZA), state.versione_campi("squadre", ("atleti",)))
+    return memorizzato(state, "forze_squadre", chiave, calcola)
+
+def probabilita_scambio(state, sq1_id, sq2_id):
+    """Probabilità che sq1 vinca uno scambio contro sq2 secondo il modello del torneo."""
+    if state["torneo"].get("modello_simulazione", "Casuale") != "Attributi":
+        return 0.5
+    forze = forze_squadre(state)
+    att1, dif1 = forze.get(sq1_id, (50.0, 50.0))
+    att2, dif2 = forze.get(sq2_id, (50.0, 50.0))
+    return 1 / (1 + math.exp(-((att1 - dif2) - (att2 - dif1)) / _SCALA_FORZA))
+
+def simula_set(pmax, tie_break=False, p=0.5):
     limit = 15 if tie_break else pmax
     a, b = 0, 0
     while True:
-        if random.random() > 0.5: a += 1
+        if random.random() > 1 - p: a += 1
         else: b += 1
         if a >= limit or b >= limit:
             if abs(a - b) >= 2: return a, b
@@ -110,8 +926,9 @@ def simula_set(pmax, tie_break=False):
 def simula_partita(state, partita):
     pmax = state["torneo"]["punteggio_max"]
     formato = state["torneo"]["formato_set"]
+    p = probabilita_scambio(state, partita["sq1"], partita["sq2"])
     if formato == "Set Unico":
-        p1, p2 = simula_set(pmax)
+        p1, p2 = simula_set(pmax, p=p)
         partita["punteggi"] = [(p1, p2)]
         partita["set_sq1"] = 1 if p1 > p2 else 0
         partita["set_sq2"] = 1 if p2 > p1 else 0
@@ -119,7 +936,7 @@ def simula_partita(state, partita):
         sets_1, sets_2, punteggi = 0, 0, []
         while sets_1 < 2 and sets_2 < 2:
             tie = (sets_1 == 1 and sets_2 == 1)
-            p1, p2 = simula_set(pmax, tie_break=tie)
+            p1, p2 = simula_set(pmax, tie_break=tie, p=p)
             punteggi.append((p1, p2))
             if p1 > p2: sets_1 += 1
             else: sets_2 += 1
@@ -129,26 +946,113 @@ def simula_partita(state, partita):
     partita["confermata"] = True
     return partita
 
-def aggiorna_classifica_squadra(state, partita):
-    sq1 = get_squadra_by_id(state, partita["sq1"])
-    sq2 = get_squadra_by_id(state, partita["sq2"])
-    if not sq1 or not sq2: return
+# ─── CLASSIFICA ──────────────────────────────────────────────────────────────
+# Le partite confermate sono il registro dei risultati: ognuna porta un delta
+# per le due squadre (CAMPI_CLASSIFICA) e il flag in_classifica dice se è già
+# nelle statistiche delle squadre, che ne sono la vista materializzata.
+# Applicare o stornare una partita costa O(1), quindi correggere o
+# risimulare un risultato non richiede di ricalcolare tutto; la ricostruzione
+# completa è una fold sulle partite.
+
+CAMPI_CLASSIFICA = ("punti_classifica", "vittorie", "sconfitte", "set_vinti", "set_persi",
+                    "punti_fatti", "punti_subiti")
+
+def chiave_classifica(s):
+    """Ordinamento della classifica di girone: punti, vittorie, differenza set, differenza punti."""
+    return (-s["punti_classifica"], -s["vittorie"],
+            -(s["set_vinti"] - s["set_persi"]),
+            -(s["punti_fatti"] - s["punti_subiti"]))
+
+def delta_partita(partita):
+    """[(sid, incrementi in ordine CAMPI_CLASSIFICA)] per le due squadre di una partita confermata."""
     s1v, s2v = partita["set_sq1"], partita["set_sq2"]
-    p1_tot = sum(p[0] for p in partita["punteggi"])
-    p2_tot = sum(p[1] for p in partita["punteggi"])
-    sq1["set_vinti"] += s1v; sq1["set_persi"] += s2v
-    sq2["set_vinti"] += s2v; sq2["set_persi"] += s1v
-    sq1["punti_fatti"] += p1_tot; sq1["punti_subiti"] += p2_tot
-    sq2["punti_fatti"] += p2_tot; sq2["punti_subiti"] += p1_tot
-    if partita["vincitore"] == partita["sq1"]:
-        sq1["vittorie"] += 1; sq1["punti_classifica"] += 3
-        sq2["sconfitte"] += 1; sq2["punti_classifica"] += 1
-    else:
-        sq2["vittorie"] += 1; sq2["punti_classifica"] += 3
-        sq1["sconfitte"] += 1; sq1["punti_classifica"] += 1
+    p1 = sum(p[0] for p in partita["punteggi"])
+    p2 = sum(p[1] for p in partita["punteggi"])
+    vince1 = partita["vincitore"] == partita["sq1"]
+    return [(partita["sq1"], (3 if vince1 else 1, int(vince1), int(not vince1), s1v, s2v, p1, p2)),
+            (partita["sq2"], (1 if vince1 else 3, int(not vince1), int(vince1), s2v, s1v, p2, p1))]
+
+def _applica_delta(state, partita, segno):
+    squadre = [get_squadra_by_id(state, sid) for sid in (partita["sq1"], partita["sq2"])]
+    if not all(squadre):
+        return False
+    for sq, (_, delta) in zip(squadre, delta_partita(partita)):
+        for campo, d in zip(CAMPI_CLASSIFICA, delta):
+            sq[campo] += segno * d
+    return True
+
+def aggiorna_classifica_squadra(state, partita):
+    """Porta in classifica una partita confermata (una volta sola)."""
+    if not partita.get("in_classifica") and _applica_delta(state, partita, 1):
+        partita["in_classifica"] = True
+
+def storna_classifica_squadra(state, partita):
+    """Toglie dalla classifica il contributo di una partita, prima di correggerla o risimularla."""
+    if partita.get("in_classifica") and _applica_delta(state, partita, -1):
+        partita["in_classifica"] = False
+
+def classifica_da_partite(partite, squadre_ids):
+    """Statistiche {sid: {campo: valore}} come fold delle partite in classifica."""
+    stats = {sid: dict.fromkeys(CAMPI_CLASSIFICA, 0) for sid in squadre_ids}
+    for p in partite:
+        if not p.get("in_classifica"):
+            continue
+        for sid, delta in delta_partita(p):
+            if sid in stats:
+                for campo, d in zip(CAMPI_CLASSIFICA, delta):
+                    stats[sid][campo] += d
+    return stats
+
+def partite_torneo(state):
+    return [p for g in state["gironi"] for p in g["partite"]] + list(state["bracket"])
+
+def ricostruisci_classifica(state):
+    """Ricalcola da zero le statistiche delle squadre dalle partite in classifica."""
+    stats = classifica_da_partite(partite_torneo(state), [sq["id"] for sq in state["squadre"]])
+    for sq in state["squadre"]:
+        sq.update(stats[sq["id"]])
+
+# ─── REGISTRO TORNEI ─────────────────────────────────────────────────────────
+# Un torneo entra nel registro alla proclamazione; lo storico posizioni degli
+# atleti lo referenzia per id con i punti ranking già calcolati, così i tornei
+# successivi non ricalcolano i piazzamenti passati.
+
+TIER_TORNEO = [(16, "Major"), (8, "Open"), (0, "Challenger")]
+
+def calcola_punti_ranking(pos, n_squadre):
+    pts_massimi = n_squadre * 10
+    return max(0, pts_massimi - ((pos - 1) * 10))
+
+def tier_torneo(n_squadre):
+    return next(nome for soglia, nome in TIER_TORNEO if n_squadre >= soglia)
+
+def _voce_registro(nome, data, n_squadre, formato):
+    return {
+        "id": f"t_{nome.lower().replace(' ','_')}_{random.randint(1000,9999)}",
+        "nome": nome, "data": data, "n_squadre": n_squadre,
+        "formato": formato, "tier": tier_torneo(n_squadre),
+    }
+
+def _voce_storico(torneo, pos):
+    return {"torneo_id": torneo["id"], "torneo": torneo["nome"], "pos": pos,
+            "punti": calcola_punti_ranking(pos, torneo["n_squadre"])}
+
+def registra_torneo(state):
+    """Aggiunge il torneo corrente al registro (una volta sola) e ne restituisce la voce."""
+    t = state["torneo"]
+    registro = state.setdefault("registro_tornei", [])
+    voce = next((r for r in registro if r["id"] == t.get("id")), None)
+    if voce is None:
+        registro.append(_voce_registro(t["nome"], t.get("data"), len(state["squadre"]), t.get("tipo_tabellone")))
+        voce = registro[-1]   # la copia tracciata, non il dict appena creato
+        t["id"] = voce["id"]
+    return voce
+
+def get_torneo_registro(state, tid):
+    return next((r for r in state.get("registro_tornei", []) if r["id"] == tid), None)
 
 def trasferisci_al_ranking(state, podio):
-    nome_torneo = state["torneo"]["nome"]
+    torneo = registra_torneo(state)
     n_squadre = len(state["squadre"])
     atleti_aggiornati = set()
     for sq in state["squadre"]:
@@ -159,18 +1063,19 @@ def trasferisci_al_ranking(state, podio):
             s["set_vinti"] += sq["set_vinti"]; s["set_persi"] += sq["set_persi"]
             s["punti_fatti"] += sq["punti_fatti"]; s["punti_subiti"] += sq["punti_subiti"]
             atleti_aggiornati.add(aid)
+    podio_atleti = set()
     for pos, sq_id in podio:
         sq = get_squadra_by_id(state, sq_id)
         if not sq: continue
+        podio_atleti.update(sq["atleti"])
         for aid in sq["atleti"]:
             atleta = get_atleta_by_id(state, aid)
             if not atleta: continue
             s = atleta["stats"]
-            s["tornei"] += 1; s["storico_posizioni"].append((nome_torneo, pos))
+            s["tornei"] += 1; s["storico_posizioni"].append(_voce_storico(torneo, pos))
             if pos == 1: s["vittorie"] += 1
             else: s["sconfitte"] += 1
             _aggiorna_attributi_fifa(atleta, pos)
-    podio_atleti = {aid for _, sq_id in podio for aid in (get_squadra_by_id(state, sq_id) or {"atleti":[]})["atleti"]}
     for sq in state["squadre"]:
         for aid in sq["atleti"]:
             if aid not in podio_atleti:
@@ -178,7 +1083,11 @@ def trasferisci_al_ranking(state, podio):
                 if atleta:
                     atleta["stats"]["tornei"] += 1
                     atleta["stats"]["sconfitte"] += 1
-                    atleta["stats"]["storico_posizioni"].append((nome_torneo, n_squadre // 2))
+                    atleta["stats"]["storico_posizioni"].append(_voce_storico(torneo, n_squadre // 2))
+    for aid in atleti_aggiornati | podio_atleti:
+        atleta = get_atleta_by_id(state, aid)
+        if atleta:
+            valuta_trofei(atleta, torneo)
 
 def _aggiorna_attributi_fifa(atleta, posizione):
     s = atleta["stats"]
@@ -188,12 +1097,21 @@ def _aggiorna_attributi_fifa(atleta, posizione):
         if attr in s:
             s[attr] = min(99, s[attr] + random.randint(0, boost))
 
+ATTRIBUTI_FIFA = ["attacco","difesa","muro","ricezione","battuta","alzata"]
+PESI_FIFA = [1.3, 1.2, 1.0, 1.0, 0.9, 0.6]
+
+# Fasce di overall per tipo card, dalla più alta (vedi get_card_type)
+FASCE_CARD = [
+    (85, "dio_olimpo"), (80, "leggenda"), (75, "eroe"),
+    (70, "oro_raro"), (65, "oro_comune"),
+    (60, "argento_raro"), (55, "argento_comune"),
+    (50, "bronzo_raro"), (0, "bronzo_comune"),
+]
+
 def calcola_overall_fifa(atleta):
     s = atleta["stats"]
-    attrs = ["attacco","difesa","muro","ricezione","battuta","alzata"]
-    vals = [s.get(a, 50) for a in attrs]
-    pesi = [1.3, 1.2, 1.0, 1.0, 0.9, 0.6]
-    weighted = sum(v * p for v, p in zip(vals, pesi)) / sum(pesi)
+    vals = [s.get(a, 50) for a in ATTRIBUTI_FIFA]
+    weighted = sum(v * p for v, p in zip(vals, PESI_FIFA)) / sum(PESI_FIFA)
     vittorie = s.get("vittorie", 0)
     bonus = min(10, vittorie * 2)
     return min(99, max(45, int(weighted + bonus)))
@@ -206,15 +1124,16 @@ def get_card_type(overall, tornei=0, vittorie=0):
     65-69: oro_comune | 70-74: oro_raro
     75-79: eroe | 80-84: leggenda | 85-99: dio_olimpo
     """
-    if overall >= 85: return "dio_olimpo"
-    if overall >= 80: return "leggenda"
-    if overall >= 75: return "eroe"
-    if overall >= 70: return "oro_raro"
-    if overall >= 65: return "oro_comune"
-    if overall >= 60: return "argento_raro"
-    if overall >= 55: return "argento_comune"
-    if overall >= 50: return "bronzo_raro"
-    return "bronzo_comune"
+    return next(tipo for soglia, tipo in FASCE_CARD if overall >= soglia)
+
+# ─── TROFEI ──────────────────────────────────────────────────────────────────
+# `check` dice se il trofeo è raggiunto, `progresso` quanto manca (1.0 = fatto).
+# Si valutano solo quando cambiano le statistiche (trasferisci_al_ranking): gli
+# sblocchi restano salvati sull'atleta con torneo e data, insieme al prossimo
+# trofeo da sbloccare, e le bacheche li leggono senza ricalcolare nulla.
+
+def _podi(s):
+    return sum(1 for v in s.get("storico_posizioni", []) if v["pos"] <= 3)
 
 TROFEI_DEFINIZIONE = [
     {
@@ -222,127 +1141,395 @@ TROFEI_DEFINIZIONE = [
         "descrizione": "Disputa il tuo primo torneo", "colore": "#cd7f32",
         "sfondo": "linear-gradient(135deg,#5C3317,#CD853F)",
         "rarità": "comune",
-        "check": lambda s: s["tornei"] >= 1
+        "check": lambda s: s["tornei"] >= 1,
+        "progresso": lambda s: s["tornei"] / 1
     },
     {
         "id": "dilettante", "nome": "Dilettante", "icona": "🥋",
         "descrizione": "Disputa 5 tornei", "colore": "#a0a0a0",
         "sfondo": "linear-gradient(135deg,#555,#aaa)",
         "rarità": "comune",
-        "check": lambda s: s["tornei"] >= 5
+        "check": lambda s: s["tornei"] >= 5,
+        "progresso": lambda s: s["tornei"] / 5
     },
     {
         "id": "esordiente", "nome": "Esordiente", "icona": "🥉",
         "descrizione": "Conquista 1 podio (top 3)", "colore": "#cd7f32",
         "sfondo": "linear-gradient(135deg,#8b4513,#cd7f32)",
         "rarità": "non comune",
-        "check": lambda s: any(pos <= 3 for _, pos in s.get("storico_posizioni", []))
+        "check": lambda s: _podi(s) >= 1,
+        "progresso": lambda s: _podi(s) / 1
     },
     {
         "id": "esperto", "nome": "Esperto", "icona": "🎖️",
         "descrizione": "Vinci il tuo primo torneo", "colore": "#c0c0c0",
         "sfondo": "linear-gradient(135deg,#696969,#C0C0C0)",
         "rarità": "non comune",
-        "check": lambda s: s["vittorie"] >= 1
+        "check": lambda s: s["vittorie"] >= 1,
+        "progresso": lambda s: s["vittorie"] / 1
     },
     {
         "id": "campione", "nome": "Campione", "icona": "🏅",
         "descrizione": "Vinci 3 tornei", "colore": "#ffd700",
         "sfondo": "linear-gradient(135deg,#8B6914,#FFD700)",
         "rarità": "raro",
-        "check": lambda s: s["vittorie"] >= 3
+        "check": lambda s: s["vittorie"] >= 3,
+        "progresso": lambda s: s["vittorie"] / 3
     },
     {
         "id": "eroe", "nome": "Eroe", "icona": "⭐",
         "descrizione": "Vinci 5 tornei", "colore": "#ffd700",
         "sfondo": "linear-gradient(135deg,#B8860B,#FFD700,#B8860B)",
         "rarità": "raro",
-        "check": lambda s: s["vittorie"] >= 5
+        "check": lambda s: s["vittorie"] >= 5,
+        "progresso": lambda s: s["vittorie"] / 5
     },
     {
         "id": "leggenda", "nome": "Leggenda", "icona": "👑",
         "descrizione": "Vinci 10 tornei", "colore": "#e040fb",
         "sfondo": "linear-gradient(135deg,#6A0DAD,#E040FB,#6A0DAD)",
         "rarità": "epico",
-        "check": lambda s: s["vittorie"] >= 10
+        "check": lambda s: s["vittorie"] >= 10,
+        "progresso": lambda s: s["vittorie"] / 10
     },
     {
         "id": "olimpo", "nome": "Nell'Olimpo", "icona": "🌟",
         "descrizione": "Conquista 20 medaglie totali", "colore": "#00f5ff",
         "sfondo": "linear-gradient(135deg,#003366,#00c8ff,#003366)",
         "rarità": "leggendario",
-        "check": lambda s: sum(1 for _, pos in s.get("storico_posizioni", []) if pos <= 3) >= 20
+        "check": lambda s: _podi(s) >= 20,
+        "progresso": lambda s: _podi(s) / 20
     },
     {
         "id": "iron_man", "nome": "Iron Man", "icona": "💪",
         "descrizione": "Vinci 50 set in carriera", "colore": "#ff6600",
         "sfondo": "linear-gradient(135deg,#8B2500,#FF6600,#8B2500)",
         "rarità": "raro",
-        "check": lambda s: s.get("set_vinti", 0) >= 50
+        "check": lambda s: s.get("set_vinti", 0) >= 50,
+        "progresso": lambda s: s.get("set_vinti", 0) / 50
     },
     {
         "id": "cecchino", "nome": "Cecchino", "icona": "🎯",
         "descrizione": "Quoziente punti > 2.0 (min 10 set)", "colore": "#00ff88",
         "sfondo": "linear-gradient(135deg,#004422,#00FF88,#004422)",
         "rarità": "non comune",
-        "check": lambda s: (s.get("punti_fatti", 0) / max(s.get("set_vinti", 0) + s.get("set_persi", 0), 1)) > 2.0 and (s.get("set_vinti", 0) + s.get("set_persi", 0)) >= 10
+        "check": lambda s: (s.get("punti_fatti", 0) / max(s.get("set_vinti", 0) + s.get("set_persi", 0), 1)) > 2.0 and (s.get("set_vinti", 0) + s.get("set_persi", 0)) >= 10,
+        "progresso": lambda s: min((s.get("set_vinti", 0) + s.get("set_persi", 0)) / 10, (s.get("punti_fatti", 0) / max(s.get("set_vinti", 0) + s.get("set_persi", 0), 1)) / 2.0)
     },
     {
         "id": "veterano", "nome": "Veterano", "icona": "🦅",
         "descrizione": "Disputa 10 tornei", "colore": "#8888ff",
         "sfondo": "linear-gradient(135deg,#1a1a66,#8888FF,#1a1a66)",
         "rarità": "raro",
-        "check": lambda s: s["tornei"] >= 10
+        "check": lambda s: s["tornei"] >= 10,
+        "progresso": lambda s: s["tornei"] / 10
     },
     {
         "id": "dominatore", "nome": "Dominatore", "icona": "🔥",
         "descrizione": "Win rate > 80% con almeno 5 tornei", "colore": "#ff4400",
         "sfondo": "linear-gradient(135deg,#660000,#FF4400,#660000)",
         "rarità": "epico",
-        "check": lambda s: s["tornei"] >= 5 and (s["vittorie"] / s["tornei"] * 100) > 80
+        "check": lambda s: s["tornei"] >= 5 and (s["vittorie"] / s["tornei"] * 100) > 80,
+        "progresso": lambda s: min(s["tornei"] / 5, (s["vittorie"] / s["tornei"] * 100) / 80 if s["tornei"] else 0)
     },
 ]
 
-def get_trofei_atleta(atleta):
+TROFEI_PER_ID = {t["id"]: t for t in TROFEI_DEFINIZIONE}
+
+def valuta_trofei(atleta, torneo=None):
+    """
+    Registra i trofei appena raggiunti (con il torneo che li ha sbloccati) e
+    aggiorna il prossimo trofeo con il suo progresso. Restituisce i nuovi id.
+    """
     s = atleta["stats"]
-    return [(t, t["check"](s)) for t in TROFEI_DEFINIZIONE]
+    sbloccati = atleta.setdefault("trofei", {})
+    nuovi = []
+    for t in TROFEI_DEFINIZIONE:
+        if t["id"] not in sbloccati and t["check"](s):
+            sbloccati[t["id"]] = {
+                "torneo_id": torneo["id"] if torneo else None,
+                "torneo": torneo["nome"] if torneo else None,
+                "data": datetime.now().isoformat(timespec="seconds"),
+            }
+            nuovi.append(t["id"])
+    prossimo = next((t for t in TROFEI_DEFINIZIONE if t["id"] not in sbloccati), None)
+    atleta["prossimo_trofeo"] = prossimo and {
+        "id": prossimo["id"], "progresso": round(min(1.0, max(0.0, prossimo["progresso"](s))), 2)}
+    return nuovi
 
-def genera_gironi(squadre_ids, num_gironi=2, use_ranking=False, state=None):
+def get_trofei_atleta(atleta):
+    sbloccati = atleta.get("trofei", {})
+    return [(t, t["id"] in sbloccati) for t in TROFEI_DEFINIZIONE]
+
+def get_prossimo_trofeo(atleta):
+    """(trofeo, progresso 0-1) del prossimo trofeo da sbloccare, o None."""
+    p = atleta.get("prossimo_trofeo")
+    return (TROFEI_PER_ID[p["id"]], p["progresso"]) if p and p["id"] in TROFEI_PER_ID else None
+
+def trofei_recenti(state, n=10):
+    """Ultimi trofei sbloccati: [(atleta, trofeo, sblocco), ...] dal più recente."""
+    feed = [(a, TROFEI_PER_ID[tid], info) for a in state["atleti"]
+            for tid, info in a.get("trofei", {}).items() if tid in TROFEI_PER_ID and info.get("data")]
+    feed.sort(key=lambda x: x[2]["data"], reverse=True)
+    return feed[:n]
+
+def _posizione_ranking(state):
+    """
+    sid → posizione in classifica (dal ranking in cache) del primo atleta
+    classificato della squadra. Gli stati di lavoro delle simulazioni, senza
+    atleti, possono portare le posizioni già calcolate (posizione_ranking).
+    """
+    if "posizione_ranking" in state:
+        return lambda sid: state["posizione_ranking"].get(sid, 9999)
+    from ranking import build_ranking_data
+    ranking = build_ranking_data(state)
+    pos_ranking = {}
+    for i, a in enumerate(ranking):
+        pos_ranking.setdefault(a["id"], i)
+    def rank_key(sid):
+        sq = get_squadra_by_id(state, sid)
+        if not sq: return 9999
+        return next((pos_ranking[aid] for aid in sq["atleti"] if aid in pos_ranking), 9999)
+    return rank_key
+
+def ordina_teste_di_serie(squadre_ids, use_ranking=False, state=None):
+    """Squadre in ordine di testa di serie secondo il ranking; senza ranking in ordine casuale."""
+    squadre_ids = list(squadre_ids)
     if use_ranking and state:
-        from ranking_page import build_ranking_data
-        try:
-            ranking = build_ranking_data(state)
-            ranking_ids = [a["id"] for a in ranking]
-            def rank_key(sid):
-                sq = get_squadra_by_id(state, sid)
-                if not sq: return 9999
-                for aid in sq["atleti"]:
-                    for i, r in enumerate(ranking_ids):
-                        if r == aid: return i
-                return 9999
-            squadre_ids = sorted(squadre_ids, key=rank_key)
-        except:
-            random.shuffle(squadre_ids)
-    else:
-        random.shuffle(squadre_ids)
+        return sorted(squadre_ids, key=_posizione_ranking(state))
+    random.shuffle(squadre_ids)
+    return squadre_ids
+
+def genera_gironi(squadre_ids, num_gironi=2, use_ranking=False, state=None):
+    squadre_ids = ordina_teste_di_serie(squadre_ids, use_ranking, state)
 
     gironi = []
     for i in range(num_gironi):
         squadre_girone = squadre_ids[i::num_gironi]
         partite = []
-        for j in range(len(squadre_girone)):
-            for k in range(j+1, len(squadre_girone)):
-                partite.append(new_partita(squadre_girone[j], squadre_girone[k], "girone", i))
+        for t, turno in enumerate(turni_girone(squadre_girone), 1):
+            for sq1, sq2 in turno:
+                partite.append(new_partita(sq1, sq2, "girone", i))
+                partite[-1]["turno"] = t
         gironi.append({"nome": f"Girone {'ABCDEFGH'[i]}", "squadre": squadre_girone, "partite": partite})
     return gironi
 
-def genera_bracket_da_gironi(gironi):
-    teste_di_serie = []
-    for g in gironi:
-        teste_di_serie.extend(g["squadre"][:2])
-    bracket = []
-    random.shuffle(teste_di_serie)
-    for i in range(0, len(teste_di_serie), 2):
-        if i+1 < len(teste_di_serie):
-            bracket.append(new_partita(teste_di_serie[i], teste_di_serie[i+1], "eliminazione"))
-    return bracket
+def turni_girone(squadre):
+    """
+    Girone all'italiana col metodo del cerchio: [[(sq1, sq2), ...] per turno].
+    Ogni squadra gioca al più una partita per turno (con squadre dispari una riposa).
+    """
+    giro = list(squadre) + [None] * (len(squadre) % 2)
+    n = len(giro)
+    turni = []
+    for _ in range(n - 1):
+        turni.append([(giro[i], giro[n - 1 - i]) for i in range(n // 2)
+                      if giro[i] is not None and giro[n - 1 - i] is not None])
+        giro = [giro[0], giro[-1]] + giro[1:-1]
+    return turni
+
+def _scontri_diretti(partite):
+    """Matrice dei risultati {a: {b: delta cumulato di a contro b}} dalle partite in classifica."""
+    matrice = {}
+    for p in partite:
+        if not p.get("in_classifica"):
+            continue
+        (a, da), (b, db) = delta_partita(p)
+        for x, y, d in ((a, b, da), (b, a, db)):
+            riga = matrice.setdefault(x, {})
+            riga[y] = tuple(map(sum, zip(riga[y], d))) if y in riga else d
+    return matrice
+
+def ordina_girone(girone):
+    """
+    [(sid, statistiche)] in ordine di classifica. A pari punti decide la
+    classifica avulsa tra le squadre pari (punti, differenza set e punti negli
+    scontri diretti), riapplicata ai sottogruppi ancora pari; se gli scontri
+    diretti non separano nessuno: vittorie, differenza set e punti generali,
+    poi l'ordine del sorteggio. O(partite) con la matrice dei risultati.
+    """
+    stats = classifica_da_partite(girone["partite"], girone["squadre"])
+    matrice = _scontri_diretti(girone["partite"])
+    sorteggio = {sid: i for i, sid in enumerate(girone["squadre"])}
+
+    def generale(sid):
+        return chiave_classifica(stats[sid])[1:] + (sorteggio[sid],)
+
+    def avulsa(gruppo):
+        membri = set(gruppo)
+        chiavi = {}
+        for sid in gruppo:
+            righe = [d for avv, d in matrice.get(sid, {}).items() if avv in membri]
+            chiavi[sid] = (-sum(d[0] for d in righe), -sum(d[3] - d[4] for d in righe),
+                           -sum(d[5] - d[6] for d in righe))
+        ordine = []
+        for _, pari in groupby(sorted(gruppo, key=chiavi.get), key=chiavi.get):
+            pari = list(pari)
+            if len(pari) == 1:
+                ordine += pari
+            elif len(pari) == len(gruppo):
+                ordine += sorted(pari, key=generale)
+            else:
+                ordine += avulsa(pari)
+        return ordine
+
+    punti = lambda sid: -stats[sid]["punti_classifica"]
+    ordine = []
+    for _, pari in groupby(sorted(girone["squadre"], key=punti), key=punti):
+        ordine += avulsa(list(pari))
+    return [(sid, stats[sid]) for sid in ordine]
+
+def tabella_girone(state, girone):
+    """
+    Classifica del girone [(sid, statistiche)] come vista materializzata: si
+    ricalcola solo quando cambia una partita dei gironi. Contiene solo id e
+    statistiche ricavate dalle partite del girone (niente nomi né record delle
+    squadre), quindi le modifiche alle squadre non la invalidano.
+    """
+    chiave = state.versione_sezione("gironi") if isinstance(state, StatoTorneo) else None
+    return memorizzato(state, f"classifica_{girone['nome']}", chiave, lambda _: ordina_girone(girone))
+
+def classifica_girone(state, girone):
+    """Id delle squadre del girone in ordine di classifica (la stessa mostrata a schermo)."""
+    if girone.get("svizzera"):
+        return classifica_svizzera(girone)
+    return [sid for sid, _ in tabella_girone(state, girone)]
+
+def teste_di_serie_da_gironi(gironi, state=None, qualificate=2):
+    """
+    Qualificate in ordine di testa di serie: prima tutte le prime dei gironi,
+    poi le seconde, ... A pari piazzamento decide il ranking in cache (se il
+    torneo usa il ranking per le teste di serie), poi il rendimento nel girone.
+    Un girone senza partite è già in ordine di classifica.
+    """
+    usa_ranking = state is not None and state.get("torneo", {}).get("usa_ranking_teste_serie", False)
+    rank_key = _posizione_ranking(state) if usa_ranking else (lambda sid: 0)
+    teste = []
+    for i, g in enumerate(gironi):
+        if "partite" not in g:
+            ordine, stats = g["squadre"], {}
+        elif g.get("svizzera"):
+            ordine, stats = classifica_svizzera(g), {}
+        else:
+            tabella = tabella_girone(state, g)
+            ordine, stats = [sid for sid, _ in tabella], dict(tabella)
+        for pos, sid in enumerate(ordine[:qualificate]):
+            rendimento = chiave_classifica(stats[sid]) if sid in stats else ()
+            teste.append((pos, rank_key(sid), rendimento, i, sid))
+    return [t[-1] for t in sorted(teste)]
+
+def genera_bracket_da_gironi(gironi, state=None, qualificate=2):
+    """
+    Tabellone delle qualificate con abbinamenti da testa di serie (1 e 2 solo in
+    finale) e bye alle prime teste di serie quando non sono una potenza di due.
+    """
+    from bracket import crea_bracket, slot_da_teste_di_serie
+    return crea_bracket(slot_da_teste_di_serie(teste_di_serie_da_gironi(gironi, state, qualificate)))
+
+# ─── SISTEMA SVIZZERO ────────────────────────────────────────────────────────
+# Il torneo svizzero è un unico girone (svizzera=True) le cui partite crescono
+# turno per turno: ogni turno accoppia squadre a pari punti senza rivincite.
+# La classifica si ricava dalle partite del girone (vale anche per le
+# simulazioni che non vanno in classifica) e alimenta il tabellone finale
+# tramite classifica_girone, come per i gironi all'italiana.
+
+RIVINCITA = 10 ** 6   # costo di una rivincita negli abbinamenti: più di qualsiasi distacco in punti
+
+def turni_svizzera(n_squadre):
+    """Turni consigliati: quelli che servono perché resti una sola squadra a punteggio pieno."""
+    return max(1, math.ceil(math.log2(n_squadre)))
+
+def crea_svizzera(squadre_ids, turni=0, qualificate=8):
+    """Girone svizzero con le squadre in ordine di testa di serie (turni=0: automatici)."""
+    n = len(squadre_ids)
+    return {"nome": "Svizzera", "squadre": list(squadre_ids), "partite": [], "bye": [],
+            "svizzera": True, "turni": min(turni or turni_svizzera(n), n - 1),
+            "qualificate": max(2, min(qualificate, n))}
+
+def turno_svizzero(girone):
+    """Ultimo turno generato (0 prima del primo)."""
+    return max((p.get("turno", 0) for p in girone["partite"]), default=0)
+
+def statistiche_svizzera(girone):
+    """
+    sid → punti (3 vittoria o bye, 1 sconfitta, come in classifica), vittorie,
+    differenza set e punti, avversari e Buchholz (somma dei punti degli avversari).
+    """
+    stats = {sid: {"punti": 0, "vittorie": 0, "diff_set": 0, "diff_punti": 0, "avversari": []}
+             for sid in girone["squadre"]}
+    for sid in girone["bye"]:
+        stats[sid]["punti"] += 3; stats[sid]["vittorie"] += 1
+    for p in girone["partite"]:
+        s1, s2 = stats[p["sq1"]], stats[p["sq2"]]
+        s1["avversari"].append(p["sq2"]); s2["avversari"].append(p["sq1"])
+        if not p["confermata"]:
+            continue
+        vince, perde = (s1, s2) if p["vincitore"] == p["sq1"] else (s2, s1)
+        vince["punti"] += 3; vince["vittorie"] += 1; perde["punti"] += 1
+        d_set = p["set_sq1"] - p["set_sq2"]
+        d_punti = sum(a - b for a, b in p["punteggi"])
+        s1["diff_set"] += d_set; s2["diff_set"] -= d_set
+        s1["diff_punti"] += d_punti; s2["diff_punti"] -= d_punti
+    for s in stats.values():
+        s["buchholz"] = sum(stats[a]["punti"] for a in s["avversari"])
+    return stats
+
+def classifica_svizzera(girone, stats=None):
+    """Id in ordine di classifica: punti, Buchholz, vittorie, differenza set e punti, testa di serie."""
+    stats = stats or statistiche_svizzera(girone)
+    seme = {sid: i for i, sid in enumerate(girone["squadre"])}
+    return sorted(girone["squadre"], key=lambda sid: (
+        -stats[sid]["punti"], -stats[sid]["buchholz"], -stats[sid]["vittorie"],
+        -stats[sid]["diff_set"], -stats[sid]["diff_punti"], seme[sid]))
+
+def _abbinamenti_svizzeri(ordine, punti, giocate):
+    """
+    Coppie dalle squadre in ordine di classifica. In ogni gruppo a pari punti la
+    metà alta affronta la metà bassa (la dispari scende nel gruppo sotto); poi
+    si scambiano gli avversari tra due coppie finché il costo (rivincite e
+    distacco in punti) scende: O(n²) a passata invece di provare ogni abbinamento.
+    """
+    coppie, scende = [], []
+    for _, gruppo in groupby(ordine, key=punti.get):
+        gruppo = scende + list(gruppo)
+        scende = [gruppo.pop()] if len(gruppo) % 2 else []
+        meta = len(gruppo) // 2
+        coppie += list(zip(gruppo[:meta], gruppo[meta:]))
+
+    def costo(a, b):
+        return (punti[a] - punti[b]) ** 2 + (RIVINCITA if frozenset((a, b)) in giocate else 0)
+
+    migliorato = True
+    while migliorato:
+        migliorato = False
+        for i in range(len(coppie)):
+            for j in range(i + 1, len(coppie)):
+                (a, b), (c, d) = coppie[i], coppie[j]
+                attuale = costo(a, b) + costo(c, d)
+                for x, y in (((a, c), (b, d)), ((a, d), (b, c))):
+                    if costo(*x) + costo(*y) < attuale:
+                        coppie[i], coppie[j] = x, y
+                        migliorato = True
+                        break
+    return coppie
+
+def genera_turno_svizzero(girone):
+    """Aggiunge al girone le partite del turno successivo e le restituisce."""
+    stats = statistiche_svizzera(girone)
+    ordine = classifica_svizzera(girone, stats)
+    turno = turno_svizzero(girone) + 1
+    if len(ordine) % 2:
+        # Bye (vale una vittoria) alla squadra più in basso che non l'ha ancora avuto
+        bye = next((sid for sid in reversed(ordine) if sid not in girone["bye"]), ordine[-1])
+        ordine.remove(bye)
+        girone["bye"].append(bye)
+    posizione = {sid: i for i, sid in enumerate(ordine)}
+    punti = {sid: stats[sid]["punti"] for sid in ordine}
+    giocate = {frozenset((sid, a)) for sid in ordine for a in stats[sid]["avversari"]}
+    inizio = len(girone["partite"])
+    for coppia in _abbinamenti_svizzeri(ordine, punti, giocate):
+        sq1, sq2 = sorted(coppia, key=posizione.get)
+        p = new_partita(sq1, sq2, "girone", 0)
+        p["turno"] = turno
+        girone["partite"].append(p)
+    return girone["partite"][inizio:]
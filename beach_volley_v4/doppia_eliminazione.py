@@ -0,0 +1,144 @@
+"""
+doppia_eliminazione.py — Tabellone a doppia eliminazione (vincenti, perdenti, finalissima)
+
+Tutto il calendario viene generato all'avvio: ogni partita conosce per indice
+(`nodo`) la partita e lo slot dove vanno la vincente (`vincente_a`) e la
+perdente (`perdente_a`), quindi confermare un risultato costa O(1). I bye del
+primo turno si risolvono in fase di generazione: una partita con un solo
+ramo popolato non viene creata e la squadra prosegue direttamente.
+"""
+from data_manager import new_partita, get_partita_nodo
+from bracket import dimensione, livello, perdente, pronte  # pronte: stessa regola del tabellone singolo
+
+NOMI_TABELLONE = {"vincenti": "🟢 Vincenti", "perdenti": "🔴 Perdenti"}
+
+
+def _schema(n_slot):
+    """
+    Nodi astratti {chiave: (tabellone, round, [ingresso1, ingresso2])} in ordine
+    topologico. Un ingresso è ("seme", slot), ("vince", chiave) o ("perde", chiave).
+    """
+    k = livello(n_slot)
+    nodi = {}
+    for r in range(1, k + 1):
+        for i in range(n_slot >> r):
+            ingressi = ([("seme", 2 * i), ("seme", 2 * i + 1)] if r == 1 else
+                        [("vince", ("V", r - 1, 2 * i)), ("vince", ("V", r - 1, 2 * i + 1))])
+            nodi[("V", r, i)] = ("vincenti", r, ingressi)
+    # Perdenti: i turni dispari accoppiano tra loro, i pari accolgono chi scende dai vincenti
+    for r in range(1, 2 * (k - 1) + 1):
+        n = n_slot >> (r // 2 + 1 + (r % 2))
+        for i in range(n):
+            if r == 1:
+                ingressi = [("perde", ("V", 1, 2 * i)), ("perde", ("V", 1, 2 * i + 1))]
+            elif r % 2 == 0:
+                # Incrocio a turni alterni: evita la rivincita immediata tra chi si è già incontrato
+                j = n - 1 - i if (r // 2) % 2 else i
+                ingressi = [("vince", ("P", r - 1, i)), ("perde", ("V", r // 2 + 1, j))]
+            else:
+                ingressi = [("vince", ("P", r - 1, 2 * i)), ("vince", ("P", r - 1, 2 * i + 1))]
+            nodi[("P", r, i)] = ("perdenti", r, ingressi)
+    nodi[("F", 1, 0)] = ("finale", 1, [("vince", ("V", k, 0)), ("vince", ("P", 2 * (k - 1), 0))])
+    return nodi
+
+
+def crea_doppia_eliminazione(slot, spareggio=True):
+    """
+    Calendario completo dalle squadre in ordine di slot del primo turno (None = bye).
+    Con `spareggio` la finalissima si ripete se la vince chi arriva dai perdenti.
+    """
+    if sum(sid is not None for sid in slot) < 3:
+        raise ValueError("Servono almeno 3 squadre per la doppia eliminazione.")
+    n_slot = dimensione(len(slot))
+    slot = list(slot) + [None] * (n_slot - len(slot))
+    nodi = _schema(n_slot)
+
+    # Quali uscite produrranno davvero una squadra
+    vince, vera = {}, {}
+    def esiste(ingresso):
+        tipo, rif = ingresso
+        return slot[rif] is not None if tipo == "seme" else (vince if tipo == "vince" else vera)[rif]
+    for chiave, (_, _, ingressi) in nodi.items():
+        presenti = [esiste(x) for x in ingressi]
+        vera[chiave] = all(presenti)
+        vince[chiave] = any(presenti)
+
+    # Chi consuma ogni uscita, e in quale slot
+    consumatore = {x: (chiave, s) for chiave, (_, _, ingressi) in nodi.items()
+                   for x, s in zip(ingressi, ("sq1", "sq2"))}
+    def destinazione(uscita):
+        """Prima partita reale raggiunta dall'uscita, saltando i nodi con un solo ramo."""
+        while uscita in consumatore:
+            chiave, s = consumatore[uscita]
+            if vera[chiave]:
+                return chiave, s
+            uscita = ("vince", chiave)
+        return None
+
+    # Calendario: ogni partita nell'ondata successiva a quelle che la alimentano
+    ondata = {}
+    for chiave, (_, _, ingressi) in nodi.items():
+        ondata[chiave] = 1 + max((ondata[rif] for tipo, rif in ingressi if tipo != "seme"), default=0)
+    reali = sorted((c for c in nodi if vera[c]), key=lambda c: (ondata[c], c[0] != "V", c[1], c[2]))
+    numero = {c: n for n, c in enumerate(reali, 1)}
+    partite = {}
+    for c in reali:
+        tabellone, r, _ = nodi[c]
+        p = new_partita(None, None, "eliminazione")
+        p.update({"nodo": numero[c], "tabellone": tabellone, "round": r, "turno": ondata[c]})
+        for campo, uscita in (("vincente_a", ("vince", c)), ("perdente_a", ("perde", c))):
+            dest = destinazione(uscita)
+            p[campo] = [numero[dest[0]], dest[1]] if dest else None
+        partite[c] = p
+    if spareggio:
+        finale = partite[("F", 1, 0)]
+        p = new_partita(None, None, "eliminazione")
+        p.update({"nodo": len(reali) + 1, "tabellone": "finale", "round": 2, "turno": finale["turno"] + 1,
+                  "vincente_a": None, "perdente_a": None})
+        finale["spareggio"] = p["nodo"]
+        partite[("F", 2, 0)] = p
+    for k, sid in enumerate(slot):
+        if sid is not None:
+            chiave, s = destinazione(("seme", k))
+            partite[chiave][s] = sid
+    return list(partite.values())
+
+
+def nome_round(partita):
+    if partita.get("tabellone") == "finale":
+        return "🏆 FINALISSIMA" if partita.get("round", 1) == 1 else "🔁 FINALISSIMA · SPAREGGIO"
+    return f"{NOMI_TABELLONE.get(partita.get('tabellone'), '⚡')} · Turno {partita.get('round', 1)}"
+
+
+def avanza(state, partita):
+    """Confermata `partita`, sposta vincente e perdente negli slot indicati."""
+    if not partita["confermata"]:
+        return
+    for campo, sid in (("vincente_a", partita["vincitore"]), ("perdente_a", perdente(partita))):
+        if partita.get(campo):
+            nodo, slot = partita[campo]
+            get_partita_nodo(state, nodo)[slot] = sid
+    # Finalissima vinta da chi arriva dai perdenti: entrambe hanno una sconfitta, si rigioca
+    if partita.get("spareggio") and partita["vincitore"] == partita["sq2"]:
+        rivincita = get_partita_nodo(state, partita["spareggio"])
+        rivincita["sq1"], rivincita["sq2"] = partita["sq1"], partita["sq2"]
+
+
+def podio(state):
+    """[(1, sid), (2, sid), (3, sid)] a finalissima (ed eventuale spareggio) conclusa, altrimenti []."""
+    finali = [p for p in state["bracket"] if p.get("tabellone") == "finale"]
+    if not finali or not finali[0]["confermata"]:
+        return []
+    decisiva = finali[0]
+    if decisiva.get("spareggio") and decisiva["vincitore"] == decisiva["sq2"]:
+        decisiva = get_partita_nodo(state, decisiva["spareggio"])
+        if not decisiva["confermata"]:
+            return []
+    podio = [(1, decisiva["vincitore"]), (2, perdente(decisiva))]
+    # 3°: la perdente dell'ultima partita del tabellone perdenti (quella che porta in finalissima)
+    verso_finale = [finali[0]["nodo"], "sq2"]
+    terza = next((p for p in state["bracket"] if p.get("vincente_a") == verso_finale), None)
+    if terza is not None and terza["confermata"]:
+        podio.append((3, perdente(terza)))
+    return podio
+
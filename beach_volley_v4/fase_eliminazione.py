@@ -2,17 +2,20 @@
 fase_eliminazione.py — Fase 3: Eliminazione Diretta / Playoffs
 """
 import streamlit as st
-from data_manager import (
-    save_state, simula_partita, aggiorna_classifica_squadra,
-    get_squadra_by_id, new_partita
-)
-from ui_components import render_match_card
+from data_manager import save_state, get_squadra_by_id, nome_squadra
+from motore_torneo import TournamentEngine
+import doppia_eliminazione
+from ui_components import render_match_card, render_calendario
 
 
 def render_eliminazione(state):
-    st.markdown("## ⚡ Eliminazione Diretta")
+    motore = TournamentEngine(state)
+    formato = motore.formato()
+    doppia = formato is doppia_eliminazione
+    st.markdown("## ⚡ Doppia Eliminazione" if doppia else "## ⚡ Eliminazione Diretta")
     
     bracket = state["bracket"]
+    concluso = motore.vincitore() is not None
     
     col_a, col_b = st.columns([2, 2])
     with col_a:
@@ -24,15 +27,27 @@ def render_eliminazione(state):
         if st.button("🎲 Simula TUTTI i Playoff", use_container_width=True):
             _simula_tutti_playoff(state)
     
+    if not concluso:
+        with st.expander("🗓️ Calendario Campi", expanded=False):
+            render_calendario(state)
+    
     st.divider()
     
     # Raggruppa per round
-    rounds = _raggruppa_round(bracket)
+    rounds = _raggruppa_round(bracket, formato.nome_round)
     
     for round_name, partite in rounds.items():
+        if concluso and not any(p["sq1"] and p["sq2"] for p in partite):
+            continue
         st.markdown(f"### {round_name}")
         
         for i, partita in enumerate(partite):
+            if not (partita["sq1"] and partita["sq2"]):
+                if concluso: continue   # es. spareggio non necessario
+                # Slot ancora da definire: aspetta le vincenti dei turni precedenti
+                attese = [nome_squadra(state, sid) for sid in (partita["sq1"], partita["sq2"]) if sid]
+                st.caption(f"{round_name} · {' vs '.join(attese + ['da definire'] * (2 - len(attese)))}")
+                continue
             render_match_card(state, partita, label=round_name)
             
             if not partita["confermata"]:
@@ -41,7 +56,9 @@ def render_eliminazione(state):
                 # Mostra vincitore
                 sq = get_squadra_by_id(state, partita["vincitore"])
                 if sq:
-                    st.success(f"✅ Vincitore: **{sq['nome']}** → avanza al turno successivo")
+                    prosegue = partita["vincente_a"] if doppia else partita.get("nodo", 1) > 1
+                    esito = "→ avanza al turno successivo" if prosegue else ""
+                    st.success(f"✅ Vincitore: **{sq['nome']}** {esito}")
             
             st.markdown("---")
     
@@ -49,16 +66,12 @@ def render_eliminazione(state):
     _check_finale(state)
 
 
-def _raggruppa_round(bracket):
-    """Raggruppa partite in round con nomi."""
-    n = len(bracket)
-    if n == 0: return {}
-    
-    if n == 1: return {"🏆 FINALE": bracket}
-    if n == 2: return {"🥇 SEMIFINALI": bracket}
-    if n <= 4: return {"⚡ QUARTI DI FINALE": bracket[:n//2], "🏆 SEMIFINALI": bracket[n//2:]}
-    
-    return {"⚡ Fase Eliminazione": bracket}
+def _raggruppa_round(bracket, nome_round):
+    """Raggruppa le partite per turno (il bracket è già in ordine di calendario)."""
+    rounds = {}
+    for p in bracket:
+        rounds.setdefault(nome_round(p), []).append(p)
+    return rounds
 
 
 def _render_scoreboard_playoff(state, partita, key_prefix):
@@ -82,108 +95,44 @@ def _render_scoreboard_playoff(state, partita, key_prefix):
             punteggi_inseriti.append((p1, p2))
         
         if st.button("✅ CONFERMA RISULTATO", key=f"{key_prefix}_confirm", use_container_width=True):
-            s1v, s2v = 0, 0
-            punteggi_validi = []
-            for p1, p2 in punteggi_inseriti:
-                if p1 > 0 or p2 > 0:
-                    if p1 > p2: s1v += 1
-                    else: s2v += 1
-                    punteggi_validi.append((p1, p2))
-            
-            if not punteggi_validi:
-                st.error("Inserisci almeno un set.")
+            # Il motore conferma e sposta subito la vincente (e, in doppia eliminazione,
+            # la perdente) nello slot della partita successiva: nessun turno da generare
+            try:
+                TournamentEngine(state).conferma_risultato(partita, punteggi_inseriti)
+            except ValueError as e:
+                st.error(str(e))
                 return
-            
-            partita["punteggi"] = punteggi_validi
-            partita["set_sq1"] = s1v
-            partita["set_sq2"] = s2v
-            partita["vincitore"] = partita["sq1"] if s1v > s2v else partita["sq2"]
-            partita["confermata"] = True
-            aggiorna_classifica_squadra(state, partita)
-            
-            # Genera prossimo round se necessario
-            _genera_prossimo_round(state, partita)
             save_state(state)
             st.rerun()
         
         if st.button("🎲 Simula", key=f"{key_prefix}_sim"):
-            simula_partita(state, partita)
-            if state["simulazione_al_ranking"]:
-                aggiorna_classifica_squadra(state, partita)
-            _genera_prossimo_round(state, partita)
+            TournamentEngine(state).simula(partita)
             save_state(state)
             st.rerun()
 
 
-def _genera_prossimo_round(state, partita_confermata):
-    """Controlla se creare nuove partite dal bracket."""
-    bracket = state["bracket"]
-    
-    # Trova partite non confermate dello stesso livello
-    non_confermate = [p for p in bracket if not p["confermata"]]
-    confermate_correnti = [p for p in bracket if p["confermata"]]
-    
-    if len(non_confermate) == 0 and len(confermate_correnti) >= 2:
-        # Controlla se ci sono già future partite da generare
-        vincitori = [p["vincitore"] for p in confermate_correnti]
-        # Se numero pari di vincitori senza match successivo
-        vincitori_senza_match = []
-        for v in vincitori:
-            ha_match = any(
-                (p["sq1"] == v or p["sq2"] == v) 
-                for p in bracket 
-                if not p["confermata"] or p == partita_confermata
-            )
-            # logica semplificata: aggiungi nuove partite se necessario
-        pass
-
-
 def _simula_tutti_playoff(state):
-    for partita in state["bracket"]:
-        if not partita["confermata"]:
-            simula_partita(state, partita)
-            if state["simulazione_al_ranking"]:
-                aggiorna_classifica_squadra(state, partita)
+    TournamentEngine(state).simula_tutti()
     save_state(state)
     st.rerun()
 
 
 def _check_finale(state):
-    """Se tutti confermati e c'è un solo vincitore: vai alla proclamazione."""
-    bracket = state["bracket"]
-    if not bracket: return
+    """Giocata la finale: vai alla proclamazione."""
+    motore = TournamentEngine(state)
+    finale_winner = motore.vincitore()
+    if finale_winner is None: return
     
-    tutti_confermati = all(p["confermata"] for p in bracket)
+    st.divider()
+    col1, col2 = st.columns([3, 1])
     
-    if tutti_confermati:
-        st.divider()
-        col1, col2 = st.columns([3, 1])
-        
-        vincitori = [p["vincitore"] for p in bracket]
-        finale_winner = vincitori[-1] if vincitori else None
-        
-        with col1:
-            if finale_winner:
-                sq = get_squadra_by_id(state, finale_winner)
-                if sq:
-                    st.success(f"🏆 Il torneo è terminato! **{sq['nome']}** ha vinto!")
-        
-        with col2:
-            if st.button("🏆 PROCLAMAZIONE →", use_container_width=True):
-                state["vincitore"] = finale_winner
-                # Calcola podio (1°: ultimo vincitore, 2°: ultimo sconfitto, 3°: semifinalisti)
-                perdenti = [p["sq1"] if p["vincitore"] == p["sq2"] else p["sq2"] for p in bracket]
-                podio = [(1, finale_winner)]
-                if perdenti:
-                    podio.append((2, perdenti[-1]))
-                if len(perdenti) > 1:
-                    podio.append((3, perdenti[-2]))
-                
-                state["podio"] = podio
-                if state["simulazione_al_ranking"]:
-                    from data_manager import trasferisci_al_ranking
-                    trasferisci_al_ranking(state, podio)
-                
-                state["fase"] = "proclamazione"
-                save_state(state)
-                st.rerun()
+    with col1:
+        sq = get_squadra_by_id(state, finale_winner)
+        if sq:
+            st.success(f"🏆 Il torneo è terminato! **{sq['nome']}** ha vinto!")
+    
+    with col2:
+        if st.button("🏆 PROCLAMAZIONE →", use_container_width=True):
+            motore.proclama()
+            save_state(state)
+            st.rerun()
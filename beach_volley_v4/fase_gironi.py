@@ -3,14 +3,20 @@ fase_gironi.py — Fase 2: Fase a Gironi con scoreboard live
 """
 import streamlit as st
 from data_manager import (
-    save_state, simula_partita, aggiorna_classifica_squadra,
-    get_squadra_by_id, nome_squadra, genera_bracket_da_gironi
+    save_state, get_squadra_by_id, nome_squadra, tabella_girone,
+    statistiche_svizzera, classifica_svizzera, turno_svizzero
 )
-from ui_components import render_match_card
+from motore_torneo import TournamentEngine
+from previsioni import previsioni_stream
+from ui_components import render_match_card, render_calendario
 
 
 def render_gironi(state):
-    st.markdown("## 🔵 Fase a Gironi")
+    svizzera = TournamentEngine(state).svizzera()
+    if svizzera:
+        st.markdown(f"## 🔵 Sistema Svizzero · Turno {turno_svizzero(svizzera)}/{svizzera['turni']}")
+    else:
+        st.markdown("## 🔵 Fase a Gironi")
     
     # Controllo simulatore ON/OFF
     col_a, col_b, col_c = st.columns([2, 2, 2])
@@ -24,15 +30,10 @@ def render_gironi(state):
         if st.button("🎲 Simula TUTTI i Risultati", use_container_width=True):
             _simula_tutti(state)
     with col_c:
-        tutti_confermati = all(
-            p["confermata"]
-            for g in state["gironi"]
-            for p in g["partite"]
-        )
-        if tutti_confermati:
+        motore = TournamentEngine(state)
+        if motore.gironi_completi():
             if st.button("⚡ AVANZA ALL'ELIMINAZIONE →", use_container_width=True):
-                state["bracket"] = genera_bracket_da_gironi(state["gironi"])
-                state["fase"] = "eliminazione"
+                motore.avvia_eliminazione()
                 save_state(state)
                 st.rerun()
         else:
@@ -42,15 +43,24 @@ def render_gironi(state):
     
     # Tabs per girone
     nomi_gironi = [g["nome"] for g in state["gironi"]]
-    nomi_gironi.append("📊 Classifiche")
+    nomi_gironi += ["📊 Classifiche", "🗓️ Calendario"]
     tabs = st.tabs(nomi_gironi)
     
     for i, g in enumerate(state["gironi"]):
         with tabs[i]:
-            _render_girone(state, g, i)
+            if g.get("svizzera"):
+                _render_turni_svizzera(state, g, i)
+            else:
+                _render_girone(state, g, i)
     
+    with tabs[-2]:
+        if svizzera:
+            _render_classifica_svizzera(state, svizzera)
+        else:
+            _render_classifiche_gironi(state)
+
     with tabs[-1]:
-        _render_classifiche_gironi(state)
+        render_calendario(state)
 
 
 def _render_girone(state, girone, girone_idx):
@@ -58,74 +68,77 @@ def _render_girone(state, girone, girone_idx):
     
     for j, partita in enumerate(girone["partite"]):
         render_match_card(state, partita, label=f"{girone['nome']} · Match {j+1}")
-        
-        if not partita["confermata"]:
-            _render_scoreboard_live(state, partita, f"g{girone_idx}_p{j}")
+        _render_scoreboard_live(state, partita, f"g{girone_idx}_p{j}")
         
         st.markdown("---")
 
 
+def _render_turni_svizzera(state, girone, girone_idx):
+    """Turno in corso in evidenza, i precedenti chiusi in expander (dal più recente)."""
+    turno = turno_svizzero(girone)
+    for t in range(turno, 0, -1):
+        partite = [(j, p) for j, p in enumerate(girone["partite"]) if p.get("turno") == t]
+        bye = girone["bye"][t - 1] if t <= len(girone["bye"]) else None
+        with (st.container() if t == turno else st.expander(f"Turno {t}", expanded=False)):
+            if t == turno:
+                st.markdown(f"### Turno {t}")
+            if bye:
+                st.caption(f"☕ Riposa (vale una vittoria): {nome_squadra(state, bye)}")
+            for j, partita in partite:
+                render_match_card(state, partita, label=f"Turno {t} · Match {j+1}")
+                _render_scoreboard_live(state, partita, f"g{girone_idx}_p{j}")
+                st.markdown("---")
+
+
 def _render_scoreboard_live(state, partita, key_prefix):
-    """Scoreboard interattivo per aggiornare set e punteggi."""
+    """Scoreboard interattivo per inserire (o correggere, se già confermato) set e punteggi."""
     sq1 = get_squadra_by_id(state, partita["sq1"])
     sq2 = get_squadra_by_id(state, partita["sq2"])
     torneo = state["torneo"]
     formato = torneo["formato_set"]
     pmax = torneo["punteggio_max"]
     
-    with st.expander("📝 Inserisci Risultato", expanded=False):
+    correzione = partita["confermata"]
+    with st.expander("✏️ Correggi Risultato" if correzione else "📝 Inserisci Risultato", expanded=False):
         n_set = 1 if formato == "Set Unico" else 3
         
         punteggi_inseriti = []
         for s in range(n_set):
+            v1, v2 = partita["punteggi"][s] if s < len(partita["punteggi"]) else (0, 0)
             col1, col2, col3 = st.columns([2, 1, 2])
             with col1:
-                p1 = st.number_input(f"Set {s+1} — {sq1['nome']}", 0, 50, 0,
+                p1 = st.number_input(f"Set {s+1} — {sq1['nome']}", 0, 50, v1,
                                      key=f"{key_prefix}_s{s}_p1")
             with col2:
                 st.markdown("<div style='text-align:center;padding-top:28px;color:#666'>vs</div>", unsafe_allow_html=True)
             with col3:
-                p2 = st.number_input(f"Set {s+1} — {sq2['nome']}", 0, 50, 0,
+                p2 = st.number_input(f"Set {s+1} — {sq2['nome']}", 0, 50, v2,
                                      key=f"{key_prefix}_s{s}_p2")
             punteggi_inseriti.append((p1, p2))
         
         # Battuta
-        battuta = st.radio(
-            "🏐 In battuta",
-            [sq1["nome"], sq2["nome"]],
-            horizontal=True,
-            key=f"{key_prefix}_battuta"
-        )
-        partita["in_battuta"] = 1 if battuta == sq1["nome"] else 2
+        if not correzione:
+            battuta = st.radio(
+                "🏐 In battuta",
+                [sq1["nome"], sq2["nome"]],
+                horizontal=True,
+                key=f"{key_prefix}_battuta"
+            )
+            partita["in_battuta"] = 1 if battuta == sq1["nome"] else 2
         
-        if st.button("✅ CONFERMA RISULTATO", key=f"{key_prefix}_confirm", use_container_width=True):
-            # Calcola set vinti
-            s1v, s2v = 0, 0
-            punteggi_validi = []
-            for p1, p2 in punteggi_inseriti:
-                if p1 > 0 or p2 > 0:
-                    if p1 > p2: s1v += 1
-                    else: s2v += 1
-                    punteggi_validi.append((p1, p2))
-            
-            if not punteggi_validi:
-                st.error("Inserisci almeno un set con punteggio.")
+        if st.button("✅ SALVA CORREZIONE" if correzione else "✅ CONFERMA RISULTATO",
+                     key=f"{key_prefix}_confirm", use_container_width=True):
+            try:
+                TournamentEngine(state).conferma_risultato(partita, punteggi_inseriti)
+            except ValueError as e:
+                st.error(str(e))
                 return
-            
-            partita["punteggi"] = punteggi_validi
-            partita["set_sq1"] = s1v
-            partita["set_sq2"] = s2v
-            partita["vincitore"] = partita["sq1"] if s1v > s2v else partita["sq2"]
-            partita["confermata"] = True
-            aggiorna_classifica_squadra(state, partita)
             save_state(state)
             st.success("✅ Risultato confermato e classifica aggiornata!")
             st.rerun()
         
-        if st.button("🎲 Simula questo match", key=f"{key_prefix}_sim"):
-            simula_partita(state, partita)
-            if state["simulazione_al_ranking"]:
-                aggiorna_classifica_squadra(state, partita)
+        if not correzione and st.button("🎲 Simula questo match", key=f"{key_prefix}_sim"):
+            TournamentEngine(state).simula(partita)
             save_state(state)
             st.rerun()
 
@@ -134,18 +147,8 @@ def _render_classifiche_gironi(state):
     for girone in state["gironi"]:
         st.markdown(f"### 📊 Classifica {girone['nome']}")
         
-        # Calcola classifica dal vivo
-        squadre_dati = []
-        for sid in girone["squadre"]:
-            sq = get_squadra_by_id(state, sid)
-            if sq:
-                squadre_dati.append(sq)
-        
-        squadre_ord = sorted(squadre_dati, key=lambda s: (
-            -s["punti_classifica"], -s["vittorie"],
-            -(s["set_vinti"] - s["set_persi"]),
-            -(s["punti_fatti"] - s["punti_subiti"])
-        ))
+        # Vista materializzata: si riordina solo quando cambia un risultato
+        tabella = tabella_girone(state, girone)
         
         # HTML table
         html = """
@@ -156,14 +159,14 @@ def _render_classifiche_gironi(state):
         </tr>"""
         
         pos_cls = {1: "gold", 2: "silver", 3: "bronze"}
-        for i, sq in enumerate(squadre_ord):
+        for i, (sid, sq) in enumerate(tabella):
             pos = i + 1
             cls = pos_cls.get(pos, "")
             qualif = "🟢" if pos <= 2 else ""
             html += f"""
             <tr>
                 <td><span class="rank-pos {cls}">{pos}</span></td>
-                <td style="text-align:left;font-weight:600">{qualif} {sq['nome']}</td>
+                <td style="text-align:left;font-weight:600">{qualif} {nome_squadra(state, sid)}</td>
                 <td style="font-weight:700;color:var(--accent-gold)">{sq['punti_classifica']}</td>
                 <td style="color:var(--green)">{sq['vittorie']}</td>
                 <td style="color:var(--accent-red)">{sq['sconfitte']}</td>
@@ -173,17 +176,84 @@ def _render_classifiche_gironi(state):
         
         html += "</table>"
         st.markdown(html, unsafe_allow_html=True)
-        st.caption("🟢 Le prime 2 qualificate ai Playoff")
+        st.caption("🟢 Le prime 2 qualificate ai Playoff · a pari punti decidono gli scontri diretti")
         st.markdown("---")
 
+    if any(not p["confermata"] for g in state["gironi"] for p in g["partite"]):
+        _render_previsioni(state)
+
+
+def _render_classifica_svizzera(state, girone):
+    st.markdown("### 📊 Classifica Svizzera")
+    stats = statistiche_svizzera(girone)
+    html = """
+    <table class="rank-table">
+    <tr>
+        <th>#</th><th>SQUADRA</th><th>PTS</th><th>BUCH</th><th>V</th><th>G</th><th>DS</th><th>DP</th>
+    </tr>"""
+    pos_cls = {1: "gold", 2: "silver", 3: "bronze"}
+    for i, sid in enumerate(classifica_svizzera(girone, stats)):
+        pos = i + 1
+        s = stats[sid]
+        qualif = "🟢" if pos <= girone["qualificate"] else ""
+        html += f"""
+        <tr>
+            <td><span class="rank-pos {pos_cls.get(pos, '')}">{pos}</span></td>
+            <td style="text-align:left;font-weight:600">{qualif} {nome_squadra(state, sid)}</td>
+            <td style="font-weight:700;color:var(--accent-gold)">{s['punti']}</td>
+            <td>{s['buchholz']}</td>
+            <td style="color:var(--green)">{s['vittorie']}</td>
+            <td>{len(s['avversari'])}</td>
+            <td>{s['diff_set']:+d}</td><td>{s['diff_punti']:+d}</td>
+        </tr>"""
+    html += "</table>"
+    st.markdown(html, unsafe_allow_html=True)
+    st.caption(f"🟢 Le prime {girone['qualificate']} qualificate ai Playoff · "
+               "BUCH = somma dei punti degli avversari affrontati (spareggio a pari punti)")
+
+
+def _render_previsioni(state):
+    st.markdown("### 🔮 Probabilità")
+    st.caption("Simulazione Monte Carlo delle partite da giocare e del tabellone che ne risulta")
+    # Le previsioni valgono finché non cambia un risultato dei gironi
+    versione = state.versione_sezione("gironi") if hasattr(state, "versione_sezione") else None
+    salvate = st.session_state.get("previsioni_gironi")
+    if salvate and salvate["versione"] != versione:
+        salvate = None
+    col_btn, col_budget = st.columns([2, 1])
+    with col_budget:
+        budget = st.select_slider("Tempo (s)", [1, 2, 3, 5, 10], value=3, key="previsioni_budget")
+    placeholder = st.empty()
+    with col_btn:
+        avvia = st.button("🔮 Calcola probabilità", use_container_width=True, key="btn_previsioni")
+    if avvia:
+        for risultato in previsioni_stream(state, n_sim=50000, budget_s=budget):
+            placeholder.markdown(_html_previsioni(state, risultato), unsafe_allow_html=True)
+            salvate = {"versione": versione, "risultato": risultato}
+        st.session_state.previsioni_gironi = salvate
+    elif salvate:
+        placeholder.markdown(_html_previsioni(state, salvate["risultato"]), unsafe_allow_html=True)
+
+
+def _html_previsioni(state, risultato):
+    righe = sorted(risultato["squadre"].items(),
+                   key=lambda x: (-x[1]["vittoria"], -x[1]["semifinale"], -x[1]["qualifica"]))
+    html = """
+    <table class="rank-table">
+    <tr><th style="text-align:left">SQUADRA</th><th>QUALIFICA</th><th>SEMIFINALE</th><th>VITTORIA</th></tr>"""
+    for sid, p in righe:
+        html += f"""
+        <tr>
+            <td style="text-align:left;font-weight:600">{nome_squadra(state, sid)}</td>
+            <td>{p['qualifica']:.1f}%</td><td>{p['semifinale']:.1f}%</td>
+            <td style="font-weight:700;color:var(--accent-gold)">{p['vittoria']:.1f}%</td>
+        </tr>"""
+    html += f"</table><div style='font-size:0.7rem;color:var(--text-secondary);margin-top:4px'>{risultato['simulazioni']:,} simulazioni</div>"
+    return html
+
 
 def _simula_tutti(state):
-    for girone in state["gironi"]:
-        for partita in girone["partite"]:
-            if not partita["confermata"]:
-                simula_partita(state, partita)
-                if state["simulazione_al_ranking"]:
-                    aggiorna_classifica_squadra(state, partita)
+    TournamentEngine(state).simula_tutti()
     save_state(state)
     st.success("🎲 Tutti i match simulati!")
     st.rerun()
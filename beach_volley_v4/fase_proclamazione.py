@@ -58,8 +58,8 @@ def render_ranking_globale(state):
         
         # Punteggio ranking: punti per posizioni
         rank_pts = 0
-        for _, pos in s["storico_posizioni"]:
-            rank_pts += {1: 100, 2: 70, 3: 50}.get(pos, 20)
+        for v in s["storico_posizioni"]:
+            rank_pts += {1: 100, 2: 70, 3: 50}.get(v["pos"], 20)
         
         atleti_stats.append({
             "atleta": a,
@@ -161,8 +161,8 @@ def render_schede_carriera(state):
         storico = s["storico_posizioni"]
         
         df_data = {
-            "Torneo": [t for t, _ in storico],
-            "Posizione": [p for _, p in storico],
+            "Torneo": [v["torneo"] for v in storico],
+            "Posizione": [v["pos"] for v in storico],
         }
         df = pd.DataFrame(df_data)
         
@@ -178,9 +178,9 @@ def render_schede_carriera(state):
         # Storico tabella
         st.markdown("##### Storico Tornei")
         medals = {1: "🥇", 2: "🥈", 3: "🥉"}
-        for torneo_nome, pos in storico:
-            icon = medals.get(pos, f"#{pos}")
-            st.markdown(f"• {icon} **{torneo_nome}** — {pos}° posto")
+        for v in storico:
+            icon = medals.get(v["pos"], f"#{v['pos']}")
+            st.markdown(f"• {icon} **{v['torneo']}** — {v['pos']}° posto")
 
 
 def _render_nuovo_torneo(state):
@@ -188,15 +188,10 @@ def _render_nuovo_torneo(state):
     st.info("Iniziare un nuovo torneo manterrà gli atleti e il ranking esistente, ma resetterà squadre e partite.")
     
     if st.button("🆕 NUOVO TORNEO", use_container_width=True, type="primary"):
-        from data_manager import empty_state
+        from data_manager import nuovo_torneo
         
-        # Preserva atleti con le loro statistiche accumulate
-        atleti_preservati = state["atleti"]
-        ranking_preservato = state.get("ranking_globale", [])
-        
-        nuovo = empty_state()
-        nuovo["atleti"] = atleti_preservati
-        nuovo["ranking_globale"] = ranking_preservato
+        # Preserva atleti con le loro statistiche accumulate e il registro tornei
+        nuovo = nuovo_torneo(state)
         
         # Resetta sessione
         for key in list(st.session_state.keys()):
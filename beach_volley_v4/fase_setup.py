@@ -2,10 +2,15 @@
 fase_setup.py — Fase 1: Configurazione torneo e iscrizione squadre v4
 """
 import streamlit as st
+from datetime import datetime
 from data_manager import (
-    new_atleta, new_squadra, get_atleta_by_id,
-    save_state, genera_gironi
+    new_atleta, new_squadra, get_atleta_by_nome,
+    get_squadra_di_atleta, nomi_atleti_squadra,
+    save_state, MODELLI_SIMULAZIONE
 )
+from blob_store import salva_foto, blob_data_uri
+from motore_torneo import TournamentEngine, TIPI_TABELLONE, SVIZZERA
+from calendario import durata_partita
 
 
 def render_setup(state):
@@ -17,9 +22,30 @@ def render_setup(state):
         nome = st.text_input("Nome Torneo", value=state["torneo"]["nome"], placeholder="es. Summer Cup 2025")
         state["torneo"]["nome"] = nome
 
-        tipo = st.selectbox("Tipo Tabellone", ["Gironi + Playoff", "Doppia Eliminazione"],
-                            index=["Gironi + Playoff", "Doppia Eliminazione"].index(state["torneo"]["tipo_tabellone"]))
+        tipo = st.selectbox("Tipo Tabellone", TIPI_TABELLONE,
+                            index=TIPI_TABELLONE.index(state["torneo"]["tipo_tabellone"]))
         state["torneo"]["tipo_tabellone"] = tipo
+        if tipo == "Doppia Eliminazione":
+            state["torneo"]["spareggio_finale"] = st.toggle(
+                "🔁 Spareggio in finalissima",
+                value=state["torneo"].get("spareggio_finale", True),
+                help="Se la finalissima la vince chi arriva dal tabellone perdenti, si rigioca (entrambe hanno una sconfitta)"
+            )
+            st.caption("Niente gironi: tutte le squadre entrano nel tabellone vincenti, alla seconda sconfitta si esce.")
+        elif tipo == SVIZZERA:
+            col_t, col_q = st.columns(2)
+            with col_t:
+                state["torneo"]["turni_svizzera"] = st.number_input(
+                    "Turni", min_value=0, max_value=15, value=state["torneo"].get("turni_svizzera", 0),
+                    help="0 = automatico: quanti ne servono perché resti una sola squadra a punteggio pieno"
+                )
+            with col_q:
+                state["torneo"]["qualificate_svizzera"] = st.selectbox(
+                    "Qualificate ai Playoff", [4, 8, 16],
+                    index=[4, 8, 16].index(state["torneo"].get("qualificate_svizzera", 8))
+                )
+            st.caption("Per open numerosi: ogni turno accoppia squadre a pari punti senza rivincite, "
+                       "poi le prime della classifica (punti, Buchholz) vanno al tabellone.")
 
         formato = st.selectbox("Formato Set", ["Set Unico", "Best of 3"],
                                index=["Set Unico", "Best of 3"].index(state["torneo"]["formato_set"]))
@@ -52,6 +78,30 @@ def render_setup(state):
             if usa_ranking:
                 st.info("✅ Le squadre saranno distribuite nei gironi secondo il ranking globale degli atleti.")
 
+            modello = st.selectbox(
+                "🎲 Modello Simulazione",
+                MODELLI_SIMULAZIONE,
+                index=MODELLI_SIMULAZIONE.index(state["torneo"].get("modello_simulazione", "Casuale")),
+                help="Casuale: ogni scambio 50/50 · Attributi: vince più scambi la squadra con attacco/difesa migliori"
+            )
+            state["torneo"]["modello_simulazione"] = modello
+
+            st.markdown("#### Campi e Orari")
+            col_c, col_r, col_i = st.columns(3)
+            with col_c:
+                state["torneo"]["campi"] = st.number_input(
+                    "🏟️ Campi", min_value=1, max_value=12, value=state["torneo"].get("campi", 2))
+            with col_r:
+                state["torneo"]["riposo_min"] = st.number_input(
+                    "😮‍💨 Riposo minimo (min)", min_value=0, max_value=60, step=5,
+                    value=state["torneo"].get("riposo_min", 10),
+                    help="Pausa minima tra due partite della stessa squadra")
+            with col_i:
+                inizio = st.time_input("🕘 Inizio", value=datetime.strptime(state["torneo"].get("ora_inizio", "09:00"), "%H:%M").time())
+                state["torneo"]["ora_inizio"] = inizio.strftime("%H:%M")
+            st.caption(f"⏱️ Durata stimata di una partita: {durata_partita(state['torneo'])} min "
+                       "(da formato set e punteggio massimo)")
+
             st.markdown("#### Regole Speciali")
             regola_set = st.selectbox(
                 "Regola Tie-Break",
@@ -76,31 +126,25 @@ def render_setup(state):
     st.divider()
     n_squadre = len(state["squadre"])
     tipo_gioco = state["torneo"].get("tipo_gioco", "2x2")
-    min_sq = 4
+    motore = TournamentEngine(state)
+    blocco = motore.motivo_blocco_avvio()
 
     col_a, col_b = st.columns([2, 1])
     with col_a:
-        if n_squadre < min_sq:
-            st.warning(f"⚠️ Servono almeno {min_sq} squadre per avviare il torneo. ({n_squadre}/{min_sq})")
-        elif not nome:
-            st.warning("⚠️ Inserisci il nome del torneo.")
+        if blocco:
+            st.warning(f"⚠️ {blocco}")
         else:
             st.success(f"✅ {n_squadre} squadre iscritte ({tipo_gioco}). Pronto per avviare!")
 
     with col_b:
-        if n_squadre >= min_sq and nome:
+        if not blocco:
             if st.button("🚀 AVVIA TORNEO →", use_container_width=True):
-                ids = [s["id"] for s in state["squadre"]]
-                num_gironi = max(2, n_squadre // 4)
-                use_ranking = state["torneo"].get("usa_ranking_teste_serie", False)
-                state["gironi"] = genera_gironi(ids, num_gironi, use_ranking=use_ranking, state=state)
-                state["fase"] = "gironi"
+                motore.avvia()
                 save_state(state)
                 st.rerun()
 
 
 def _render_atleti_manager(state):
-    nomi_esistenti = [a["nome"] for a in state["atleti"]]
     with st.expander("➕ Aggiungi Nuovo Atleta", expanded=False):
         col_n1, col_n2, col_foto = st.columns([2, 2, 1])
         with col_n1:
@@ -112,16 +156,15 @@ def _render_atleti_manager(state):
 
         if st.button("Aggiungi Atleta", key="btn_add_atleta"):
             full = f"{nuovo_nome.strip()} {nuovo_cognome.strip()}".strip()
-            if full and full not in nomi_esistenti:
+            if full and not get_atleta_by_nome(state, full):
                 nuovo = new_atleta(nuovo_nome.strip(), nuovo_cognome.strip())
                 if foto_file:
-                    import base64
-                    nuovo["foto_b64"] = base64.b64encode(foto_file.read()).decode()
+                    nuovo["foto_blob"] = salva_foto(foto_file)
                 state["atleti"].append(nuovo)
                 save_state(state)
                 st.success(f"✅ {full} aggiunto!")
                 st.rerun()
-            elif full in nomi_esistenti:
+            elif full:
                 st.error("Atleta già presente.")
             else:
                 st.error("Inserisci almeno il nome.")
@@ -132,8 +175,8 @@ def _render_atleti_manager(state):
             col_a, col_del = st.columns([4, 1])
             with col_a:
                 foto_html = ""
-                if a.get("foto_b64"):
-                    foto_html = f'<img src="data:image/png;base64,{a["foto_b64"]}" style="height:20px;width:20px;border-radius:50%;object-fit:cover;margin-right:6px;vertical-align:middle">'
+                if a.get("foto_blob"):
+                    foto_html = f'<img src="{blob_data_uri(a["foto_blob"], "icona")}" style="height:20px;width:20px;border-radius:50%;object-fit:cover;margin-right:6px;vertical-align:middle">'
                 st.markdown(f"<span style='font-size:0.85rem'>{foto_html}• {a['nome']}</span>", unsafe_allow_html=True)
             with col_del:
                 if st.button("✕", key=f"del_a_{a['id']}"):
@@ -175,14 +218,13 @@ def _render_squadre_manager(state):
                                         help="Inserisci la quota già pagata dalla coppia al momento dell'iscrizione")
 
     if st.button("➕ Iscrive Squadra", key="btn_add_squadra"):
-        atleti_objs = [next((a for a in state["atleti"] if a["nome"] == n), None) for n in atleti_selezionati]
+        atleti_objs = [get_atleta_by_nome(state, n) for n in atleti_selezionati]
         if any(a is None for a in atleti_objs):
             st.error("Atleti non trovati.")
         elif not nome_sq:
             st.error("Inserisci il nome della squadra.")
         else:
-            atleti_in_squadra = [aid for sq in state["squadre"] for aid in sq["atleti"]]
-            conflitti = [a for a in atleti_objs if a["id"] in atleti_in_squadra]
+            conflitti = [a for a in atleti_objs if get_squadra_di_atleta(state, a["id"])]
             if conflitti:
                 st.warning(f"⚠️ {conflitti[0]['nome']} è già in un'altra squadra.")
             else:
@@ -197,7 +239,7 @@ def _render_squadre_manager(state):
         totale_quote = sum(sq.get("quota_pagata", 0.0) for sq in state["squadre"])
         st.caption(f"💰 Totale quote già raccolte: **€{totale_quote:.2f}**")
         for i, sq in enumerate(state["squadre"]):
-            a_names = [get_atleta_by_id(state, aid)["nome"] for aid in sq["atleti"] if get_atleta_by_id(state, aid)]
+            a_names = nomi_atleti_squadra(state, sq)
             quota = sq.get("quota_pagata", 0.0)
             col_s, col_q, col_btn = st.columns([4, 1, 1])
             with col_s:
@@ -214,7 +256,7 @@ def _render_squadre_ordine(state):
     squadre = state["squadre"]
     st.markdown("Usa i pulsanti ↑↓ per cambiare l'ordine delle squadre:")
     for i, sq in enumerate(squadre):
-        a_names = [get_atleta_by_id(state, aid)["nome"] for aid in sq["atleti"] if get_atleta_by_id(state, aid)]
+        a_names = nomi_atleti_squadra(state, sq)
         col_pos, col_nome, col_up, col_down = st.columns([1, 4, 1, 1])
         with col_pos:
             st.markdown(f"<div style='padding-top:8px;color:var(--text-secondary);font-weight:700'>#{i+1}</div>", unsafe_allow_html=True)
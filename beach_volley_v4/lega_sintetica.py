@@ -0,0 +1,91 @@
+"""
+lega_sintetica.py — Generatore di leghe sintetiche (più stagioni di un club) per test di scala
+"""
+import random
+from datetime import date, timedelta
+
+import numpy as np
+
+from data_manager import empty_state, new_atleta, new_squadra
+from motore_torneo import TournamentEngine
+
+NOMI = ["Marco", "Luca", "Giulia", "Sara", "Andrea", "Chiara", "Paolo", "Elena", "Matteo", "Anna",
+        "Davide", "Marta", "Simone", "Laura", "Fabio", "Silvia", "Alessio", "Irene", "Nicola", "Valentina"]
+COGNOMI = ["Rossi", "Bianchi", "Ferrari", "Russo", "Romano", "Gallo", "Costa", "Fontana", "Conti", "Esposito",
+           "Ricci", "Bruno", "Moretti", "Marino", "Greco", "Barbieri", "Lombardi", "Giordano", "Colombo", "Rinaldi"]
+
+
+def _atleti(n):
+    """n atleti con nomi e id univoci (new_atleta usa un suffisso casuale a 4 cifre)."""
+    atleti, visti = [], set()
+    combinazioni = len(NOMI) * len(COGNOMI)
+    for i in range(n):
+        cognome = COGNOMI[(i // len(NOMI)) % len(COGNOMI)]
+        if i >= combinazioni:
+            cognome = f"{cognome} {i // combinazioni + 1}"
+        a = new_atleta(NOMI[i % len(NOMI)], cognome)
+        while a["id"] in visti:
+            a["id"] = f"{a['id']}_{i}"
+        visti.add(a["id"])
+        atleti.append(a)
+    return atleti
+
+
+def iscrivi_squadre(state, n_squadre, tipo_gioco="2x2"):
+    """Iscrive al torneo corrente n_squadre formate da atleti estratti a caso."""
+    n_giocatori = int(tipo_gioco[0])
+    scelti = random.sample(state["atleti"], n_squadre * n_giocatori)
+    squadre, visti = [], set()
+    for i in range(n_squadre):
+        gruppo = scelti[i * n_giocatori:(i + 1) * n_giocatori]
+        sq = new_squadra("/".join(a["nome_proprio"] for a in gruppo), [a["id"] for a in gruppo],
+                         quota_pagata=random.choice([0.0, 20.0, 40.0]))
+        while sq["id"] in visti:
+            sq["id"] = f"{sq['id']}_{i}"
+        visti.add(sq["id"])
+        squadre.append(sq)
+    state["squadre"] = squadre
+    return state["squadre"]
+
+
+def _prossimo_torneo(state):
+    """Come nuovo_torneo ma sul posto: ricopiare migliaia di atleti a ogni tappa costa più del torneo."""
+    for k, v in empty_state().items():
+        if k not in ("atleti", "ranking_globale", "registro_tornei"):
+            state[k] = v
+
+
+def gioca_torneo(state, nome, data, n_squadre, rng=None):
+    """Disputa un torneo simulato completo col motore e lo trasferisce al ranking."""
+    t = state["torneo"]
+    t["nome"] = nome; t["data"] = data
+    t["usa_ranking_teste_serie"] = True
+    t["modello_simulazione"] = "Attributi"
+    state["simulazione_al_ranking"] = True
+    iscrivi_squadre(state, n_squadre, t.get("tipo_gioco", "2x2"))
+    motore = TournamentEngine(state, rng=rng)
+    motore.avvia()
+    motore.simula_tutti()
+    motore.avvia_eliminazione()
+    motore.simula_tutti()
+    return motore.proclama()
+
+
+def genera_lega(n_atleti=200, n_tornei=20, squadre_per_torneo=(8, 24), seme=0, inizio="2022-04-02"):
+    """
+    Stato sintetico riproducibile: `n_atleti` atleti che hanno disputato `n_tornei`
+    tornei settimanali (squadre per torneo estratte in `squadre_per_torneo`).
+    Lo stato restituito è pronto per un nuovo torneo, con ranking, registro e trofei popolati.
+    A parità di seme cambiano solo gli orari di sblocco dei trofei.
+    """
+    random.seed(seme)
+    rng = np.random.default_rng(seme)
+    state = empty_state()
+    state["atleti"] = _atleti(n_atleti)
+    giorno = date.fromisoformat(inizio)
+    massimo = min(squadre_per_torneo[1], n_atleti // 2)
+    for k in range(n_tornei):
+        n_squadre = random.randint(min(squadre_per_torneo[0], massimo), massimo)
+        gioca_torneo(state, f"Tappa {k + 1}", str(giorno + timedelta(weeks=k)), n_squadre, rng)
+        _prossimo_torneo(state)
+    return state
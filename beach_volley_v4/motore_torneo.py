@@ -0,0 +1,209 @@
+"""
+motore_torneo.py — Ciclo di vita del torneo senza Streamlit
+(setup → gironi → eliminazione → proclamazione)
+
+Le pagine sono viste sottili: leggono lo stato, chiamano il motore e salvano.
+Il motore non salva e non tocca widget, quindi si può pilotare da script,
+simulazioni e benchmark.
+"""
+from data_manager import (
+    genera_gironi, genera_bracket_da_gironi, ordina_teste_di_serie, simula_partita,
+    aggiorna_classifica_squadra, storna_classifica_squadra, registra_torneo, trasferisci_al_ranking,
+    nuovo_torneo, crea_svizzera, genera_turno_svizzero, turno_svizzero
+)
+from simulatore import simula_partite
+import bracket
+import calendario
+import doppia_eliminazione
+
+DOPPIA_ELIMINAZIONE = "Doppia Eliminazione"
+SVIZZERA = "Sistema Svizzero"
+TIPI_TABELLONE = ["Gironi + Playoff", DOPPIA_ELIMINAZIONE, SVIZZERA]
+
+MIN_SQUADRE = 4
+
+
+def punteggi_validi(punteggi):
+    """Tiene solo i set con almeno un punto inserito (gli altri non sono stati giocati)."""
+    return [(int(p1), int(p2)) for p1, p2 in punteggi if p1 > 0 or p2 > 0]
+
+
+class TournamentEngine:
+    """Transizioni di fase, conferma risultati, avanzamento tabellone e trasferimento al ranking."""
+
+    def __init__(self, state, rng=None):
+        self.state = state
+        self.rng = rng   # numpy Generator per le simulazioni in blocco (None: casuale)
+
+    @property
+    def fase(self):
+        return self.state["fase"]
+
+    # ─── SETUP ───────────────────────────────────────────────────────────────
+
+    def motivo_blocco_avvio(self):
+        """None se il torneo può partire, altrimenti il motivo."""
+        n = len(self.state["squadre"])
+        if n < MIN_SQUADRE:
+            return f"Servono almeno {MIN_SQUADRE} squadre per avviare il torneo. ({n}/{MIN_SQUADRE})"
+        if not self.state["torneo"]["nome"]:
+            return "Inserisci il nome del torneo."
+        return None
+
+    def avvia(self):
+        motivo = self.motivo_blocco_avvio()
+        if motivo:
+            raise ValueError(motivo)
+        ids = [s["id"] for s in self.state["squadre"]]
+        torneo = self.state["torneo"]
+        use_ranking = torneo.get("usa_ranking_teste_serie", False)
+        if torneo.get("tipo_tabellone") == DOPPIA_ELIMINAZIONE:
+            # Niente gironi: tutto il calendario a doppia eliminazione subito, teste di serie dal ranking
+            teste = ordina_teste_di_serie(ids, use_ranking, self.state)
+            self.state["bracket"] = doppia_eliminazione.crea_doppia_eliminazione(
+                bracket.slot_da_teste_di_serie(teste),
+                spareggio=torneo.get("spareggio_finale", True))
+            self.state["fase"] = "eliminazione"
+            self.pianifica()
+            return
+        if torneo.get("tipo_tabellone") == SVIZZERA:
+            # Un solo girone svizzero: i turni successivi si generano man mano che si chiudono
+            svizzera = crea_svizzera(ordina_teste_di_serie(ids, use_ranking, self.state),
+                                     torneo.get("turni_svizzera", 0), torneo.get("qualificate_svizzera", 8))
+            genera_turno_svizzero(svizzera)
+            self.state["gironi"] = [svizzera]
+            self.state["fase"] = "gironi"
+            self.pianifica()
+            return
+        self.state["gironi"] = genera_gironi(ids, max(2, len(ids) // 4), use_ranking=use_ranking, state=self.state)
+        self.state["fase"] = "gironi"
+        self.pianifica()
+
+    # ─── RISULTATI ───────────────────────────────────────────────────────────
+
+    def conferma_risultato(self, partita, punteggi, in_battuta=None):
+        """
+        Conferma una partita con i punteggi dei set [(p1, p2), ...], aggiorna le
+        classifiche e, nei playoff, fa avanzare il tabellone. Su una partita già
+        confermata è una correzione: il vecchio risultato esce dalla classifica.
+        """
+        validi = punteggi_validi(punteggi)
+        if not validi:
+            raise ValueError("Inserisci almeno un set con punteggio.")
+        storna_classifica_squadra(self.state, partita)
+        s1v = sum(1 for a, b in validi if a > b)
+        s2v = len(validi) - s1v
+        partita["punteggi"] = validi
+        partita["set_sq1"] = s1v; partita["set_sq2"] = s2v
+        partita["vincitore"] = partita["sq1"] if s1v > s2v else partita["sq2"]
+        if in_battuta is not None:
+            partita["in_battuta"] = in_battuta
+        partita["confermata"] = True
+        aggiorna_classifica_squadra(self.state, partita)
+        self._dopo_risultato([partita])
+        return partita
+
+    def simula(self, partita):
+        """Simula una partita; entra in classifica solo se la simulazione va al ranking."""
+        storna_classifica_squadra(self.state, partita)
+        simula_partita(self.state, partita)
+        if self.state["simulazione_al_ranking"]:
+            aggiorna_classifica_squadra(self.state, partita)
+        self._dopo_risultato([partita])
+        return partita
+
+    def simula_tutti(self):
+        """Simula in blocco le partite ancora aperte della fase corrente (nei playoff turno dopo turno)."""
+        simulate = []
+        while True:
+            da_giocare = self.partite_da_giocare()
+            if not da_giocare:
+                return simulate
+            simula_partite(self.state, da_giocare, rng=self.rng)
+            if self.state["simulazione_al_ranking"]:
+                for partita in da_giocare:
+                    aggiorna_classifica_squadra(self.state, partita)
+            self._dopo_risultato(da_giocare)
+            simulate += da_giocare
+
+    def partite_da_giocare(self):
+        if self.fase == "gironi":
+            return [p for g in self.state["gironi"] for p in g["partite"] if not p["confermata"]]
+        if self.fase == "eliminazione":
+            return self.formato().pronte(self.state["bracket"])
+        return []
+
+    def _dopo_risultato(self, partite):
+        formato = self.formato()
+        for p in partite:
+            if p.get("fase") == "eliminazione":
+                formato.avanza(self.state, p)
+        svizzera = self.svizzera()
+        if (self.fase == "gironi" and svizzera and turno_svizzero(svizzera) < svizzera["turni"]
+                and all(p["confermata"] for p in svizzera["partite"])):
+            genera_turno_svizzero(svizzera)
+            self.pianifica()
+
+    # ─── GIRONI → ELIMINAZIONE ───────────────────────────────────────────────
+
+    def svizzera(self):
+        """Il girone svizzero se il torneo è a sistema svizzero, altrimenti None."""
+        gironi = self.state["gironi"]
+        return gironi[0] if gironi and gironi[0].get("svizzera") else None
+
+    def gironi_completi(self):
+        svizzera = self.svizzera()
+        if svizzera and turno_svizzero(svizzera) < svizzera["turni"]:
+            return False
+        return all(p["confermata"] for g in self.state["gironi"] for p in g["partite"])
+
+    def avvia_eliminazione(self):
+        if not self.gironi_completi():
+            raise ValueError("Conferma tutti i match per avanzare")
+        svizzera = self.svizzera()
+        qualificate = svizzera["qualificate"] if svizzera else 2
+        self.state["bracket"] = genera_bracket_da_gironi(self.state["gironi"], self.state, qualificate)
+        self.state["fase"] = "eliminazione"
+        self.pianifica()
+
+    # ─── CALENDARIO ──────────────────────────────────────────────────────────
+
+    def pianifica(self, assegna=True):
+        """Campo e orario di ogni partita con campi, riposo e inizio del torneo; restituisce il riepilogo."""
+        t = self.state["torneo"]
+        return calendario.pianifica(self.state, t.get("campi", 2), t.get("riposo_min", 10),
+                                    inizio=t.get("ora_inizio", "09:00"), assegna=assegna)
+
+    # ─── TABELLONE ───────────────────────────────────────────────────────────
+
+    def formato(self):
+        """Modulo del tabellone in corso: eliminazione diretta (bracket) o doppia eliminazione."""
+        b = self.state["bracket"]
+        return doppia_eliminazione if b and "tabellone" in b[0] else bracket
+
+    def vincitore(self):
+        """Vincitore del torneo a tabellone concluso (finale e finalina confermate), altrimenti None."""
+        podio = self.podio()
+        return podio[0][1] if podio else None
+
+    def podio(self):
+        return self.formato().podio(self.state)
+
+    # ─── PROCLAMAZIONE ───────────────────────────────────────────────────────
+
+    def proclama(self):
+        """Fissa vincitore e podio, registra il torneo e (se attivo) trasferisce al ranking."""
+        podio = self.podio()
+        if not podio:
+            raise ValueError("La finale non è ancora stata giocata.")
+        self.state["vincitore"] = podio[0][1]
+        self.state["podio"] = podio
+        registra_torneo(self.state)
+        if self.state["simulazione_al_ranking"]:
+            trasferisci_al_ranking(self.state, podio)
+        self.state["fase"] = "proclamazione"
+        return podio
+
+    def nuovo_torneo(self):
+        """Stato per il torneo successivo (atleti, ranking e registro restano)."""
+        return nuovo_torneo(self.state)
@@ -0,0 +1,129 @@
+"""
+previsioni.py — Previsioni Monte Carlo (qualificazione / semifinale / vittoria) durante i gironi
+"""
+import os, random, time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from data_manager import (
+    simula_partita, new_partita, forze_squadre, teste_di_serie_da_gironi, _posizione_ranking
+)
+from bracket import slot_da_teste_di_serie
+
+_CAMPI_RISULTATO = ("sq1", "sq2", "set_sq1", "set_sq2", "punteggi", "vincitore", "in_classifica")
+
+
+def _scenario(state):
+    """Estrae dallo stato solo ciò che serve alle simulazioni (dati semplici, serializzabili)."""
+    squadre_gironi = {sid for g in state["gironi"] for sid in g["squadre"]}
+    forze = forze_squadre(state)
+    usa_ranking = state["torneo"].get("usa_ranking_teste_serie", False)
+    rank_key = _posizione_ranking(state) if usa_ranking else (lambda sid: 0)
+    return {
+        "torneo": {"punteggio_max": state["torneo"]["punteggio_max"],
+                   "formato_set": state["torneo"]["formato_set"],
+                   "modello_simulazione": state["torneo"].get("modello_simulazione", "Casuale"),
+                   "usa_ranking_teste_serie": usa_ranking},
+        # Forze e posizioni nel ranking precalcolate: i worker non hanno gli atleti
+        "forze_squadre": {sid: f for sid, f in forze.items() if sid in squadre_gironi},
+        "posizione_ranking": {sid: rank_key(sid) for sid in squadre_gironi},
+        "squadre": [{"id": sq["id"]} for sq in state["squadre"] if sq["id"] in squadre_gironi],
+        # Risultati già in classifica: la classifica avulsa li rilegge a ogni simulazione
+        "gironi": [{"nome": g["nome"], "squadre": list(g["squadre"]),
+                    "giocate": [{k: p[k] for k in _CAMPI_RISULTATO} for p in g["partite"] if p.get("in_classifica")],
+                    "da_giocare": [(p["sq1"], p["sq2"]) for p in g["partite"] if not p["confermata"]]}
+                   for g in state["gironi"]],
+    }
+
+
+def _simula_eliminazione(stato, teste, conteggi):
+    # Stesso tabellone del torneo vero: teste di serie e bye, turno per turno sugli slot
+    slot = slot_da_teste_di_serie(teste)
+    while len(slot) > 1:
+        if len(slot) == 4:
+            for sid in slot:
+                if sid is not None:
+                    conteggi[sid][1] += 1
+        slot = [a if b is None else b if a is None else
+                simula_partita(stato, new_partita(a, b, "eliminazione"))["vincitore"]
+                for a, b in zip(slot[::2], slot[1::2])]
+    if slot[0] is not None:
+        conteggi[slot[0]][2] += 1
+
+
+def _simula_blocco(scenario, n, seme):
+    """
+    Esegue `n` simulazioni del resto del torneo (nel processo worker).
+    Restituisce {sid: [qualificata, semifinale, vittoria]} come conteggi.
+    """
+    random.seed(seme)
+    conteggi = {sq["id"]: [0, 0, 0] for sq in scenario["squadre"]}
+    for _ in range(n):
+        stato = {"torneo": scenario["torneo"], "forze_squadre": scenario["forze_squadre"],
+                 "posizione_ranking": scenario["posizione_ranking"]}
+        gironi = []
+        for g in scenario["gironi"]:
+            simulate = [simula_partita(stato, new_partita(sq1, sq2)) for sq1, sq2 in g["da_giocare"]]
+            for p in simulate:
+                p["in_classifica"] = True
+            gironi.append({"nome": g["nome"], "squadre": g["squadre"], "partite": g["giocate"] + simulate})
+        # Le prime due di ogni girone, con le teste di serie di genera_bracket_da_gironi
+        # (ranking se il torneo lo usa, poi rendimento nel girone)
+        teste = teste_di_serie_da_gironi(gironi, stato)
+        for sid in teste:
+            conteggi[sid][0] += 1
+        _simula_eliminazione(stato, teste, conteggi)
+    return conteggi
+
+
+def _percentuali(totali, n):
+    return {sid: {"qualifica": c[0] / n * 100, "semifinale": c[1] / n * 100, "vittoria": c[2] / n * 100}
+            for sid, c in totali.items()}
+
+
+def previsioni_stream(state, n_sim=20000, budget_s=5.0, blocco=500, workers=None):
+    """
+    Generatore di previsioni che convergono: a ogni blocco di simulazioni completato
+    produce {"simulazioni": n, "squadre": {sid: {"qualifica": %, "semifinale": %, "vittoria": %}}}.
+    Si ferma a `n_sim` simulazioni o allo scadere di `budget_s` secondi.
+    I blocchi girano su un ProcessPoolExecutor; workers=0 li esegue nel processo corrente.
+    """
+    scenario = _scenario(state)
+    totali = {sq["id"]: [0, 0, 0] for sq in scenario["squadre"]}
+    if not totali:
+        return
+    fatte = 0
+    scadenza = time.monotonic() + budget_s
+    blocchi = [min(blocco, n_sim - i) for i in range(0, n_sim, blocco)]
+
+    def accumula(conteggi, n):
+        nonlocal fatte
+        for sid, c in conteggi.items():
+            t = totali[sid]
+            t[0] += c[0]; t[1] += c[1]; t[2] += c[2]
+        fatte += n
+        return {"simulazioni": fatte, "squadre": _percentuali(totali, fatte)}
+
+    if workers == 0:
+        for n in blocchi:
+            if time.monotonic() >= scadenza:
+                break
+            yield accumula(_simula_blocco(scenario, n, random.getrandbits(64)), n)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        in_corso = {}
+        while blocchi or in_corso:
+            # Tiene occupati i worker senza mettere in coda tutto il lavoro
+            while blocchi and len(in_corso) < workers * 2:
+                n = blocchi.pop()
+                in_corso[pool.submit(_simula_blocco, scenario, n, random.getrandbits(64))] = n
+            residuo = scadenza - time.monotonic()
+            if residuo <= 0:
+                break
+            completati, _ = wait(in_corso, timeout=residuo, return_when=FIRST_COMPLETED)
+            for fut in completati:
+                yield accumula(fut.result(), in_corso.pop(fut))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
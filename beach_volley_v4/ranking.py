@@ -0,0 +1,88 @@
+"""
+ranking.py — Ranking globale (DataFrame colonnare e righe per le viste), senza Streamlit
+
+Lo usano le pagine, il motore (teste di serie) e gli script di benchmark.
+"""
+import numpy as np
+import pandas as pd
+from data_manager import StatoTorneo, memorizzato, ATTRIBUTI_FIFA, PESI_FIFA, FASCE_CARD
+
+
+def build_ranking_data(state):
+    """
+    Ranking atleti come lista di dict (con riferimento all'atleta e allo storico),
+    nell'ordine di ranking_frame.
+    """
+    if not isinstance(state, StatoTorneo):
+        return _righe_ranking(state, _calcola_frame(state))
+    return memorizzato(state, "ranking", state.versione_sezione("atleti"),
+                       lambda s: _righe_ranking(s, ranking_frame(s)))
+
+
+def ranking_frame(state):
+    """
+    Ranking in forma colonnare (un DataFrame, una riga per atleta con almeno un
+    torneo), già ordinato. Memorizzato sullo stato: dipende solo dagli atleti,
+    quindi i rerun del segnapunti non lo ricalcolano.
+    """
+    if not isinstance(state, StatoTorneo):
+        return _calcola_frame(state)
+    return memorizzato(state, "ranking_df", state.versione_sezione("atleti"), _calcola_frame)
+
+
+_COLONNE_STATS = ["tornei", "vittorie", "sconfitte", "set_vinti", "set_persi", "punti_fatti", "punti_subiti"]
+_COLONNE_RANKING = ["id", "nome"] + _COLONNE_STATS + [
+    "quoziente_punti", "quoziente_set", "win_rate", "rank_pts",
+    "oro", "argento", "bronzo", "overall", "card_type"]
+
+
+def _arrotonda(serie, cifre):
+    # round() di Python (arrotondamento decimale esatto) per avere gli stessi valori di sempre
+    return pd.Series([round(x, cifre) for x in serie.tolist()], index=serie.index, dtype="float64")
+
+
+def _calcola_frame(state):
+    atleti = [a for a in state["atleti"] if a["stats"]["tornei"] != 0]
+    if not atleti:
+        return pd.DataFrame(columns=_COLONNE_RANKING + ["idx"])
+    stats = [a["stats"] for a in atleti]
+    colonne = {"id": [a["id"] for a in atleti], "nome": [a["nome"] for a in atleti]}
+    colonne.update((c, np.array([s[c] for s in stats])) for c in _COLONNE_STATS)
+    colonne.update((c, np.array([s.get(c, 50) for s in stats])) for c in ATTRIBUTI_FIFA)
+    df = pd.DataFrame(colonne)
+    df["idx"] = np.arange(len(df))
+
+    # Storico in formato lungo: una riga per piazzamento
+    piazzamenti = [(i, v) for i, s in enumerate(stats) for v in s["storico_posizioni"]]
+    storico = pd.DataFrame({"idx": np.array([i for i, _ in piazzamenti], dtype="int64"),
+                            "pos": np.array([v["pos"] for _, v in piazzamenti], dtype="int64"),
+                            "punti": np.array([v["punti"] for _, v in piazzamenti], dtype="int64")})
+    for col, pos in (("oro", 1), ("argento", 2), ("bronzo", 3)):
+        storico[col] = (storico["pos"] == pos).astype("int64")
+    per_atleta = storico.groupby("idx")[["punti", "oro", "argento", "bronzo"]].sum().reindex(df["idx"], fill_value=0)
+    df["rank_pts"] = per_atleta["punti"].to_numpy()
+    for col in ("oro", "argento", "bronzo"):
+        df[col] = per_atleta[col].to_numpy()
+
+    df["quoziente_punti"] = _arrotonda(df["punti_fatti"] / (df["set_vinti"] + df["set_persi"]).clip(lower=1), 2)
+    df["quoziente_set"] = _arrotonda(df["set_vinti"] / df["set_persi"].clip(lower=1), 2)
+    df["win_rate"] = _arrotonda(df["vittorie"] / df["tornei"].clip(lower=1) * 100, 1)
+
+    # Stesse operazioni, nello stesso ordine, di calcola_overall_fifa
+    pesato = sum(df[c] * p for c, p in zip(ATTRIBUTI_FIFA, PESI_FIFA)) / sum(PESI_FIFA)
+    bonus = (df["vittorie"] * 2).clip(upper=10)
+    df["overall"] = (pesato + bonus).astype("int64").clip(45, 99)
+    df["card_type"] = np.select([df["overall"] >= soglia for soglia, _ in FASCE_CARD],
+                                [tipo for _, tipo in FASCE_CARD], FASCE_CARD[-1][1]).tolist()
+
+    df = df.sort_values(["rank_pts", "oro", "argento", "win_rate"], ascending=False, kind="stable")
+    return df[_COLONNE_RANKING + ["idx"]].reset_index(drop=True)
+
+
+def _righe_ranking(state, df):
+    atleti = [a for a in state["atleti"] if a["stats"]["tornei"] != 0]
+    righe = []
+    for idx, *valori in zip(df["idx"].tolist(), *(df[c].tolist() for c in _COLONNE_RANKING)):
+        a = atleti[idx]
+        righe.append({"atleta": a, **dict(zip(_COLONNE_RANKING, valori)), "storico": a["stats"]["storico_posizioni"]})
+    return righe
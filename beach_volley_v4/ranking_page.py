@@ -5,50 +5,11 @@ import streamlit as st
 import pandas as pd
 from data_manager import (
     get_atleta_by_id, get_squadra_by_id, save_state,
-    calcola_overall_fifa, get_card_type, get_trofei_atleta, TROFEI_DEFINIZIONE
+    calcola_overall_fifa, get_card_type, get_trofei_atleta, TROFEI_DEFINIZIONE,
+    calcola_punti_ranking
 )
-
-
-def calcola_punti_ranking(pos, n_squadre):
-    pts_massimi = n_squadre * 10
-    return max(0, pts_massimi - ((pos - 1) * 10))
-
-
-def build_ranking_data(state):
-    atleti_stats = []
-    for a in state["atleti"]:
-        s = a["stats"]
-        if s["tornei"] == 0:
-            continue
-        rank_pts = sum(
-            calcola_punti_ranking(pos, _get_n_squadre_torneo(state, tn))
-            for tn, pos in s["storico_posizioni"]
-        )
-        quoziente_punti = round(s["punti_fatti"] / max(s["set_vinti"] + s["set_persi"], 1), 2)
-        quoziente_set = round(s["set_vinti"] / max(s["set_persi"], 1), 2)
-        win_rate = round(s["vittorie"] / max(s["tornei"], 1) * 100, 1)
-        medaglie_oro = sum(1 for _, pos in s["storico_posizioni"] if pos == 1)
-        medaglie_argento = sum(1 for _, pos in s["storico_posizioni"] if pos == 2)
-        medaglie_bronzo = sum(1 for _, pos in s["storico_posizioni"] if pos == 3)
-        overall = calcola_overall_fifa(a)
-        card_type = get_card_type(overall, s["tornei"], s["vittorie"])
-        atleti_stats.append({
-            "atleta": a, "id": a["id"], "nome": a["nome"],
-            "tornei": s["tornei"], "vittorie": s["vittorie"], "sconfitte": s["sconfitte"],
-            "set_vinti": s["set_vinti"], "set_persi": s["set_persi"],
-            "punti_fatti": s["punti_fatti"], "punti_subiti": s["punti_subiti"],
-            "quoziente_punti": quoziente_punti, "quoziente_set": quoziente_set,
-            "win_rate": win_rate, "rank_pts": rank_pts,
-            "oro": medaglie_oro, "argento": medaglie_argento, "bronzo": medaglie_bronzo,
-            "storico": s["storico_posizioni"],
-            "overall": overall, "card_type": card_type,
-        })
-    atleti_stats.sort(key=lambda x: (-x["rank_pts"], -x["oro"], -x["argento"], -x["win_rate"]))
-    return atleti_stats
-
-
-def _get_n_squadre_torneo(state, torneo_nome):
-    return max(len(state["squadre"]), 4)
+from ranking import build_ranking_data, ranking_frame
+from blob_store import salva_foto, blob_data_uri
 
 
 def render_ranking_page(state):
@@ -193,8 +154,8 @@ def render_card_html(a, size="normal", clickable=True):
 
     foto_html = ""
     foto_height = "90px" if size == "normal" else "75px"
-    if a["atleta"].get("foto_b64"):
-        foto_html = f'<img src="data:image/png;base64,{a["atleta"]["foto_b64"]}" style="width:100%;height:{foto_height};object-fit:cover;display:block">'
+    if a["atleta"].get("foto_blob"):
+        foto_html = f'<img src="{blob_data_uri(a["atleta"]["foto_blob"], "card")}" style="width:100%;height:{foto_height};object-fit:cover;display:block">'
     else:
         foto_html = f'<div style="width:100%;height:{foto_height};background:linear-gradient(180deg,rgba(0,0,0,0.4),rgba(0,0,0,0.6));display:flex;align-items:center;justify-content:center;font-size:2rem">👤</div>'
 
@@ -301,23 +262,22 @@ def _render_classifica_completa(state, ranking):
         "bronzo_comune":"🟫","bronzo_raro":"🟤","argento_comune":"⬜","argento_raro":"🔵",
         "oro_comune":"🟨","oro_raro":"🌟","eroe":"💜","leggenda":"🤍","dio_olimpo":"⚡"
     }
-    for i, a in enumerate(ranking):
-        pos = i + 1
+    for pos, a in enumerate(ranking_frame(state).itertuples(index=False), 1):
         cls = pos_cls.get(pos, "")
-        card_icon = card_icons.get(a["card_type"], "")
-        html += f"""<tr class="rank-row-link" onclick="window.parent.postMessage({{type:'profile_click',id:'{a['id']}'}}, '*')">
+        card_icon = card_icons.get(a.card_type, "")
+        html += f"""<tr class="rank-row-link" onclick="window.parent.postMessage({{type:'profile_click',id:'{a.id}'}}, '*')">
             <td><span class="rank-pos {cls}">{pos}</span></td>
-            <td style="text-align:left;font-weight:700">{card_icon} {a['nome']}</td>
-            <td style="font-weight:800;color:var(--accent-gold)">{a['overall']}</td>
-            <td style="font-weight:800;color:var(--accent-gold)">{a['rank_pts']}</td>
-            <td>{a['tornei']}</td>
-            <td style="color:#ffd700">{a['oro']}</td>
-            <td style="color:#c0c0c0">{a['argento']}</td>
-            <td style="color:#cd7f32">{a['bronzo']}</td>
-            <td style="color:var(--green)">{a['vittorie']}</td>
-            <td style="color:var(--accent1)">{a['sconfitte']}</td>
-            <td>{a['set_vinti']}</td><td>{a['set_persi']}</td>
-            <td>{a['win_rate']}%</td>
+            <td style="text-align:left;font-weight:700">{card_icon} {a.nome}</td>
+            <td style="font-weight:800;color:var(--accent-gold)">{a.overall}</td>
+            <td style="font-weight:800;color:var(--accent-gold)">{a.rank_pts}</td>
+            <td>{a.tornei}</td>
+            <td style="color:#ffd700">{a.oro}</td>
+            <td style="color:#c0c0c0">{a.argento}</td>
+            <td style="color:#cd7f32">{a.bronzo}</td>
+            <td style="color:var(--green)">{a.vittorie}</td>
+            <td style="color:var(--accent1)">{a.sconfitte}</td>
+            <td>{a.set_vinti}</td><td>{a.set_persi}</td>
+            <td>{a.win_rate}%</td>
         </tr>"""
     html += "</table>"
     st.markdown(html, unsafe_allow_html=True)
@@ -385,10 +345,11 @@ def _render_carte_fifa(state, ranking):
                     st.rerun()
                 foto_up = st.file_uploader(f"📷 Foto", type=["png","jpg","jpeg"], key=f"foto_{a['id']}", label_visibility="collapsed")
                 if foto_up:
-                    import base64
-                    a["atleta"]["foto_b64"] = base64.b64encode(foto_up.read()).decode()
-                    save_state(state)
-                    st.rerun()
+                    h = salva_foto(foto_up)
+                    if a["atleta"].get("foto_blob") != h:
+                        a["atleta"]["foto_blob"] = h
+                        save_state(state)
+                        st.rerun()
 
 
 def _render_trofei_page(state, ranking):
@@ -576,24 +537,21 @@ def _render_schede_atleti(state, ranking, atleta_id_preselect=None):
         col1, col2 = st.columns(2)
         with col1:
             st.markdown("#### 📈 Andamento Posizioni")
-            df_pos = pd.DataFrame({"Torneo": [t for t, _ in a["storico"]], "Posizione": [p for _, p in a["storico"]]}).set_index("Torneo")
+            df_pos = pd.DataFrame({"Torneo": [v["torneo"] for v in a["storico"]], "Posizione": [v["pos"] for v in a["storico"]]}).set_index("Torneo")
             max_pos = df_pos["Posizione"].max()
             df_pos["Inv"] = max_pos + 1 - df_pos["Posizione"]
             st.line_chart(df_pos["Inv"], height=200, color="#e8002d")
             st.caption("↑ = Migliore posizione")
         with col2:
             st.markdown("#### 📊 Punti per Torneo")
-            n_sq = len(state["squadre"]) or 8
-            df_pts = pd.DataFrame({"Torneo": [t for t, _ in a["storico"]], "Punti": [calcola_punti_ranking(p, n_sq) for _, p in a["storico"]]}).set_index("Torneo")
+            df_pts = pd.DataFrame({"Torneo": [v["torneo"] for v in a["storico"]], "Punti": [v["punti"] for v in a["storico"]]}).set_index("Torneo")
             st.bar_chart(df_pts, height=200, color="#ffd700")
 
         st.markdown("#### 📋 Storico Tornei")
         medals = {1: "🥇", 2: "🥈", 3: "🥉"}
-        n_sq_curr = len(state["squadre"]) or 8
-        for t_nome, pos in a["storico"]:
-            icon = medals.get(pos, f"#{pos}")
-            pts = calcola_punti_ranking(pos, n_sq_curr)
-            st.markdown(f"• {icon} **{t_nome}** — {pos}° posto → +{pts} pt ranking")
+        for v in a["storico"]:
+            icon = medals.get(v["pos"], f"#{v['pos']}")
+            st.markdown(f"• {icon} **{v['torneo']}** — {v['pos']}° posto → +{v['punti']} pt ranking")
 
 
 def _render_modifica_profilo(state, atleta):
@@ -613,8 +571,7 @@ def _render_modifica_profilo(state, atleta):
             atleta["nome_proprio"] = nuovo_nome
             atleta["cognome"] = nuovo_cognome
         if foto_up:
-            import base64
-            atleta["foto_b64"] = base64.b64encode(foto_up.read()).decode()
+            atleta["foto_blob"] = salva_foto(foto_up)
         save_state(state)
         st.success("✅ Profilo aggiornato!")
         st.rerun()
@@ -624,7 +581,7 @@ def _render_export_ranking_pdf(state, ranking):
     st.markdown("### 📄 Esporta Ranking in PDF")
     if st.button("🖨️ GENERA PDF RANKING", use_container_width=True):
         try:
-            pdf_path = _genera_pdf_ranking(state, ranking)
+            pdf_path = _genera_pdf_ranking(state, ranking_frame(state))
             with open(pdf_path, "rb") as f:
                 st.download_button("⬇️ SCARICA PDF RANKING", f, file_name="ranking_beach_volley.pdf", mime="application/pdf", use_container_width=True)
         except Exception as e:
@@ -632,7 +589,7 @@ def _render_export_ranking_pdf(state, ranking):
             import traceback; st.code(traceback.format_exc())
 
 
-def _genera_pdf_ranking(state, ranking):
+def _genera_pdf_ranking(state, df):
     from reportlab.lib.pagesizes import A4
     from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -649,13 +606,15 @@ def _genera_pdf_ranking(state, ranking):
     h2_s=ParagraphStyle("h2",fontName="Helvetica-Bold",fontSize=14,textColor=DARK,spaceBefore=14,spaceAfter=8)
     story=[]
     story.append(Paragraph("🏐 BEACH VOLLEY RANKING GLOBALE",title_s))
-    story.append(Paragraph(f"{state['torneo']['nome'] or 'Stagione'} · {len(ranking)} atleti classificati",sub_s))
+    story.append(Paragraph(f"{state['torneo']['nome'] or 'Stagione'} · {len(df)} atleti classificati",sub_s))
     story.append(HRFlowable(width="100%",thickness=3,color=RED))
     story.append(Spacer(1,10))
     full_data=[["#","ATLETA","OVR","PTS","T","V","P","SV","SP","WIN%"]]
-    for i,a in enumerate(ranking):
-        full_data.append([str(i+1),a["nome"],str(a["overall"]),str(a["rank_pts"]),str(a["tornei"]),
-                          str(a["vittorie"]),str(a["sconfitte"]),str(a["set_vinti"]),str(a["set_persi"]),f"{a['win_rate']}%"])
+    colonne=["nome","overall","rank_pts","tornei","vittorie","sconfitte","set_vinti","set_persi"]
+    tabella=df[colonne].astype(str)
+    tabella.insert(0,"pos",[str(i) for i in range(1,len(df)+1)])
+    tabella["win_rate"]=df["win_rate"].astype(str)+"%"
+    full_data+=tabella.values.tolist()
     ft=Table(full_data,colWidths=[10*mm,52*mm,14*mm,18*mm,10*mm,10*mm,10*mm,12*mm,12*mm,16*mm])
     ft.setStyle(TableStyle([
         ("BACKGROUND",(0,0),(-1,0),DARK),("TEXTCOLOR",(0,0),(-1,0),WHITE),
@@ -0,0 +1,188 @@
+"""
+registro_scambi.py — Registro degli scambi del segnapunti live, con annulla/ripeti
+
+Ogni evento è uno scambio {"tipo": "punto", "squadra", "battuta", "ts"} o un
+cambio di battuta manuale {"tipo": "battuta", "squadra", "ts"}. Punteggio, set
+e battuta non si salvano: si ricavano dal registro, tenendo lo stato dopo ogni
+evento. Il cursore dice quanti eventi valgono, quindi annullare e ripetere
+spostano solo il cursore (O(1)); un nuovo evento dopo un annulla scarta quelli
+annullati, come in un editor.
+
+Le partite del torneo hanno un checkpoint su disco, un file JSONL per partita
+in LIVE_DIR: ogni comando accoda una riga (con fsync), senza passare da
+save_state. Lo riprende qualunque sessione, anche dopo un riavvio del server;
+si cancella quando la partita viene inviata al tabellone; quelli di partite
+confermate altrove si raccolgono all'avvio di ogni sessione.
+"""
+import json, os, time
+from pathlib import Path
+
+PUNTI_TIE_BREAK = 15
+LIVE_DIR = "beach_volley_live"
+
+
+class RegistroScambi:
+    """Eventi di una partita live e stato derivato (punti, set, battuta) dopo ciascuno."""
+
+    def __init__(self, pmax=21, formato="Set Unico", eventi=(), cursore=None, diario=None):
+        self.pmax, self.formato = pmax, formato
+        self.diario = diario   # callable(op) che riceve ogni comando, es. per il checkpoint
+        self.eventi = []
+        self._stati = [{"p1": 0, "p2": 0, "s1": 0, "s2": 0, "sets": (), "battuta": 1, "inizio_set": 0}]
+        for evento in eventi:
+            self.eventi.append(evento)
+            self._stati.append(self._dopo(self._stati[-1], evento))
+        self.cursore = len(self.eventi) if cursore is None else min(cursore, len(self.eventi))
+
+    @classmethod
+    def da_dati(cls, dati, pmax=21, formato="Set Unico"):
+        """Registro da {"eventi": [...], "cursore": n} (None: registro vuoto)."""
+        dati = dati or {}
+        return cls(pmax, formato, dati.get("eventi", ()), dati.get("cursore"))
+
+    def dati(self):
+        return {"eventi": list(self.eventi), "cursore": self.cursore}
+
+    # ─── STATO ───────────────────────────────────────────────────────────────
+
+    @property
+    def stato(self):
+        return self._stati[self.cursore]
+
+    def limite(self, stato):
+        tie_break = self.formato == "Best of 3" and stato["s1"] + stato["s2"] == 2
+        return PUNTI_TIE_BREAK if tie_break else self.pmax
+
+    def conclusa(self):
+        s = self.stato
+        return max(s["s1"], s["s2"]) >= (2 if self.formato == "Best of 3" else 1)
+
+    def punteggi(self):
+        """Set chiusi più quello in corso, se iniziato: il formato di conferma_risultato."""
+        s = self.stato
+        return list(s["sets"]) + ([(s["p1"], s["p2"])] if s["p1"] or s["p2"] else [])
+
+    def _dopo(self, stato, evento):
+        s = dict(stato)
+        k = evento["squadra"]
+        s["battuta"] = k   # chi vince lo scambio va in battuta
+        if evento["tipo"] != "punto":
+            return s
+        s[f"p{k}"] += 1
+        if s[f"p{k}"] >= self.limite(stato) and s[f"p{k}"] - s[f"p{3 - k}"] >= 2:
+            s["sets"] += ((s["p1"], s["p2"]),)
+            s[f"s{k}"] += 1
+            s["p1"] = s["p2"] = 0
+            s["inizio_set"] = len(self.eventi)
+        return s
+
+    # ─── COMANDI ─────────────────────────────────────────────────────────────
+
+    def _annota(self, op):
+        if self.diario:
+            self.diario(op)
+
+    def _registra(self, evento):
+        self._annota({"op": "evento", "pos": self.cursore, "e": evento})
+        del self.eventi[self.cursore:]
+        del self._stati[self.cursore + 1:]
+        self.eventi.append(evento)
+        self._stati.append(self._dopo(self._stati[-1], evento))
+        self.cursore += 1
+
+    def _sposta(self, cursore):
+        self.cursore = cursore
+        self._annota({"op": "cursore", "c": cursore})
+
+    def segna(self, squadra):
+        """Scambio vinto da `squadra` (1 o 2); a partita conclusa non fa nulla."""
+        if self.conclusa():
+            return
+        self._registra({"tipo": "punto", "squadra": squadra, "battuta": self.stato["battuta"],
+                        "ts": round(time.time(), 3)})
+
+    def cambia_battuta(self, squadra):
+        if self.stato["battuta"] != squadra:
+            self._registra({"tipo": "battuta", "squadra": squadra, "ts": round(time.time(), 3)})
+
+    def annulla(self):
+        if self.cursore == 0:
+            return False
+        self._sposta(self.cursore - 1)
+        return True
+
+    def ripeti(self):
+        if self.cursore == len(self.eventi):
+            return False
+        self._sposta(self.cursore + 1)
+        return True
+
+    def azzera(self):
+        """Torna a inizio partita (si può ripetere finché non si segna un nuovo scambio)."""
+        self._sposta(0)
+
+    def azzera_set(self):
+        """Torna all'inizio del set in corso (si può ripetere per recuperarlo)."""
+        self._sposta(self.stato["inizio_set"])
+
+    def riapplica(self, op):
+        """Riesegue un comando annotato (senza annotarlo di nuovo)."""
+        if op["op"] == "evento":
+            self.cursore = min(op["pos"], len(self.eventi))
+            self._registra(op["e"])
+        else:
+            self.cursore = min(op["c"], len(self.eventi))
+
+
+# ─── CHECKPOINT ──────────────────────────────────────────────────────────────
+# Una riga per comando: {"op": "evento", "pos": cursore, "e": evento} oppure
+# {"op": "cursore", "c": n}. La riapplicazione in ordine ricostruisce eventi
+# e cursore; un'ultima riga troncata da un crash viene ignorata.
+
+def _file_checkpoint(partita_id):
+    return Path(LIVE_DIR) / f"{partita_id}.jsonl"
+
+
+def apri_checkpoint(partita_id, pmax=21, formato="Set Unico"):
+    """Registro della partita ripreso dal checkpoint, che da qui in poi accoda ogni comando."""
+    percorso = _file_checkpoint(partita_id)
+    registro = RegistroScambi(pmax, formato)
+    if percorso.exists():
+        with open(percorso, "rb+") as f:
+            valido = 0
+            for riga in f:
+                try:
+                    op = json.loads(riga)
+                except json.JSONDecodeError:
+                    f.truncate(valido)   # le righe successive si accodano dopo l'ultima integra
+                    break
+                registro.riapplica(op)
+                valido += len(riga)
+
+    def accoda(op):
+        percorso.parent.mkdir(exist_ok=True)
+        with open(percorso, "a", encoding="utf-8") as f:
+            f.write(json.dumps(op, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    registro.diario = accoda
+    return registro
+
+
+def chiudi_checkpoint(partita_id):
+    _file_checkpoint(partita_id).unlink(missing_ok=True)
+
+
+def pulisci_checkpoint(state):
+    """Rimuove i checkpoint di partite già confermate (anche a mano o simulate) o non più nel torneo."""
+    cartella = Path(LIVE_DIR)
+    if not cartella.is_dir():
+        return 0
+    aperte = {p["id"] for g in state.get("gironi", []) for p in g["partite"] if not p["confermata"]}
+    aperte |= {p["id"] for p in state.get("bracket", []) if not p["confermata"]}
+    rimossi = 0
+    for f in cartella.glob("*.jsonl"):
+        if f.stem not in aperte:
+            f.unlink(missing_ok=True)
+            rimossi += 1
+    return rimossi
@@ -3,9 +3,12 @@ segnapunti_live.py — Segnapunti LIVE gigante con 8 stili e modalità libera
 """
 import streamlit as st
 from data_manager import (
-    save_state, get_squadra_by_id, aggiorna_classifica_squadra
+    save_state, get_squadra_by_id, nomi_atleti_squadra
 )
 from theme_manager import get_active_scoreboard
+from motore_torneo import TournamentEngine
+from registro_scambi import RegistroScambi, apri_checkpoint, chiudi_checkpoint
+from spettatori import pubblica, evento_partita
 
 
 def render_segnapunti_live(state, theme_cfg=None):
@@ -66,15 +69,9 @@ def _render_segnapunti_libero(state, sb_style):
     """Segnapunti completamente libero senza partita registrata."""
     key_base = "libero_match"
 
-    if f"{key_base}_s1" not in st.session_state:
+    if f"{key_base}_nome1" not in st.session_state:
         st.session_state[f"{key_base}_nome1"] = "SQUADRA A"
         st.session_state[f"{key_base}_nome2"] = "SQUADRA B"
-        st.session_state[f"{key_base}_s1"] = 0
-        st.session_state[f"{key_base}_s2"] = 0
-        st.session_state[f"{key_base}_p1"] = 0
-        st.session_state[f"{key_base}_p2"] = 0
-        st.session_state[f"{key_base}_battuta"] = 1
-        st.session_state[f"{key_base}_punteggi_sets"] = []
 
     col_n1, col_n2 = st.columns(2)
     with col_n1:
@@ -98,30 +95,36 @@ def _render_segnapunti_libero(state, sb_style):
 
     sq1_mock = {"nome": nome1, "atleti": []}
     sq2_mock = {"nome": nome2, "atleti": []}
-    _render_scoreboard_core(state, key_base, sq1_mock, sq2_mock, sb_style, pmax, formato, torneo=False)
+    # Partita libera: il registro vive solo nella sessione
+    registro = RegistroScambi.da_dati(st.session_state.get(f"{key_base}_registro"), pmax, formato)
+    def salva(registro):
+        st.session_state[f"{key_base}_registro"] = registro.dati()
+        pubblica(evento_partita(key_base, nome1, nome2, registro))
+    _render_scoreboard_core(state, key_base, sq1_mock, sq2_mock, sb_style, registro, salva, torneo=False)
 
 
 def _render_scoreboard_partita(state, partita, sq1, sq2, sb_style, torneo=True):
     key_base = f"live_{partita['id']}"
-    if f"{key_base}_s1" not in st.session_state:
-        st.session_state[f"{key_base}_s1"] = 0
-        st.session_state[f"{key_base}_s2"] = 0
-        st.session_state[f"{key_base}_p1"] = 0
-        st.session_state[f"{key_base}_p2"] = 0
-        st.session_state[f"{key_base}_battuta"] = 1
-        st.session_state[f"{key_base}_punteggi_sets"] = []
-
     pmax = state["torneo"]["punteggio_max"]
     formato = state["torneo"]["formato_set"]
-    _render_scoreboard_core(state, key_base, sq1, sq2, sb_style, pmax, formato, torneo=torneo, partita=partita)
+    # Checkpoint su disco a ogni comando: sopravvive a refresh, altre sessioni e riavvii
+    registro = apri_checkpoint(partita["id"], pmax, formato)
+    def salva(registro):
+        pubblica(evento_partita(partita["id"], sq1["nome"], sq2["nome"], registro, campo=partita.get("campo")))
+    _render_scoreboard_core(state, key_base, sq1, sq2, sb_style, registro, salva, torneo=torneo, partita=partita)
+
 
+def _render_scoreboard_core(state, key_base, sq1, sq2, sb_style, registro, salva, torneo=False, partita=None):
+    stato = registro.stato
+    s1, s2, p1, p2 = stato["s1"], stato["s2"], stato["p1"], stato["p2"]
+    battuta = stato["battuta"]
+    pmax = registro.limite(stato)
 
-def _render_scoreboard_core(state, key_base, sq1, sq2, sb_style, pmax, formato, torneo=False, partita=None):
-    s1 = st.session_state[f"{key_base}_s1"]
-    s2 = st.session_state[f"{key_base}_s2"]
-    p1 = st.session_state[f"{key_base}_p1"]
-    p2 = st.session_state[f"{key_base}_p2"]
-    battuta = st.session_state[f"{key_base}_battuta"]
+    def esegui(azione, *args):
+        """Applica un comando al registro, lo salva e ridisegna."""
+        azione(*args)
+        salva(registro)
+        st.rerun()
 
     nome1 = sq1.get("nome", "?") if isinstance(sq1, dict) else sq1["nome"]
     nome2 = sq2.get("nome", "?") if isinstance(sq2, dict) else sq2["nome"]
@@ -143,12 +146,10 @@ def _render_scoreboard_core(state, key_base, sq1, sq2, sb_style, pmax, formato,
     players1_html = ""
     players2_html = ""
     if isinstance(sq1, dict) and sq1.get("atleti"):
-        from data_manager import get_atleta_by_id as _gab
-        names1 = [_gab(state, aid)["nome"] for aid in sq1["atleti"] if _gab(state, aid)]
+        names1 = nomi_atleti_squadra(state, sq1)
         players1_html = f"<div style='font-size:0.75rem;color:{text1}88;margin-top:4px'>{' · '.join(names1)}</div>"
     if isinstance(sq2, dict) and sq2.get("atleti"):
-        from data_manager import get_atleta_by_id as _gab
-        names2 = [_gab(state, aid)["nome"] for aid in sq2["atleti"] if _gab(state, aid)]
+        names2 = nomi_atleti_squadra(state, sq2)
         players2_html = f"<div style='font-size:0.75rem;color:{text2}88;margin-top:4px'>{' · '.join(names2)}</div>"
 
     st.markdown(f"""
@@ -198,43 +199,39 @@ def _render_scoreboard_core(state, key_base, sq1, sq2, sb_style, pmax, formato,
     col1, col_mid, col2 = st.columns([5, 1, 5])
     with col1:
         st.markdown(f"<div style='text-align:center;color:var(--accent1);font-family:var(--font-display);font-weight:700;font-size:1.1rem;margin-bottom:8px'>{nome1}</div>", unsafe_allow_html=True)
-        c1a, c1b, c1c = st.columns([2, 2, 1])
+        c1a, c1c = st.columns([4, 1])
         with c1a:
-            if st.button("➕ PUNTO", key=f"{key_base}_add1", use_container_width=True):
-                st.session_state[f"{key_base}_p1"] += 1
-                st.session_state[f"{key_base}_battuta"] = 1
-                _check_set_win(state, key_base, pmax, formato)
-                st.rerun()
-        with c1b:
-            if st.button("➖ Annulla", key=f"{key_base}_sub1", use_container_width=True):
-                st.session_state[f"{key_base}_p1"] = max(0, st.session_state[f"{key_base}_p1"] - 1)
-                st.rerun()
+            if st.button("➕ PUNTO", key=f"{key_base}_add1", use_container_width=True, disabled=registro.conclusa()):
+                esegui(registro.segna, 1)
         with c1c:
             if st.button("🏐", key=f"{key_base}_batt1", use_container_width=True, help="Assegna battuta"):
-                st.session_state[f"{key_base}_battuta"] = 1; st.rerun()
+                esegui(registro.cambia_battuta, 1)
 
     with col_mid:
         st.markdown("<div style='text-align:center;padding-top:40px;color:var(--text-secondary)'>|</div>", unsafe_allow_html=True)
 
     with col2:
         st.markdown(f"<div style='text-align:center;color:var(--accent2);font-family:var(--font-display);font-weight:700;font-size:1.1rem;margin-bottom:8px'>{nome2}</div>", unsafe_allow_html=True)
-        c2a, c2b, c2c = st.columns([2, 2, 1])
+        c2a, c2c = st.columns([4, 1])
         with c2a:
-            if st.button("➕ PUNTO", key=f"{key_base}_add2", use_container_width=True):
-                st.session_state[f"{key_base}_p2"] += 1
-                st.session_state[f"{key_base}_battuta"] = 2
-                _check_set_win(state, key_base, pmax, formato)
-                st.rerun()
-        with c2b:
-            if st.button("➖ Annulla", key=f"{key_base}_sub2", use_container_width=True):
-                st.session_state[f"{key_base}_p2"] = max(0, st.session_state[f"{key_base}_p2"] - 1)
-                st.rerun()
+            if st.button("➕ PUNTO", key=f"{key_base}_add2", use_container_width=True, disabled=registro.conclusa()):
+                esegui(registro.segna, 2)
         with c2c:
             if st.button("🏐", key=f"{key_base}_batt2", use_container_width=True, help="Assegna battuta"):
-                st.session_state[f"{key_base}_battuta"] = 2; st.rerun()
+                esegui(registro.cambia_battuta, 2)
+
+    col_u, col_r = st.columns(2)
+    with col_u:
+        if st.button("↩️ Annulla", key=f"{key_base}_annulla", use_container_width=True,
+                     disabled=registro.cursore == 0, help="Annulla l'ultimo scambio (anche se ha chiuso un set)"):
+            esegui(registro.annulla)
+    with col_r:
+        if st.button("↪️ Ripeti", key=f"{key_base}_ripeti", use_container_width=True,
+                     disabled=registro.cursore == len(registro.eventi)):
+            esegui(registro.ripeti)
 
     # ── SET HISTORY ─────────────────────────────────────────────────────────
-    sets_history = st.session_state.get(f"{key_base}_punteggi_sets", [])
+    sets_history = list(stato["sets"])
     if sets_history:
         st.markdown("**Set Giocati:**")
         html_sets = ""
@@ -249,19 +246,14 @@ def _render_scoreboard_core(state, key_base, sq1, sq2, sb_style, pmax, formato,
     col_a, col_b, col_c = st.columns([2, 2, 2])
     with col_a:
         if st.button("🔄 Reset Set Corrente", use_container_width=True):
-            st.session_state[f"{key_base}_p1"] = 0
-            st.session_state[f"{key_base}_p2"] = 0; st.rerun()
+            esegui(registro.azzera_set)
     with col_b:
         if st.button("🔄 Reset TUTTO", use_container_width=True):
-            for k in [f"{key_base}_s1",f"{key_base}_s2",f"{key_base}_p1",f"{key_base}_p2",f"{key_base}_battuta",f"{key_base}_punteggi_sets"]:
-                if k in st.session_state: del st.session_state[k]
-            st.rerun()
+            esegui(registro.azzera)
     with col_c:
-        s1 = st.session_state.get(f"{key_base}_s1", 0)
-        s2 = st.session_state.get(f"{key_base}_s2", 0)
-        if torneo and partita and sets_history and (s1 > s2 or s2 > s1):
+        if torneo and partita and sets_history and s1 != s2:
             if st.button("📤 INVIA AL TABELLONE ✅", use_container_width=True):
-                _invia_al_tabellone(state, partita, key_base)
+                _invia_al_tabellone(state, partita, registro)
                 save_state(state)
                 st.success("✅ Dati inviati al tabellone!")
                 st.rerun()
@@ -271,43 +263,12 @@ def _render_scoreboard_core(state, key_base, sq1, sq2, sb_style, pmax, formato,
                 st.success(f"🏆 Vince: **{winner}** ({s1}–{s2} set)")
 
 
-def _check_set_win(state, key_base, pmax, formato):
-    p1 = st.session_state[f"{key_base}_p1"]
-    p2 = st.session_state[f"{key_base}_p2"]
-    s1 = st.session_state[f"{key_base}_s1"]
-    s2 = st.session_state[f"{key_base}_s2"]
-    set_corrente = s1 + s2
-    is_tiebreak = (formato == "Best of 3" and set_corrente == 2)
-    limit = 15 if is_tiebreak else pmax
-    if p1 >= limit and p1 - p2 >= 2:
-        st.session_state[f"{key_base}_punteggi_sets"].append((p1, p2))
-        st.session_state[f"{key_base}_s1"] += 1
-        st.session_state[f"{key_base}_p1"] = 0
-        st.session_state[f"{key_base}_p2"] = 0
-    elif p2 >= limit and p2 - p1 >= 2:
-        st.session_state[f"{key_base}_punteggi_sets"].append((p1, p2))
-        st.session_state[f"{key_base}_s2"] += 1
-        st.session_state[f"{key_base}_p1"] = 0
-        st.session_state[f"{key_base}_p2"] = 0
-
-
-def _invia_al_tabellone(state, partita, key_base):
-    sets = st.session_state.get(f"{key_base}_punteggi_sets", [])
-    p1_curr = st.session_state.get(f"{key_base}_p1", 0)
-    p2_curr = st.session_state.get(f"{key_base}_p2", 0)
-    if p1_curr > 0 or p2_curr > 0:
-        sets = sets + [(p1_curr, p2_curr)]
+def _invia_al_tabellone(state, partita, registro):
+    sets = registro.punteggi()
     if not sets: return
-    s1v = sum(1 for a, b in sets if a > b)
-    s2v = sum(1 for a, b in sets if b > a)
-    partita["punteggi"] = sets
-    partita["set_sq1"] = s1v; partita["set_sq2"] = s2v
-    partita["vincitore"] = partita["sq1"] if s1v >= s2v else partita["sq2"]
-    partita["in_battuta"] = st.session_state.get(f"{key_base}_battuta", 1)
-    partita["confermata"] = True
-    aggiorna_classifica_squadra(state, partita)
-    for k in [f"{key_base}_s1",f"{key_base}_s2",f"{key_base}_p1",f"{key_base}_p2",f"{key_base}_battuta",f"{key_base}_punteggi_sets"]:
-        if k in st.session_state: del st.session_state[k]
+    TournamentEngine(state).conferma_risultato(partita, sets, in_battuta=registro.stato["battuta"])
+    chiudi_checkpoint(partita["id"])
+    pubblica({"id": partita["id"], "chiusa": True})
 
 
 def _get_partite_disponibili(state):
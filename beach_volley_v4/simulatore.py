@@ -0,0 +1,85 @@
+"""
+simulatore.py — Simulazione vettoriale (NumPy) di set e partite in blocco
+"""
+import numpy as np
+
+from data_manager import probabilita_scambio
+
+TIE_BREAK = 15
+CAP_VANTAGGI = 6   # come simula_set: oltre limite+6 il set si chiude anche senza +2
+
+
+def simula_set_batch(p, limite, rng=None):
+    """
+    Simula len(p) set in un colpo solo. p[i] è la probabilità che la squadra 1
+    vinca un singolo scambio del set i. Restituisce due array (punti sq1, punti sq2).
+
+    Stessa regola di arresto di data_manager.simula_set, scambio per scambio:
+    fine a `limite` con +2, chiusura forzata oltre limite+6 (riportata con il
+    punteggio più alto alla squadra 1, come l'originale).
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    p = np.asarray(p, dtype=float).reshape(-1)
+    n = len(p)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    # Il set più lungo possibile: (limite+7)-(limite+6)
+    max_scambi = 2 * limite + 2 * CAP_VANTAGGI + 1
+    vinti = rng.random((n, max_scambi)) < p[:, None]
+    # Punteggi progressivi dopo ogni scambio (int16: bastano e dimezzano la memoria)
+    a = np.cumsum(vinti, axis=1, dtype=np.int16)
+    b = np.arange(1, max_scambi + 1, dtype=np.int16) - a
+    alto = np.maximum(a, b)
+    finito = (alto >= limite) & ((np.abs(a - b) >= 2) | (alto > limite + CAP_VANTAGGI))
+    fine = finito.argmax(axis=1)
+    righe = np.arange(n)
+    pa, pb = a[righe, fine].astype(np.int64), b[righe, fine].astype(np.int64)
+    cap = np.abs(pa - pb) < 2
+    pa, pb = np.where(cap, np.maximum(pa, pb), pa), np.where(cap, np.minimum(pa, pb), pb)
+    return pa, pb
+
+
+def simula_partite_batch(p, pmax, formato, rng=None):
+    """
+    Simula len(p) partite. Restituisce (punteggi, set_sq1, set_sq2) con
+    punteggi di forma (n, set giocabili, 2) e -1 nei set non disputati.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    p = np.asarray(p, dtype=float).reshape(-1)
+    n = len(p)
+    if formato == "Set Unico":
+        a, b = simula_set_batch(p, pmax, rng)
+        punteggi = np.stack([a, b], axis=1)[:, None, :]
+        return punteggi, (a > b).astype(np.int64), (b > a).astype(np.int64)
+    # Best of 3: i primi due set sempre, il terzo (a 15) solo sull'1-1
+    punteggi = np.full((n, 3, 2), -1, dtype=np.int64)
+    for s in range(2):
+        punteggi[:, s, 0], punteggi[:, s, 1] = simula_set_batch(p, pmax, rng)
+    vinti1 = (punteggi[:, :2, 0] > punteggi[:, :2, 1]).sum(axis=1)
+    terzo = np.flatnonzero(vinti1 == 1)
+    if len(terzo):
+        punteggi[terzo, 2, 0], punteggi[terzo, 2, 1] = simula_set_batch(p[terzo], TIE_BREAK, rng)
+    giocati = punteggi[:, :, 0] >= 0
+    set1 = ((punteggi[:, :, 0] > punteggi[:, :, 1]) & giocati).sum(axis=1)
+    set2 = ((punteggi[:, :, 1] > punteggi[:, :, 0]) & giocati).sum(axis=1)
+    return punteggi, set1, set2
+
+
+def simula_partite(state, partite, p=None, rng=None):
+    """
+    Versione in blocco di data_manager.simula_partita: compila e conferma tutte
+    le `partite` (dict) con un solo passaggio vettoriale. Senza `p` usa il
+    modello di gioco del torneo (probabilita_scambio).
+    """
+    if not partite:
+        return partite
+    if p is None:
+        p = [probabilita_scambio(state, x["sq1"], x["sq2"]) for x in partite]
+    punteggi, set1, set2 = simula_partite_batch(
+        p, state["torneo"]["punteggio_max"], state["torneo"]["formato_set"], rng)
+    for partita, righe, s1, s2 in zip(partite, punteggi.tolist(), set1.tolist(), set2.tolist()):
+        partita["punteggi"] = [(x, y) for x, y in righe if x >= 0]
+        partita["set_sq1"] = s1; partita["set_sq2"] = s2
+        partita["vincitore"] = partita["sq1"] if s1 > s2 else partita["sq2"]
+        partita["confermata"] = True
+    return partite
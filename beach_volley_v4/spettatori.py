@@ -0,0 +1,365 @@
+"""
+spettatori.py — Tabellone per il pubblico: server SSE asyncio alimentato dal segnapunti live
+
+    python spettatori.py                         # pagina su http://0.0.0.0:8080, eventi UDP su 127.0.0.1:8765
+    python spettatori.py --spettatore            # client di prova: stampa gli eventi ricevuti
+    python spettatori.py --spettatore --carico 300   # 300 spettatori, conta gli eventi di ciascuno
+    python spettatori.py --prova                 # partita finta, per provare senza Streamlit
+
+Il segnapunti live, dopo ogni comando, invia un datagramma UDP con lo stato
+della partita (pubblica): una sendto, senza attese, e nessun errore se il
+server è spento. Il server tiene l'ultimo stato di ogni partita e lo inoltra
+agli spettatori come evento SSE. Ogni evento viene serializzato una volta e
+scritto nel buffer di ciascuno senza aspettarlo; chi non smaltisce il buffer
+viene disconnesso (EventSource si riconnette e riceve lo stato corrente).
+"""
+import argparse, asyncio, json, os, random, socket, sys, time
+from urllib.parse import urlsplit, parse_qs
+
+SPETTATORI = os.environ.get("BVL_SPETTATORI", "127.0.0.1:8765")   # "" disattiva la pubblicazione
+PORTA_HTTP = 8080
+LIMITE_BUFFER = 64 * 1024   # byte in attesa oltre i quali uno spettatore lento viene scollegato
+BATTITO_S = 15              # commento SSE periodico, tiene vive le connessioni dietro i proxy
+
+
+def _indirizzo(testo):
+    host, porta = testo.rsplit(":", 1)
+    return host, int(porta)
+
+
+# ─── PUBBLICAZIONE (lato segnapunti) ─────────────────────────────────────────
+
+_socket = None
+
+def pubblica(evento):
+    """Invia l'evento al server spettatori (se configurato); non blocca e non solleva."""
+    global _socket
+    if not SPETTATORI:
+        return
+    try:
+        if _socket is None:
+            _socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            _socket.setblocking(False)
+        _socket.sendto(json.dumps(evento, ensure_ascii=False).encode("utf-8"), _indirizzo(SPETTATORI))
+    except OSError:
+        pass
+
+
+def evento_partita(partita_id, nome1, nome2, registro, **extra):
+    """Stato pubblico di una partita live, dal registro scambi."""
+    s = registro.stato
+    return {
+        "id": partita_id, "sq1": nome1, "sq2": nome2,
+        "p1": s["p1"], "p2": s["p2"], "s1": s["s1"], "s2": s["s2"],
+        "sets": [list(x) for x in s["sets"]], "battuta": s["battuta"],
+        "max": registro.limite(s), "conclusa": registro.conclusa(),
+        "ts": round(time.time(), 3), **extra,
+    }
+
+
+# ─── DIFFUSIONE ──────────────────────────────────────────────────────────────
+
+class Diffusore:
+    """Ultimo stato di ogni partita e spettatori iscritti (tutte le partite o una)."""
+
+    def __init__(self, limite_buffer=LIMITE_BUFFER):
+        self.limite_buffer = limite_buffer
+        self.ultimi = {}                 # id partita → frame SSE dell'ultimo stato
+        self.canali = {None: set()}      # id partita (None = tutte) → writer iscritti
+        self.seq = 0
+        self.eventi = 0
+        self.scollegati = 0
+
+    def pubblica(self, evento):
+        pid = evento.get("id")
+        if pid is None:
+            return
+        self.seq += 1
+        self.eventi += 1
+        dati = json.dumps(evento, ensure_ascii=False, separators=(",", ":"))
+        frame = f"id: {self.seq}\nevent: punteggio\ndata: {dati}\n\n".encode("utf-8")
+        if evento.get("chiusa"):
+            self.ultimi.pop(pid, None)
+        else:
+            self.ultimi[pid] = frame
+        self._scrivi(self.canali[None], frame)
+        self._scrivi(self.canali.get(pid, ()), frame)
+
+    def _scrivi(self, writers, frame):
+        for w in list(writers):
+            if w.transport.get_write_buffer_size() > self.limite_buffer:
+                self.rimuovi(w)
+                w.transport.abort()   # close() aspetterebbe di svuotare un buffer che nessuno legge
+                self.scollegati += 1
+            else:
+                w.write(frame)
+
+    def aggiungi(self, writer, partita=None):
+        self.canali.setdefault(partita, set()).add(writer)
+        for pid, frame in self.ultimi.items():
+            if partita in (None, pid):
+                writer.write(frame)
+
+    def rimuovi(self, writer):
+        for pid, writers in list(self.canali.items()):
+            writers.discard(writer)
+            if pid is not None and not writers:
+                del self.canali[pid]
+
+    def spettatori(self):
+        return sum(len(w) for w in self.canali.values())
+
+    def battito(self):
+        for writers in list(self.canali.values()):
+            self._scrivi(writers, b": battito\n\n")
+
+
+class _RicevitoreUDP(asyncio.DatagramProtocol):
+    def __init__(self, diffusore):
+        self.diffusore = diffusore
+
+    def datagram_received(self, dati, indirizzo):
+        try:
+            evento = json.loads(dati)
+        except ValueError:
+            return
+        if isinstance(evento, dict):
+            self.diffusore.pubblica(evento)
+
+
+# ─── HTTP ────────────────────────────────────────────────────────────────────
+
+def _risposta(stato, tipo, corpo=b""):
+    testa = (f"HTTP/1.1 {stato}\r\nContent-Type: {tipo}\r\nContent-Length: {len(corpo)}\r\n"
+             "Connection: close\r\n\r\n")
+    return testa.encode("ascii") + corpo
+
+
+_TESTA_SSE = (b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n"
+              b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n"
+              b"Access-Control-Allow-Origin: *\r\n\r\nretry: 2000\n\n")
+
+
+async def _gestisci(diffusore, pagina, reader, writer):
+    try:
+        richiesta = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        writer.close()
+        return
+    try:
+        metodo, url, _ = richiesta.split(b"\r\n", 1)[0].decode("latin-1").split(" ", 2)
+    except ValueError:
+        metodo, url = "", "/"
+    parti = urlsplit(url)
+    partita = parse_qs(parti.query).get("partita", [None])[0]
+    if metodo != "GET":
+        writer.write(_risposta("405 Method Not Allowed", "text/plain"))
+    elif parti.path == "/":
+        writer.write(_risposta("200 OK", "text/html; charset=utf-8", pagina))
+    elif parti.path == "/eventi":
+        writer.write(_TESTA_SSE)
+        diffusore.aggiungi(writer, partita)
+        try:
+            while await reader.read(1024):   # lo spettatore non manda altro: si aspetta la chiusura
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            diffusore.rimuovi(writer)
+    elif parti.path == "/stato":
+        corpo = json.dumps({"spettatori": diffusore.spettatori(), "partite": sorted(diffusore.ultimi),
+                            "eventi": diffusore.eventi, "scollegati": diffusore.scollegati}).encode()
+        writer.write(_risposta("200 OK", "application/json", corpo))
+    else:
+        writer.write(_risposta("404 Not Found", "text/plain"))
+    try:
+        await writer.drain()
+    except ConnectionError:
+        pass
+    writer.close()
+
+
+async def servi(host="0.0.0.0", porta=PORTA_HTTP, udp=SPETTATORI or "127.0.0.1:8765", pagina=None):
+    """Avvia ricevitore UDP e server HTTP; restituisce (diffusore, server, chiudi)."""
+    diffusore = Diffusore()
+    pagina = pagina if pagina is not None else pagina_html()
+    loop = asyncio.get_running_loop()
+    trasporto, _ = await loop.create_datagram_endpoint(lambda: _RicevitoreUDP(diffusore),
+                                                       local_addr=_indirizzo(udp))
+    connessioni = set()
+
+    async def gestisci(reader, writer):
+        connessioni.add(asyncio.current_task())
+        try:
+            await _gestisci(diffusore, pagina, reader, writer)
+        finally:
+            connessioni.discard(asyncio.current_task())
+    server = await asyncio.start_server(gestisci, host, porta, backlog=1024)
+
+    async def battiti():
+        while True:
+            await asyncio.sleep(BATTITO_S)
+            diffusore.battito()
+    compito = asyncio.create_task(battiti())
+
+    async def chiudi():
+        compito.cancel()
+        trasporto.close()
+        server.close()
+        for writers in list(diffusore.canali.values()):
+            for w in list(writers):
+                w.transport.abort()   # il gestore dello spettatore vede la chiusura e termina
+        await asyncio.gather(*connessioni, return_exceptions=True)
+        await server.wait_closed()
+    return diffusore, server, chiudi
+
+
+# ─── PAGINA ──────────────────────────────────────────────────────────────────
+
+def pagina_html(sb=None):
+    """Pagina spettatori con lo stile del tabellone attivo (tema salvato)."""
+    if sb is None:
+        from theme_manager import load_theme_config, get_active_scoreboard
+        sb = get_active_scoreboard(load_theme_config())
+    return f"""<!doctype html>
+<html lang="it"><head><meta charset="utf-8">
+<meta name="viewport" content="width=device-width,initial-scale=1">
+<title>Beach Volley LIVE</title>
+<style>
+body{{margin:0;background:#000;color:{sb['text1']};font-family:system-ui,sans-serif}}
+#partite{{display:grid;grid-template-columns:repeat(auto-fit,minmax(520px,1fr));gap:16px;padding:16px}}
+.tab{{background:{sb['bg']};border:{sb['border_style']};{sb['extra']}padding:24px}}
+.testa{{text-align:center;margin-bottom:12px;font-size:.75rem;letter-spacing:3px;text-transform:uppercase;opacity:.6}}
+.griglia{{display:grid;grid-template-columns:1fr auto 1fr;gap:16px;align-items:center;text-align:center}}
+.nome{{font-size:{sb['team_size']};font-weight:700;text-transform:uppercase;letter-spacing:2px}}
+.n1{{color:{sb['text1']}}} .n2{{color:{sb['text2']}}}
+.punti{{font-size:{sb['score_size']};font-weight:900;line-height:1;color:{sb['score_color']};
+  background:{sb['score_bg']};border-radius:12px;padding:10px;margin-top:12px}}
+.mezzo{{font-size:.7rem;letter-spacing:2px;opacity:.5}}
+.set{{text-align:center;margin-top:12px;font-size:.85rem;opacity:.8}}
+.vuoto{{text-align:center;padding:40px;opacity:.5;letter-spacing:3px}}
+</style></head><body>
+<div id="partite"><div class="vuoto" id="vuoto">IN ATTESA DI PARTITE LIVE…</div></div>
+<template id="modello"><div class="tab">
+  <div class="testa"></div>
+  <div class="griglia">
+    <div><div class="nome n1"></div><div class="punti p1"></div></div>
+    <div class="mezzo">VS<br><br><span class="max"></span></div>
+    <div><div class="nome n2"></div><div class="punti p2"></div></div>
+  </div>
+  <div class="set"></div>
+</div></template>
+<script>
+const schede = {{}};
+function aggiorna(s) {{
+  let el = schede[s.id];
+  if (s.chiusa) {{ if (el) {{ el.remove(); delete schede[s.id]; }} }}
+  else {{
+    if (!el) {{
+      el = document.getElementById("modello").content.firstElementChild.cloneNode(true);
+      document.getElementById("partite").appendChild(el);
+      schede[s.id] = el;
+    }}
+    const q = c => el.querySelector(c);
+    q(".testa").textContent = (s.campo ? "CAMPO " + s.campo + " · " : "") + "SET " + s.s1 + " – " + s.s2;
+    q(".n1").textContent = (s.battuta === 1 ? "🏐 " : "") + s.sq1;
+    q(".n2").textContent = (s.battuta === 2 ? "🏐 " : "") + s.sq2;
+    q(".p1").textContent = s.p1;
+    q(".p2").textContent = s.p2;
+    q(".max").textContent = s.conclusa ? "FINALE" : "MAX " + s.max;
+    q(".set").textContent = s.sets.map((x, i) => "Set " + (i + 1) + ": " + x[0] + "–" + x[1]).join("   ");
+  }}
+  document.getElementById("vuoto").style.display = Object.keys(schede).length ? "none" : "";
+}}
+new EventSource("/eventi" + location.search).addEventListener("punteggio", e => aggiorna(JSON.parse(e.data)));
+</script></body></html>""".encode("utf-8")
+
+
+# ─── CLIENT DI PROVA ─────────────────────────────────────────────────────────
+
+async def spettatore(host="127.0.0.1", porta=PORTA_HTTP, partita=None):
+    """Si iscrive a /eventi come un browser e restituisce gli eventi man mano (generatore asincrono)."""
+    reader, writer = await asyncio.open_connection(host, porta)
+    query = f"?partita={partita}" if partita else ""
+    writer.write(f"GET /eventi{query} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode())
+    await writer.drain()
+    try:
+        await reader.readuntil(b"\r\n\r\n")
+        dati = []
+        while riga := await reader.readline():
+            riga = riga.decode("utf-8").rstrip("\n")
+            if riga.startswith("data: "):
+                dati.append(riga[6:])
+            elif not riga and dati:
+                yield json.loads("\n".join(dati))
+                dati = []
+    finally:
+        writer.close()
+
+
+async def _carico(host, porta, n, durata):
+    """`n` spettatori in parallelo per `durata` secondi: eventi ricevuti da ciascuno."""
+    conteggi = [0] * n
+
+    async def uno(i):
+        async for _ in spettatore(host, porta):
+            conteggi[i] += 1
+    compiti = [asyncio.create_task(uno(i)) for i in range(n)]
+    await asyncio.sleep(durata)
+    for c in compiti:
+        c.cancel()
+    await asyncio.gather(*compiti, return_exceptions=True)
+    return conteggi
+
+
+def partita_di_prova(pausa=0.5, formato="Set Unico", pmax=21, seme=None):
+    """Gioca una partita casuale pubblicando ogni scambio, come farebbe il segnapunti."""
+    from registro_scambi import RegistroScambi
+    caso = random.Random(seme)
+    registro = RegistroScambi(pmax, formato)
+    while not registro.conclusa():
+        registro.segna(caso.choice((1, 2)))
+        pubblica(evento_partita("prova", "SQUADRA A", "SQUADRA B", registro, campo=1))
+        time.sleep(pausa)
+    pubblica({"id": "prova", "chiusa": True})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--porta", type=int, default=PORTA_HTTP)
+    parser.add_argument("--udp", default=SPETTATORI or "127.0.0.1:8765")
+    parser.add_argument("--spettatore", action="store_true", help="client di prova invece del server")
+    parser.add_argument("--partita", help="con --spettatore: segui una sola partita")
+    parser.add_argument("--carico", type=int, default=0, help="con --spettatore: n spettatori in parallelo")
+    parser.add_argument("--durata", type=float, default=30.0)
+    parser.add_argument("--prova", action="store_true", help="pubblica una partita finta")
+    args = parser.parse_args(argv)
+    host = "127.0.0.1" if args.host == "0.0.0.0" else args.host
+
+    if args.prova:
+        partita_di_prova()
+    elif args.spettatore and args.carico:
+        conteggi = asyncio.run(_carico(host, args.porta, args.carico, args.durata))
+        print(f"{len(conteggi)} spettatori · eventi ricevuti min {min(conteggi)} max {max(conteggi)}")
+    elif args.spettatore:
+        async def stampa():
+            async for evento in spettatore(host, args.porta, args.partita):
+                print(json.dumps(evento, ensure_ascii=False), flush=True)
+        try:
+            asyncio.run(stampa())
+        except KeyboardInterrupt:
+            pass
+    else:
+        async def avvia():
+            await servi(args.host, args.porta, args.udp)
+            print(f"Spettatori su http://{host}:{args.porta} · eventi UDP su {args.udp}", file=sys.stderr)
+            await asyncio.Event().wait()
+        try:
+            asyncio.run(avvia())
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
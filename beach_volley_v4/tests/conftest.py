@@ -0,0 +1,38 @@
+"""
+conftest.py — I moduli dell'app sono nella cartella superiore; ogni test lavora in una cartella temporanea
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import data_manager as dm
+
+
+@pytest.fixture(autouse=True)
+def cartella(tmp_path, monkeypatch):
+    """File di dati, journal, database, blob e checkpoint finiscono in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(dm, "STORAGE_BACKEND", "journal")
+    monkeypatch.setitem(dm._persistito, "voci_journal", 0)
+    yield tmp_path
+    if dm._sqlite["conn"] is not None:
+        dm._sqlite["conn"].close()
+        dm._sqlite["conn"] = None
+
+
+@pytest.fixture
+def sqlite(monkeypatch):
+    monkeypatch.setattr(dm, "STORAGE_BACKEND", "sqlite")
+
+
+@pytest.fixture
+def stato():
+    """Lega sintetica piccola con 8 squadre iscritte e torneo pronto ad avviarsi."""
+    from lega_sintetica import genera_lega, iscrivi_squadre
+    s = dm.StatoTorneo(dict(genera_lega(40, 2, seme=1)), completo=True)
+    s["torneo"]["nome"] = "Test"
+    iscrivi_squadre(s, 8)
+    return s
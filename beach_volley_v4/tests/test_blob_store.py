@@ -0,0 +1,93 @@
+"""
+test_blob_store.py — Archivio blob e cache dei data URI
+"""
+import io
+
+import pytest
+
+import blob_store as bs
+
+
+@pytest.fixture(autouse=True)
+def cache_vuota(monkeypatch):
+    monkeypatch.setattr(bs, "_cache_uri", bs.OrderedDict())
+    monkeypatch.setitem(bs._cache_uri_stato, "byte", 0)
+
+
+def _png(lato=8, colore=(200, 30, 30)):
+    Image = pytest.importorskip("PIL.Image")
+    buf = io.BytesIO()
+    Image.new("RGB", (lato, lato), colore).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def test_hash_stabile_e_deduplicato():
+    dati = _png()
+    assert bs.salva_blob(dati) == bs.salva_blob(dati)
+    assert bs.leggi_blob(bs.salva_blob(dati)) == dati
+
+
+def test_blob_mancante_non_resta_in_cache():
+    dati = _png()
+    h = bs.hashlib.sha256(dati).hexdigest()
+    assert bs.blob_data_uri(h) is None
+    bs.salva_blob(dati)
+    assert bs.blob_data_uri(h).startswith("data:image/png;base64,")
+
+
+def test_miniature_in_cache_originali_grandi_no(monkeypatch):
+    monkeypatch.setattr(bs, "CACHE_URI_MAX_VOCE", 2000)
+    grande = bs.salva_blob(bytes(_png(lato=400, colore=(1, 2, 3))) + bytes(4000))
+    piccola = bs.salva_blob(_png())
+    bs.blob_data_uri(grande)
+    bs.blob_data_uri(piccola)
+    assert (grande, None) not in bs._cache_uri
+    assert (piccola, None) in bs._cache_uri
+
+
+def test_cache_entro_il_budget(monkeypatch):
+    hashes = [bs.salva_blob(_png(colore=(i, i, i))) for i in range(20)]
+    una = len(bs.blob_data_uri(hashes[0]))
+    monkeypatch.setattr(bs, "CACHE_URI_BYTE", una * 5)
+    for h in hashes:
+        bs.blob_data_uri(h)
+    assert bs._cache_uri_stato["byte"] <= una * 5
+    assert (hashes[-1], None) in bs._cache_uri and (hashes[0], None) not in bs._cache_uri
+
+
+# ─── MINIATURE ───────────────────────────────────────────────────────────────
+
+class _Upload:
+    def __init__(self, dati):
+        self.dati = dati
+
+    def getvalue(self):
+        return self.dati
+
+
+def test_miniature_generate_al_caricamento():
+    Image = pytest.importorskip("PIL.Image")
+    h = bs.salva_foto(_Upload(_png(lato=1200)))
+    for nome, misura in bs.MINIATURE.items():
+        path = bs._percorso_miniatura(h, nome)
+        assert Image.open(path).size == misura
+        assert path.stat().st_size < len(bs.leggi_blob(h))
+    mtime = bs._percorso_miniatura(h, "card").stat().st_mtime_ns
+    bs.genera_miniature(h)   # già presenti: nessuna riscrittura
+    assert bs._percorso_miniatura(h, "card").stat().st_mtime_ns == mtime
+
+
+def test_miniatura_generata_alla_prima_richiesta():
+    h = bs.salva_blob(_png(lato=300))
+    assert not bs._percorso_miniatura(h, "icona").exists()
+    uri = bs.blob_data_uri(h, "icona")
+    assert uri.startswith(f"data:image/{bs._FORMATO_MINIATURE.lower()};base64,")
+    assert len(uri) < len(bs.blob_data_uri(h))
+
+
+def test_file_non_immagine_usa_l_originale():
+    pytest.importorskip("PIL.Image")
+    h = bs.salva_blob(b"non un'immagine")
+    bs.genera_miniature(h)
+    assert not bs._percorso_miniatura(h, "icona").exists()
+    assert bs.blob_data_uri(h, "icona").startswith("data:application/octet-stream;base64,")
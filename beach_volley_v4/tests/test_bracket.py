@@ -0,0 +1,101 @@
+"""
+test_bracket.py — Tabellone a eliminazione diretta: avanzamento nell'heap, finale 3° posto, podio
+"""
+import pytest
+
+import bracket
+
+
+def _gioca(state, vince_sq1=lambda p: True):
+    """Conferma turno dopo turno le partite pronte; restituisce l'ordine in cui sono state giocate."""
+    giocate = []
+    while bracket.pronte(state["bracket"]):
+        for p in bracket.pronte(state["bracket"]):
+            p["vincitore"] = p["sq1"] if vince_sq1(p) else p["sq2"]
+            p["confermata"] = True
+            bracket.avanza(state, p)
+            giocate.append(p)
+    return giocate
+
+
+def test_teste_di_serie_si_incontrano_solo_in_finale():
+    assert bracket.ordine_teste_di_serie(8) == [1, 8, 4, 5, 2, 7, 3, 6]
+    state = {"bracket": bracket.crea_bracket(bracket.slot_da_teste_di_serie([f"s{i}" for i in range(1, 9)]))}
+    _gioca(state, lambda p: int(p["sq1"][1:]) < int(p["sq2"][1:]))
+    assert bracket.podio(state) == [(1, "s1"), (2, "s2"), (3, "s3")]
+
+
+def test_vincente_sale_nel_nodo_padre():
+    state = {"bracket": bracket.crea_bracket(list("abcdefgh"))}
+    per_nodo = {p["nodo"]: p for p in state["bracket"]}
+    assert sorted(per_nodo) == list(range(8))
+    assert [(per_nodo[n]["sq1"], per_nodo[n]["sq2"]) for n in (4, 5, 6, 7)] == [
+        ("a", "b"), ("c", "d"), ("e", "f"), ("g", "h")]
+    for n, vince in ((4, "b"), (5, "c")):
+        p = per_nodo[n]
+        p["vincitore"], p["confermata"] = vince, True
+        bracket.avanza(state, p)
+    assert (per_nodo[2]["sq1"], per_nodo[2]["sq2"]) == ("b", "c")
+    assert per_nodo[3]["sq1"] is None and bracket.pronte(state["bracket"]) == [per_nodo[6], per_nodo[7], per_nodo[2]]
+
+
+def test_finale_terzo_posto_dalle_perdenti_delle_semifinali():
+    state = {"bracket": bracket.crea_bracket(list("abcdefgh"))}
+    giocate = _gioca(state)
+    assert [bracket.nome_round(p) for p in giocate[-2:]] == [bracket.NOME_TERZO_POSTO, bracket.NOMI_ROUND[0]]
+    terzo = bracket.get_partita_nodo(state, 0)
+    assert (terzo["sq1"], terzo["sq2"]) == ("c", "g")
+    assert bracket.podio(state) == [(1, "a"), (2, "e"), (3, "c")]
+
+
+def test_podio_vuoto_finche_manca_la_finalina():
+    state = {"bracket": bracket.crea_bracket(list("abcd"))}
+    _gioca(state)
+    terzo = bracket.get_partita_nodo(state, 0)
+    terzo["confermata"] = False
+    assert bracket.podio(state) == []
+
+
+def test_senza_finalina_due_terzi():
+    state = {"bracket": bracket.crea_bracket(list("abcd"), terzo_posto=False)}
+    assert len(_gioca(state)) == 3
+    assert bracket.podio(state) == [(1, "a"), (2, "c"), (3, "b"), (3, "d")]
+
+
+def test_da_primo_turno_riporta_i_risultati():
+    vecchio = [{"sq1": a, "sq2": b, "round": 1, "confermata": True, "vincitore": a, "id": f"p{a}",
+                "punteggi": [(21, 10)], "set_sq1": 1, "set_sq2": 0, "in_battuta": None}
+               for a, b in (("a", "b"), ("c", "d"))]
+    vecchio.append({"sq1": "a", "sq2": "c", "round": 2, "confermata": False, "vincitore": None})
+    nuovo = bracket.da_primo_turno(vecchio)
+    state = {"bracket": nuovo}
+    finale = bracket.get_partita_nodo(state, 1)
+    assert (finale["sq1"], finale["sq2"]) == ("a", "c") and not finale["confermata"]
+    assert bracket.get_partita_nodo(state, 2)["id"] == "pa"
+
+
+def test_servono_due_squadre():
+    with pytest.raises(ValueError):
+        bracket.crea_bracket(["a", None])
+
+
+# ─── BYE ─────────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("n", [3, 5, 6, 7, 12, 17, 33])
+def test_bye_partite_e_campione(n):
+    teste = [f"s{i}" for i in range(1, n + 1)]
+    slot = bracket.slot_da_teste_di_serie(teste)
+    assert len(slot) == bracket.dimensione(n) and slot.count(None) == bracket.dimensione(n) - n
+    state = {"bracket": bracket.crea_bracket(slot)}
+    giocate = _gioca(state, lambda p: int(p["sq1"][1:]) < int(p["sq2"][1:]))
+    assert len(giocate) == n - 1 + (1 if n >= 4 else 0)
+    assert bracket.podio(state)[:2] == [(1, "s1"), (2, "s2")]
+
+
+def test_bye_alle_prime_teste_di_serie():
+    state = {"bracket": bracket.crea_bracket(bracket.slot_da_teste_di_serie(list("abcdef")))}
+    primo_turno = [p for p in state["bracket"] if p["round"] == 1]
+    assert sorted((p["sq1"], p["sq2"]) for p in primo_turno) == [("c", "f"), ("d", "e")]
+    semi = [bracket.get_partita_nodo(state, n) for n in (2, 3)]
+    assert [p["sq1"] for p in semi] == ["a", "b"] and not any(p["sq2"] for p in semi)
+    assert {bracket.nome_round(p) for p in primo_turno} == {bracket.NOMI_ROUND[2]}
@@ -0,0 +1,98 @@
+"""
+test_calendario.py — Calendario su più campi: niente sovrapposizioni, riposo minimo, dipendenze del tabellone
+"""
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+import calendario
+import data_manager as dm
+from lega_sintetica import iscrivi_squadre
+from motore_torneo import TournamentEngine, DOPPIA_ELIMINAZIONE, SVIZZERA
+
+DURATA = calendario.durata_partita({"punteggio_max": 21, "formato_set": "Set Unico"})
+
+
+def _orari(partite):
+    return [(p, calendario.minuti(p["orario"])) for p in partite if p.get("orario")]
+
+
+def _verifica(partite, riposo):
+    per_campo, per_squadra = defaultdict(list), defaultdict(list)
+    for p, t in _orari(partite):
+        per_campo[p["campo"]].append(t)
+        for sid in (p["sq1"], p["sq2"]):
+            if sid:
+                per_squadra[sid].append(t)
+    for orari in per_campo.values():
+        orari.sort()
+        assert all(b - a >= DURATA for a, b in zip(orari, orari[1:]))
+    for orari in per_squadra.values():
+        orari.sort()
+        assert all(b - a >= DURATA + riposo for a, b in zip(orari, orari[1:]))
+
+
+def _previste(stato):
+    """Partite del tabellone ancora da generare durante i gironi (con la finale 3° posto)."""
+    qualificate = sum(min(2, len(g["squadre"])) for g in stato["gironi"])
+    return qualificate - 1 + (qualificate >= 4)
+
+
+def _motore(stato, n_squadre, campi, riposo, **torneo):
+    stato["squadre"] = []
+    iscrivi_squadre(stato, n_squadre)
+    stato["torneo"].update({"campi": campi, "riposo_min": riposo, "punteggio_max": 21,
+                            "formato_set": "Set Unico", "ora_inizio": "09:00", **torneo})
+    motore = TournamentEngine(stato, rng=np.random.default_rng(0))
+    motore.avvia()
+    return motore
+
+
+def test_durata_partita():
+    assert DURATA % 5 == 0
+    assert calendario.durata_partita({"punteggio_max": 21, "formato_set": "Best of 3"}) > DURATA
+    assert calendario.orario(calendario.minuti("09:05") + 70) == "10:15"
+
+
+@pytest.mark.parametrize("campi,riposo", [(1, 0), (2, 10), (3, 30), (6, 15)])
+def test_gironi_senza_sovrapposizioni_e_con_riposo(stato, campi, riposo):
+    motore = _motore(stato, 16, campi, riposo)
+    partite = [p for g in stato["gironi"] for p in g["partite"]]
+    assert all(1 <= p["campo"] <= campi for p in partite)
+    _verifica(partite, riposo)
+    riepilogo = motore.pianifica(assegna=False)
+    assert riepilogo["previste"] == _previste(stato) and 0 < riepilogo["utilizzo"] <= 1
+
+
+def test_tabellone_dopo_i_gironi_e_dopo_le_partite_che_lo_alimentano(stato):
+    motore = _motore(stato, 12, 3, 10)
+    motore.simula_tutti()
+    motore.avvia_eliminazione()
+    fine_gironi = max(t for _, t in _orari(p for g in stato["gironi"] for p in g["partite"]))
+    per_nodo = {p["nodo"]: t for p, t in _orari(stato["bracket"])}
+    assert min(per_nodo.values()) >= fine_gironi + DURATA + 10
+    for nodo, t in per_nodo.items():
+        for figlio in (2 * nodo, 2 * nodo + 1):
+            if nodo and figlio in per_nodo:
+                assert t >= per_nodo[figlio] + DURATA + 10
+    _verifica(stato["bracket"], 10)
+
+
+def test_doppia_eliminazione_segue_i_puntatori(stato):
+    _motore(stato, 8, 2, 10, tipo_tabellone=DOPPIA_ELIMINAZIONE)
+    t = {p["nodo"]: calendario.minuti(p["orario"]) for p in stato["bracket"]}
+    for p in stato["bracket"]:
+        for dest in (p["vincente_a"], p["perdente_a"]):
+            if dest:
+                assert t[dest[0]] >= t[p["nodo"]] + DURATA + 10
+
+
+def test_svizzera_turni_futuri_previsti(stato):
+    motore = _motore(stato, 8, 2, 10, tipo_tabellone=SVIZZERA, qualificate_svizzera=4)
+    riepilogo = motore.pianifica(assegna=False)
+    assert riepilogo["partite"] == 3 * 4 + 4 and riepilogo["previste"] == 2 * 4 + 4
+    primo_turno = max(t for _, t in _orari(stato["gironi"][0]["partite"]))
+    motore.simula_tutti()
+    secondo = [p for p in stato["gironi"][0]["partite"] if p["turno"] == 2]
+    assert min(calendario.minuti(p["orario"]) for p in secondo) >= primo_turno + DURATA + 10
@@ -0,0 +1,54 @@
+"""
+test_checkpoint_live.py — Checkpoint JSONL delle partite live: ripresa, coda troncata, pulizia
+"""
+import os
+
+from registro_scambi import apri_checkpoint, chiudi_checkpoint, pulisci_checkpoint, _file_checkpoint
+
+
+def _gioca(registro):
+    for k in [1] * 21 + [2, 2, 1]:
+        registro.segna(k)
+    registro.annulla(); registro.annulla(); registro.ripeti()
+    registro.cambia_battuta(2)
+    registro.segna(2)
+
+
+def test_ripresa_da_un_altra_sessione():
+    r = apri_checkpoint("p_1", 21, "Best of 3")
+    _gioca(r)
+    ripreso = apri_checkpoint("p_1", 21, "Best of 3")
+    assert ripreso.dati() == r.dati() and ripreso.stato == r.stato
+    assert ripreso.punteggi() == [(21, 0), (0, 3)]
+
+
+def test_una_riga_per_comando():
+    r = apri_checkpoint("p_1")
+    r.segna(1); r.segna(2); r.annulla()
+    with open(_file_checkpoint("p_1"), encoding="utf-8") as f:
+        assert sum(1 for _ in f) == 3
+
+
+def test_coda_troncata_ignorata_e_tagliata():
+    r = apri_checkpoint("p_1", 21, "Best of 3")
+    _gioca(r)
+    with open(_file_checkpoint("p_1"), "a", encoding="utf-8") as f:
+        f.write('{"op": "ev')
+    ripreso = apri_checkpoint("p_1", 21, "Best of 3")
+    assert ripreso.stato == r.stato
+    ripreso.segna(1)
+    r.segna(1)
+    assert apri_checkpoint("p_1", 21, "Best of 3").dati() == r.dati()
+
+
+def test_chiudi_e_pulisci():
+    state = {"gironi": [{"partite": [{"id": "aperta", "confermata": False},
+                                     {"id": "confermata", "confermata": True}]}],
+             "bracket": []}
+    for pid in ("aperta", "confermata", "altro_torneo"):
+        apri_checkpoint(pid).segna(1)
+    assert pulisci_checkpoint(state) == 2
+    assert sorted(os.listdir(_file_checkpoint("x").parent)) == ["aperta.jsonl"]
+    chiudi_checkpoint("aperta")
+    chiudi_checkpoint("aperta")   # già chiuso: nessun errore
+    assert not _file_checkpoint("aperta").exists()
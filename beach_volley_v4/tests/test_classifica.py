@@ -0,0 +1,95 @@
+"""
+test_classifica.py — Classifica incrementale: applica/storna per partita contro la ricostruzione completa
+"""
+import copy
+
+import numpy as np
+
+import data_manager as dm
+from motore_torneo import TournamentEngine
+
+
+def _statistiche(state):
+    return {sq["id"]: {k: sq[k] for k in dm.CAMPI_CLASSIFICA} for sq in state["squadre"]}
+
+
+def _torneo_in_corso(stato):
+    stato["simulazione_al_ranking"] = True
+    motore = TournamentEngine(stato, rng=np.random.default_rng(3))
+    motore.avvia()
+    return motore
+
+
+def test_incrementale_uguale_alla_fold(stato):
+    motore = _torneo_in_corso(stato)
+    motore.simula_tutti()
+    incrementale = _statistiche(stato)
+    dm.ricostruisci_classifica(stato)
+    assert _statistiche(stato) == incrementale
+    assert sum(s["vittorie"] for s in incrementale.values()) == len(dm.partite_torneo(stato))
+
+
+def test_correzione_di_una_partita_confermata(stato):
+    motore = _torneo_in_corso(stato)
+    partita = motore.partite_da_giocare()[0]
+    motore.conferma_risultato(partita, [(21, 15)])
+    motore.conferma_risultato(partita, [(18, 21), (21, 19), (13, 15)])
+    sq1 = dm.get_squadra_by_id(stato, partita["sq1"])
+    sq2 = dm.get_squadra_by_id(stato, partita["sq2"])
+    assert (sq1["vittorie"], sq1["sconfitte"], sq1["punti_classifica"]) == (0, 1, 1)
+    assert (sq2["vittorie"], sq2["set_vinti"], sq2["set_persi"]) == (1, 2, 1)
+    assert (sq1["punti_fatti"], sq1["punti_subiti"]) == (52, 55)
+    incrementale = _statistiche(stato)
+    dm.ricostruisci_classifica(stato)
+    assert _statistiche(stato) == incrementale
+
+
+def test_storna_e_riapplica_una_volta_sola(stato):
+    motore = _torneo_in_corso(stato)
+    partita = motore.partite_da_giocare()[0]
+    prima = _statistiche(stato)
+    motore.conferma_risultato(partita, [(21, 10)])
+    dopo = _statistiche(stato)
+    dm.aggiorna_classifica_squadra(stato, partita)   # già in classifica: nessun effetto
+    assert _statistiche(stato) == dopo
+    dm.storna_classifica_squadra(stato, partita)
+    dm.storna_classifica_squadra(stato, partita)
+    assert _statistiche(stato) == prima and not partita["in_classifica"]
+
+
+def test_simulazione_fuori_ranking_non_entra_in_classifica(stato):
+    motore = _torneo_in_corso(stato)
+    stato["simulazione_al_ranking"] = False
+    prima = _statistiche(stato)
+    motore.simula_tutti()
+    assert _statistiche(stato) == prima
+
+
+def test_migrazione_del_flag_in_classifica(stato):
+    motore = _torneo_in_corso(stato)
+    motore.simula_tutti()
+    vecchio = copy.deepcopy(dict(stato))
+    for p in dm.partite_torneo(vecchio):
+        del p["in_classifica"]
+    assert dm._migra_classifica(vecchio)
+    assert all(p["in_classifica"] for p in dm.partite_torneo(vecchio))
+
+    for p in dm.partite_torneo(vecchio):
+        del p["in_classifica"]
+    vecchio["squadre"][0]["vittorie"] += 1   # statistiche che non tornano con la fold: si lasciano com'erano
+    assert dm._migra_classifica(vecchio)
+    assert not any(p["in_classifica"] for p in dm.partite_torneo(vecchio))
+    assert vecchio["squadre"][0]["vittorie"] == _statistiche(stato)[vecchio["squadre"][0]["id"]]["vittorie"] + 1
+
+
+def test_tabella_girone_in_cache_solo_id(stato):
+    motore = _torneo_in_corso(stato)
+    girone = stato["gironi"][0]
+    motore.conferma_risultato(girone["partite"][0], [(21, 15)])
+    tabella = dm.tabella_girone(stato, girone)
+    assert {sid for sid, _ in tabella} == set(girone["squadre"])
+    assert all(set(s) == set(dm.CAMPI_CLASSIFICA) for _, s in tabella)
+    dm.get_squadra_by_id(stato, girone["squadre"][0])["nome"] = "Rinominata"
+    assert dm.tabella_girone(stato, girone) is tabella
+    motore.conferma_risultato(girone["partite"][1], [(21, 15)])
+    assert dm.tabella_girone(stato, girone) is not tabella
@@ -0,0 +1,72 @@
+"""
+test_doppia_eliminazione.py — Doppia eliminazione: due sconfitte per uscire, finalissima e spareggio
+"""
+from collections import Counter
+
+import pytest
+
+import bracket
+import doppia_eliminazione as de
+
+
+def _gioca(state, vince_sq1):
+    giocate = []
+    while de.pronte(state["bracket"]):
+        for p in de.pronte(state["bracket"]):
+            p["vincitore"] = p["sq1"] if vince_sq1(p) else p["sq2"]
+            p["confermata"] = True
+            de.avanza(state, p)
+            giocate.append(p)
+    return giocate
+
+
+def _testa(sid):
+    return int(sid[1:])
+
+
+def _torneo(n, spareggio=True):
+    teste = [f"s{i}" for i in range(1, n + 1)]
+    return {"bracket": de.crea_doppia_eliminazione(bracket.slot_da_teste_di_serie(teste), spareggio)}
+
+
+@pytest.mark.parametrize("n", [3, 4, 5, 6, 8, 11, 16])
+def test_fuori_solo_dopo_due_sconfitte(n):
+    state = _torneo(n)
+    giocate = _gioca(state, lambda p: _testa(p["sq1"]) < _testa(p["sq2"]))
+    sconfitte = Counter(bracket.perdente(p) for p in giocate)
+    assert len(giocate) == 2 * n - 2
+    assert "s1" not in sconfitte and all(sconfitte[f"s{i}"] == 2 for i in range(2, n + 1))
+    assert de.podio(state) == [(1, "s1"), (2, "s2"), (3, "s3")]
+
+
+def test_spareggio_se_vince_chi_arriva_dai_perdenti():
+    state = _torneo(8)
+    finale = next(p for p in state["bracket"] if p.get("spareggio"))
+    # Vince sempre la testa di serie migliore, tranne la finalissima
+    giocate = _gioca(state, lambda p: (_testa(p["sq1"]) < _testa(p["sq2"])) != (p is finale))
+    rivincita = giocate[-1]
+    assert rivincita["nodo"] == finale["spareggio"] and de.nome_round(rivincita).startswith("🔁")
+    assert (rivincita["sq1"], rivincita["sq2"]) == (finale["sq1"], finale["sq2"])
+    assert len(giocate) == 2 * 8 - 1
+    assert de.podio(state)[:2] == [(1, "s1"), (2, "s2")]
+
+
+def test_senza_spareggio_decide_la_finalissima():
+    state = _torneo(8, spareggio=False)
+    finale = next(p for p in state["bracket"] if p["tabellone"] == "finale")
+    giocate = _gioca(state, lambda p: (_testa(p["sq1"]) < _testa(p["sq2"])) != (p is finale))
+    assert len(giocate) == 2 * 8 - 2
+    assert de.podio(state)[:2] == [(1, finale["sq2"]), (2, finale["sq1"])]
+
+
+def test_podio_vuoto_finche_lo_spareggio_non_e_confermato():
+    state = _torneo(4)
+    finale = next(p for p in state["bracket"] if p.get("spareggio"))
+    _gioca(state, lambda p: (_testa(p["sq1"]) < _testa(p["sq2"])) != (p is finale))
+    de.get_partita_nodo(state, finale["spareggio"])["confermata"] = False
+    assert de.podio(state) == []
+
+
+def test_servono_tre_squadre():
+    with pytest.raises(ValueError):
+        de.crea_doppia_eliminazione(["a", "b"])
@@ -0,0 +1,72 @@
+"""
+test_indici.py — Indici id/nome/atleta/nodo: stessi risultati della scansione lineare, anche dopo le modifiche
+"""
+import pytest
+
+import data_manager as dm
+
+
+def _confronta(stato):
+    semplice = dict(stato)   # dict non tracciato: scansione lineare
+    for a in stato["atleti"]:
+        assert dm.get_atleta_by_id(stato, a["id"]) is dm.get_atleta_by_id(semplice, a["id"])
+        assert dm.get_atleta_by_nome(stato, a["nome"]) is dm.get_atleta_by_nome(semplice, a["nome"])
+        assert dm.get_squadra_di_atleta(stato, a["id"]) is dm.get_squadra_di_atleta(semplice, a["id"])
+    for sq in stato["squadre"]:
+        assert dm.get_squadra_by_id(stato, sq["id"]) is dm.get_squadra_by_id(semplice, sq["id"])
+
+
+def test_ricerche_come_la_scansione(stato):
+    _confronta(stato)
+    assert dm.get_atleta_by_id(stato, "manca") is None
+    assert dm.get_squadra_by_id(stato, None) is None
+
+
+def test_indice_costruito_una_volta(stato):
+    aid = stato["atleti"][0]["id"]
+    dm.get_atleta_by_id(stato, aid)
+    voce = stato.indici["atleti_id"]
+    for a in stato["atleti"]:
+        dm.get_atleta_by_id(stato, a["id"])
+    assert stato.indici["atleti_id"] is voce
+    stato["atleti"][0]["stats"]["vittorie"] += 1   # modifica sul posto: l'indice resta valido
+    dm.get_atleta_by_id(stato, aid)
+    assert stato.indici["atleti_id"] is voce
+
+
+def test_inserimenti_ed_eliminazioni(stato):
+    _confronta(stato)
+    nuovo = dm.new_atleta("Zeno", "Nuovo")
+    stato["atleti"].append(nuovo)
+    assert dm.get_atleta_by_id(stato, nuovo["id"]) == nuovo
+    tolto = stato["squadre"].pop()
+    assert dm.get_squadra_by_id(stato, tolto["id"]) is None
+    assert dm.get_squadra_di_atleta(stato, tolto["atleti"][0]) is None
+    _confronta(stato)
+
+
+def test_rinomina_e_cambio_rosa(stato):
+    _confronta(stato)
+    a = stato["atleti"][0]
+    vecchio = a["nome"]
+    a["nome"] = "Nome Nuovo"
+    assert dm.get_atleta_by_nome(stato, "Nome Nuovo") is a
+    assert dm.get_atleta_by_nome(stato, vecchio) is None
+    sq1, sq2 = stato["squadre"][:2]
+    scambiato = sq1["atleti"][0]
+    sq1["atleti"][0], sq2["atleti"][0] = sq2["atleti"][0], scambiato
+    assert dm.get_squadra_di_atleta(stato, scambiato) is sq2
+    _confronta(stato)
+
+
+def test_nome_duplicato_vince_il_primo(stato):
+    doppio = dm.new_atleta(stato["atleti"][0]["nome"])
+    stato["atleti"].append(doppio)
+    assert dm.get_atleta_by_nome(stato, doppio["nome"]) is stato["atleti"][0]
+
+
+@pytest.mark.parametrize("sezione", ["atleti", "squadre"])
+def test_sezione_sostituita(stato, sezione):
+    _confronta(stato)
+    stato[sezione] = list(reversed(stato[sezione]))
+    _confronta(stato)
@@ -0,0 +1,41 @@
+"""
+test_lega_sintetica.py — Lega sintetica riproducibile e benchmark su una taglia ridotta
+"""
+import json
+
+import benchmark
+from lega_sintetica import genera_lega
+
+
+def _senza_date_trofei(state):
+    data = json.loads(json.dumps(state))
+    for a in data["atleti"]:
+        for info in a["trofei"].values():
+            info["data"] = None
+    return data
+
+
+def test_stesso_seme_stessa_lega():
+    assert _senza_date_trofei(genera_lega(60, 4, seme=3)) == _senza_date_trofei(genera_lega(60, 4, seme=3))
+    assert _senza_date_trofei(genera_lega(60, 4, seme=3)) != _senza_date_trofei(genera_lega(60, 4, seme=4))
+
+
+def test_lega_pronta_per_un_nuovo_torneo():
+    state = genera_lega(500, 5, squadre_per_torneo=(8, 24), seme=1)
+    assert len({a["id"] for a in state["atleti"]}) == len({a["nome"] for a in state["atleti"]}) == 500
+    registro = state["registro_tornei"]
+    assert [t["nome"] for t in registro] == [f"Tappa {k}" for k in range(1, 6)]
+    assert all(8 <= t["n_squadre"] <= 24 for t in registro)
+    assert sum(a["stats"]["tornei"] for a in state["atleti"]) == 2 * sum(t["n_squadre"] for t in registro)
+    assert state["fase"] == "setup" and not state["squadre"] and not state["gironi"]
+
+
+def test_benchmark_taglia_ridotta(monkeypatch):
+    monkeypatch.setitem(benchmark.TAGLIE, "mini", {"n_atleti": 40, "n_tornei": 2})
+    report = benchmark.esegui(["mini"], benchmark.BACKEND, ripetizioni=1)
+    voce = report["taglie"]["mini"]
+    assert set(voce["backend"]) == set(benchmark.BACKEND)
+    for misure in voce["backend"].values():
+        tempi = [v for v in misure.values() if isinstance(v, dict)]
+        assert tempi and all(v["min_s"] <= v["mediana_s"] for v in tempi)
+        assert misure["dimensione_file_kb"] > 0
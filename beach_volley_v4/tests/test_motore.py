@@ -0,0 +1,97 @@
+"""
+test_motore.py — Ciclo di vita del torneo col motore headless, per ogni formato di tabellone
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import data_manager as dm
+from motore_torneo import TournamentEngine, TIPI_TABELLONE, MIN_SQUADRE
+
+CARTELLA_APP = Path(__file__).resolve().parent.parent
+
+
+def test_motore_senza_streamlit():
+    """Teste di serie dal ranking comprese: il motore non deve importare moduli di interfaccia."""
+    codice = (
+        "import sys\n"
+        "from lega_sintetica import genera_lega\n"
+        "s = genera_lega(60, 3, seme=2)\n"
+        "assert 'streamlit' not in sys.modules, 'streamlit importato'\n"
+    )
+    subprocess.run([sys.executable, "-c", codice], cwd=CARTELLA_APP, check=True)
+
+
+def test_teste_di_serie_dal_ranking(stato):
+    stato["torneo"]["usa_ranking_teste_serie"] = True
+    motore = TournamentEngine(stato)
+    motore.avvia()
+    motore.simula_tutti()
+    motore.avvia_eliminazione()
+    assert all(p["sq1"] and p["sq2"] for p in stato["bracket"] if p["nodo"] >= 4)
+
+
+@pytest.mark.parametrize("tipo", TIPI_TABELLONE)
+def test_dal_setup_alla_proclamazione(stato, tipo):
+    stato["torneo"]["tipo_tabellone"] = tipo
+    stato["simulazione_al_ranking"] = True
+    motore = TournamentEngine(stato, rng=np.random.default_rng(1))
+    motore.avvia()
+    if motore.fase == "gironi":
+        with pytest.raises(ValueError):
+            motore.avvia_eliminazione()
+        motore.simula_tutti()
+        assert motore.gironi_completi()
+        motore.avvia_eliminazione()
+    assert motore.fase == "eliminazione" and motore.vincitore() is None
+    with pytest.raises(ValueError):
+        motore.proclama()
+    while motore.partite_da_giocare():
+        motore.conferma_risultato(motore.partite_da_giocare()[0], [(21, 17)])
+    podio = motore.proclama()
+    assert motore.fase == "proclamazione" and stato["vincitore"] == podio[0][1] == motore.vincitore()
+    assert len({sid for _, sid in podio}) == 3
+    voce = dm.get_torneo_registro(stato, stato["torneo"]["id"])
+    assert (voce["n_squadre"], voce["formato"]) == (8, tipo)
+    campioni = dm.get_squadra_by_id(stato, podio[0][1])["atleti"]
+    assert all(dm.get_atleta_by_id(stato, aid)["stats"]["storico_posizioni"][-1]["pos"] == 1 for aid in campioni)
+
+    nuovo = motore.nuovo_torneo()
+    assert nuovo["fase"] == "setup" and not nuovo["squadre"] and nuovo["atleti"] == stato["atleti"]
+
+
+def test_avvio_bloccato(stato):
+    motore = TournamentEngine(stato)
+    stato["torneo"]["nome"] = ""
+    assert "nome" in motore.motivo_blocco_avvio()
+    stato["torneo"]["nome"] = "Test"
+    del stato["squadre"][MIN_SQUADRE - 1:]
+    with pytest.raises(ValueError, match=str(MIN_SQUADRE)):
+        motore.avvia()
+    assert motore.fase == "setup"
+
+
+def test_conferma_senza_set_rifiutata(stato):
+    motore = TournamentEngine(stato)
+    motore.avvia()
+    partita = motore.partite_da_giocare()[0]
+    with pytest.raises(ValueError):
+        motore.conferma_risultato(partita, [(0, 0), (0, 0)])
+    assert not partita["confermata"]
+    motore.conferma_risultato(partita, [(21, 19), (0, 0)], in_battuta=2)
+    assert partita["punteggi"] == [(21, 19)] and partita["in_battuta"] == 2
+
+
+def test_simulazioni_fuori_ranking(stato):
+    stato["simulazione_al_ranking"] = False
+    motore = TournamentEngine(stato, rng=np.random.default_rng(2))
+    motore.avvia()
+    motore.simula_tutti()
+    motore.avvia_eliminazione()
+    motore.simula_tutti()
+    tornei = {a["id"]: a["stats"]["tornei"] for a in stato["atleti"]}
+    motore.proclama()
+    assert {a["id"]: a["stats"]["tornei"] for a in stato["atleti"]} == tornei
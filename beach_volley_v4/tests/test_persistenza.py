@@ -0,0 +1,177 @@
+"""
+test_persistenza.py — Round-trip dei backend (journal e SQLite) e migrazioni dei formati precedenti
+"""
+import json, os
+
+import data_manager as dm
+from motore_torneo import TournamentEngine
+
+
+def _formato_pre_registro(stato):
+    """Lo stato com'era prima del registro tornei: storico a tuple, niente trofei né in_classifica."""
+    data = json.loads(json.dumps(stato))
+    data["registro_tornei"] = []
+    for a in data["atleti"]:
+        a["stats"]["storico_posizioni"] = [[v["torneo"], v["pos"]] for v in a["stats"]["storico_posizioni"]]
+        a.pop("trofei", None)
+        a.pop("prossimo_trofeo", None)
+    return data
+
+
+def test_import_sqlite_da_json_pre_registro(stato, sqlite):
+    with open(dm.DATA_FILE, "w", encoding="utf-8") as f:
+        json.dump(_formato_pre_registro(stato), f)
+    caricato = dm.load_state()
+    storico = [v for a in caricato["atleti"] for v in a["stats"]["storico_posizioni"]]
+    assert storico and all(isinstance(v, dict) and v["torneo_id"] for v in storico)
+    assert {v["torneo_id"] for v in storico} == {t["id"] for t in caricato["registro_tornei"]}
+
+
+def test_import_sqlite_persistito(stato, sqlite):
+    with open(dm.DATA_FILE, "w", encoding="utf-8") as f:
+        json.dump(_formato_pre_registro(stato), f)
+    primo = dm.load_state()
+    dm._sqlite["conn"].close()
+    dm._sqlite["conn"] = None
+    conn = dm._connessione()
+    assert conn.execute("SELECT COUNT(*) FROM atleti").fetchone()[0] == len(stato["atleti"])
+    assert conn.execute("SELECT COUNT(*) FROM meta").fetchone()[0] > 0
+    assert dm.load_state() == primo
+
+
+def _come_json(v):
+    """In memoria i punteggi sono tuple, su disco liste: si confronta la forma serializzata."""
+    return json.loads(json.dumps(v))
+
+
+def _round_trip(stato):
+    dm.save_state(stato)
+    motore = TournamentEngine(stato)
+    motore.avvia()
+    dm.save_state(stato)
+    partita = stato["gironi"][0]["partite"][0]
+    motore.conferma_risultato(partita, [(21, 15)])
+    dm.save_state(stato)
+    return dm.load_state()
+
+
+def test_round_trip_journal(stato):
+    assert _come_json(_round_trip(stato)) == _come_json(stato)
+
+
+def test_round_trip_sqlite(stato, sqlite):
+    assert _come_json(_round_trip(stato)) == _come_json(stato)
+
+
+def test_journal_troncato(stato):
+    dm.save_state(stato)
+    stato["torneo"]["nome"] = "Rinominato"
+    dm.save_state(stato)
+    with open(dm.JOURNAL_FILE, "a", encoding="utf-8") as f:
+        f.write('{"ts": "x", "ops": [')
+    assert dm.load_state()["torneo"]["nome"] == "Rinominato"
+
+
+def _righe_journal():
+    with open(dm.JOURNAL_FILE, encoding="utf-8") as f:
+        return [json.loads(r) for r in f]
+
+
+def test_journal_accoda_solo_le_modifiche(stato):
+    dm.save_state(stato)
+    motore = TournamentEngine(stato)
+    motore.avvia()
+    dm.save_state(stato)
+    partita = stato["gironi"][0]["partite"][0]
+    motore.conferma_risultato(partita, [(21, 15)])
+    dm.save_state(stato)
+    ultima = _righe_journal()[-1]["ops"]
+    assert {"op": "partita", "v": _come_json(partita)} in _come_json(ultima)
+    assert {op["op"] for op in ultima} <= {"partita", "rec"}
+    assert {op["v"]["id"] for op in ultima if op["op"] == "rec"} == {partita["sq1"], partita["sq2"]}
+
+
+def test_journal_eliminazione_e_riordino(stato):
+    dm.save_state(stato)
+    eliminata = stato["squadre"].pop(0)
+    stato["atleti"].reverse()
+    dm.save_state(stato)
+    caricato = dm.load_state()
+    assert eliminata["id"] not in {sq["id"] for sq in caricato["squadre"]}
+    assert [a["id"] for a in caricato["atleti"]] == [a["id"] for a in stato["atleti"]]
+
+
+def test_journal_compattato(stato, monkeypatch):
+    monkeypatch.setattr(dm, "JOURNAL_COMPATTA_OGNI", 3)
+    dm.save_state(stato)
+    for i in range(2):
+        stato["torneo"]["nome"] = f"Nome {i}"
+        dm.save_state(stato)
+    assert len(_righe_journal()) == 2
+    stato["torneo"]["nome"] = "Compattato"
+    dm.save_state(stato)
+    assert not os.path.exists(dm.JOURNAL_FILE) and dm._persistito["voci_journal"] == 0
+    with open(dm.DATA_FILE, encoding="utf-8") as f:
+        assert json.load(f)["torneo"]["nome"] == "Compattato"
+
+
+def test_salvataggio_senza_modifiche_saltato(stato):
+    dm.save_state(stato)
+    prima = dm.statistiche_salvataggi(stato)
+    stato["torneo"]["nome"] = stato["torneo"]["nome"]   # stesso valore: niente da salvare
+    dm.save_state(stato)
+    dopo = dm.statistiche_salvataggi(stato)
+    assert dopo["salvataggi_saltati"] == prima["salvataggi_saltati"] + 1
+    assert dopo["byte_scritti"] == prima["byte_scritti"] and not os.path.exists(dm.JOURNAL_FILE)
+    assert dopo["sezioni_sporche"] == []
+
+
+def test_migrazione_foto_inline_nell_archivio(stato):
+    import base64
+    import blob_store
+    data = json.loads(json.dumps(stato))
+    foto = b"\x89PNG foto di prova"
+    data["atleti"][0]["foto_b64"] = base64.b64encode(foto).decode()
+    data["atleti"][1]["foto_b64"] = ""
+    with open(dm.DATA_FILE, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    caricato = dm.load_state()
+    a0, a1 = caricato["atleti"][:2]
+    assert "foto_b64" not in a0 and "foto_b64" not in a1
+    assert blob_store.leggi_blob(a0["foto_blob"]) == foto and a1.get("foto_blob") is None
+    assert caricato.completo   # il prossimo salvataggio riscrive lo snapshot migrato
+    dm.save_state(caricato)
+    with open(dm.DATA_FILE, encoding="utf-8") as f:
+        assert "foto_b64" not in f.read()
+
+
+def test_sqlite_eliminazioni_e_tabellone(stato, sqlite):
+    dm.save_state(stato)
+    motore = TournamentEngine(stato)
+    motore.avvia()
+    motore.simula_tutti()
+    motore.avvia_eliminazione()
+    dm.save_state(stato)
+    motore.conferma_risultato(motore.partite_da_giocare()[0], [(21, 12)])
+    stato["atleti"].pop()
+    stato["atleti"].reverse()
+    dm.save_state(stato)
+    dm._sqlite["conn"].close()
+    dm._sqlite["conn"] = None
+    assert _come_json(dm.load_state()) == _come_json(stato)
+
+
+def test_journal_troncato_poi_accodato(stato):
+    dm.save_state(stato)
+    stato["torneo"]["nome"] = "B"
+    dm.save_state(stato)
+    with open(dm.JOURNAL_FILE, "a", encoding="utf-8") as f:
+        f.write('{"ts": "x", "ops": [')
+    ripreso = dm.load_state()
+    ripreso["torneo"]["nome"] = "C"
+    ripreso["atleti"].append(dm.new_atleta("Nuova", "Atleta"))
+    dm.save_state(ripreso)
+    caricato = dm.load_state()
+    assert caricato["torneo"]["nome"] == "C"
+    assert len(caricato["atleti"]) == len(stato["atleti"]) + 1
+    assert len(_righe_journal()) == 2
@@ -0,0 +1,83 @@
+"""
+test_previsioni.py — Previsioni Monte Carlo: percentuali coerenti, risultati già giocati, worker
+"""
+import pytest
+
+import data_manager as dm
+from motore_torneo import TournamentEngine
+from previsioni import previsioni_stream, _scenario, _simula_blocco
+
+
+@pytest.fixture
+def gironi(stato):
+    stato["torneo"].update({"punteggio_max": 21, "formato_set": "Set Unico"})
+    TournamentEngine(stato).avvia()
+    return stato
+
+
+def _ultima(stream):
+    ultima = None
+    for ultima in stream:
+        pass
+    return ultima
+
+
+def _somme(previsione):
+    squadre = previsione["squadre"].values()
+    return [round(sum(s[k] for s in squadre), 6) for k in ("qualifica", "semifinale", "vittoria")]
+
+
+def test_percentuali_coerenti(gironi):
+    passi = list(previsioni_stream(gironi, n_sim=600, budget_s=30, blocco=200, workers=0))
+    assert [p["simulazioni"] for p in passi] == [200, 400, 600]
+    assert _somme(passi[-1]) == [100 * 2 * len(gironi["gironi"]), 400, 100]
+    for s in passi[-1]["squadre"].values():
+        assert s["qualifica"] >= s["semifinale"] >= s["vittoria"]
+
+
+def test_girone_concluso_qualifica_certa(gironi):
+    motore = TournamentEngine(gironi)
+    for p in gironi["gironi"][0]["partite"]:
+        motore.conferma_risultato(p, [(21, 10)])
+    ordine = [sid for sid, _ in dm.ordina_girone(gironi["gironi"][0])]
+    previsione = _ultima(previsioni_stream(gironi, n_sim=200, budget_s=30, blocco=100, workers=0))
+    assert [previsione["squadre"][sid]["qualifica"] for sid in ordine] == [100, 100, 0, 0]
+
+
+def test_blocco_riproducibile_con_il_seme(gironi):
+    scenario = _scenario(gironi)
+    assert _simula_blocco(scenario, 50, 9) == _simula_blocco(scenario, 50, 9)
+    assert "atleti" not in scenario and set(scenario["forze_squadre"]) == {sq["id"] for sq in gironi["squadre"]}
+
+
+def test_worker_in_processi_separati(gironi):
+    previsione = _ultima(previsioni_stream(gironi, n_sim=400, budget_s=60, blocco=100, workers=2))
+    assert previsione["simulazioni"] == 400
+    assert _somme(previsione)[2] == 100
+
+
+def test_senza_gironi_nessuna_previsione(stato):
+    assert list(previsioni_stream(stato, n_sim=10, workers=0)) == []
+
+
+@pytest.mark.parametrize("usa_ranking", [False, True])
+def test_teste_di_serie_come_il_tabellone_vero(gironi, monkeypatch, usa_ranking):
+    """A pari piazzamento decidono ranking e rendimento nel girone, non l'ordine dei gironi."""
+    import previsioni
+    gironi["torneo"]["usa_ranking_teste_serie"] = usa_ranking
+    motore = TournamentEngine(gironi)
+    for i, g in enumerate(gironi["gironi"]):
+        ordine = {sid: k for k, sid in enumerate(g["squadre"])}
+        for p in g["partite"]:
+            vince1 = ordine[p["sq1"]] < ordine[p["sq2"]]
+            margine = (21, 19) if i == 0 else (21, 5)   # il girone B vince con più distacco
+            motore.conferma_risultato(p, [margine if vince1 else margine[::-1]])
+    attese = dm.teste_di_serie_da_gironi(gironi["gironi"], gironi)
+    if not usa_ranking:
+        a, b = gironi["gironi"]
+        assert attese == [b["squadre"][0], a["squadre"][0], b["squadre"][1], a["squadre"][1]]
+    usate = []
+    originale = previsioni.slot_da_teste_di_serie
+    monkeypatch.setattr(previsioni, "slot_da_teste_di_serie", lambda t: usate.append(list(t)) or originale(t))
+    _simula_blocco(_scenario(gironi), 1, 0)
+    assert usate == [attese]
@@ -0,0 +1,66 @@
+"""
+test_ranking.py — Ranking globale: materializzazione in cache e calcolo colonnare
+"""
+import data_manager as dm
+from motore_torneo import TournamentEngine
+from ranking import build_ranking_data, ranking_frame
+
+
+def test_ranking_in_cache_finche_non_cambiano_gli_atleti(stato):
+    righe = build_ranking_data(stato)
+    df = ranking_frame(stato)
+    assert build_ranking_data(stato) is righe and ranking_frame(stato) is df
+    motore = TournamentEngine(stato)
+    motore.avvia()
+    motore.conferma_risultato(motore.partite_da_giocare()[0], [(21, 10)])
+    assert build_ranking_data(stato) is righe   # gironi e squadre non toccano il ranking
+    stato["atleti"][0]["stats"]["tornei"] += 1
+    stato["atleti"][0]["stats"]["storico_posizioni"].append(
+        {"torneo_id": "t_x", "torneo": "X", "pos": 1, "punti": 1000})
+    nuove = build_ranking_data(stato)
+    assert nuove is not righe and nuove[0]["id"] == stato["atleti"][0]["id"]
+
+
+def test_stesso_ranking_senza_stato_tracciato(stato):
+    semplice = dict(stato)
+    assert [r["id"] for r in build_ranking_data(semplice)] == [r["id"] for r in build_ranking_data(stato)]
+    assert ranking_frame(semplice).equals(ranking_frame(stato))
+
+
+def test_righe_con_atleta_e_storico(stato):
+    for r in build_ranking_data(stato):
+        assert r["atleta"]["id"] == r["id"] and r["storico"] is r["atleta"]["stats"]["storico_posizioni"]
+        assert r["atleta"]["stats"]["tornei"] > 0
+
+
+def test_ranking_vuoto(stato):
+    for a in stato["atleti"]:
+        a["stats"]["tornei"] = 0
+    assert build_ranking_data(stato) == [] and ranking_frame(stato).empty
+
+
+def _riga_di_riferimento(a):
+    """La stessa riga calcolata atleta per atleta, come prima del calcolo colonnare."""
+    s = a["stats"]
+    overall = dm.calcola_overall_fifa(a)
+    return {
+        "id": a["id"], "nome": a["nome"], **{c: s[c] for c in ("tornei", "vittorie", "sconfitte", "set_vinti",
+                                                             "set_persi", "punti_fatti", "punti_subiti")},
+        "quoziente_punti": round(s["punti_fatti"] / max(1, s["set_vinti"] + s["set_persi"]), 2),
+        "quoziente_set": round(s["set_vinti"] / max(1, s["set_persi"]), 2),
+        "win_rate": round(s["vittorie"] / max(1, s["tornei"]) * 100, 1),
+        "rank_pts": sum(v["punti"] for v in s["storico_posizioni"]),
+        "oro": sum(v["pos"] == 1 for v in s["storico_posizioni"]),
+        "argento": sum(v["pos"] == 2 for v in s["storico_posizioni"]),
+        "bronzo": sum(v["pos"] == 3 for v in s["storico_posizioni"]),
+        "overall": overall, "card_type": dm.get_card_type(overall),
+    }
+
+
+def test_calcolo_colonnare_come_quello_per_atleta():
+    from lega_sintetica import genera_lega
+    state = genera_lega(300, 12, seme=5)
+    attese = [_riga_di_riferimento(a) for a in state["atleti"] if a["stats"]["tornei"]]
+    attese.sort(key=lambda r: (r["rank_pts"], r["oro"], r["argento"], r["win_rate"]), reverse=True)
+    righe = build_ranking_data(state)
+    assert [{k: r[k] for k in attese[0]} for r in righe] == attese
@@ -0,0 +1,87 @@
+"""
+test_registro_scambi.py — Segnapunti live: punteggio derivato dal registro, annulla/ripeti, azzeramenti
+"""
+from registro_scambi import RegistroScambi
+
+
+def _segna(registro, sequenza):
+    for k in sequenza:
+        registro.segna(k)
+
+
+def test_set_chiuso_con_due_punti_di_scarto():
+    r = RegistroScambi(21, "Best of 3")
+    _segna(r, [1] * 20 + [2] * 20 + [1])
+    assert r.stato["s1"] == 0 and r.stato["p1"] == 21
+    _segna(r, [1])
+    assert r.stato["sets"] == ((22, 20),) and r.stato["s1"] == 1
+    assert r.punteggi() == [(22, 20)]
+
+
+def test_tie_break_e_fine_partita():
+    r = RegistroScambi(21, "Best of 3")
+    _segna(r, [1] * 21 + [2] * 21)
+    assert r.limite(r.stato) == 15
+    _segna(r, [2] * 15)
+    assert r.conclusa() and r.punteggi() == [(21, 0), (0, 21), (0, 15)]
+    n = len(r.eventi)
+    r.segna(1)   # a partita conclusa non conta
+    assert len(r.eventi) == n
+
+
+def test_annulla_e_ripeti_attraverso_il_cambio_set():
+    r = RegistroScambi(21, "Best of 3")
+    _segna(r, [1] * 21)
+    assert r.stato["s1"] == 1
+    assert r.annulla()
+    assert r.stato["s1"] == 0 and r.stato["p1"] == 20
+    assert r.ripeti()
+    assert r.stato["s1"] == 1 and r.stato["p1"] == 0
+    assert not r.ripeti()
+
+
+def test_nuovo_scambio_dopo_annulla_scarta_la_coda():
+    r = RegistroScambi()
+    _segna(r, [1, 1, 1])
+    r.annulla(); r.annulla()
+    r.segna(2)
+    assert [e["squadra"] for e in r.eventi] == [1, 2]
+    assert not r.ripeti()
+    assert (r.stato["p1"], r.stato["p2"]) == (1, 1)
+
+
+def test_battuta_a_chi_vince_lo_scambio():
+    r = RegistroScambi()
+    r.cambia_battuta(2)
+    assert r.stato["battuta"] == 2
+    r.segna(1)
+    assert r.eventi[-1]["battuta"] == 2 and r.stato["battuta"] == 1
+    n = len(r.eventi)
+    r.cambia_battuta(1)   # già in battuta: nessun evento
+    assert len(r.eventi) == n
+
+
+def test_azzera_set_e_azzera_si_possono_ripetere():
+    r = RegistroScambi(21, "Best of 3")
+    _segna(r, [1] * 21 + [2, 2, 1])
+    fine = r.cursore
+    r.azzera_set()
+    assert r.stato["sets"] == ((21, 0),) and r.stato["p1"] == r.stato["p2"] == 0
+    r.azzera()
+    assert r.cursore == 0 and r.punteggi() == []
+    while r.ripeti():
+        pass
+    assert r.cursore == fine and r.punteggi() == [(21, 0), (1, 2)]
+
+
+def test_da_dati_e_diario():
+    comandi = []
+    r = RegistroScambi(diario=comandi.append)
+    _segna(r, [1, 2, 2])
+    r.annulla()
+    copia = RegistroScambi.da_dati(r.dati())
+    assert copia.stato == r.stato and copia.cursore == 2
+    rifatto = RegistroScambi()
+    for op in comandi:
+        rifatto.riapplica(op)
+    assert rifatto.dati() == r.dati()
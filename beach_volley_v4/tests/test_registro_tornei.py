@@ -0,0 +1,51 @@
+"""
+test_registro_tornei.py — Registro tornei: punti ranking dal numero reale di squadre, storico per id
+"""
+import data_manager as dm
+from lega_sintetica import iscrivi_squadre
+
+
+def _chiudi(stato, nome, n_squadre):
+    stato["torneo"]["nome"] = nome
+    stato["torneo"].pop("id", None)
+    stato["squadre"] = []
+    iscrivi_squadre(stato, n_squadre)
+    podio = [(i + 1, sq["id"]) for i, sq in enumerate(stato["squadre"][:3])]
+    dm.trasferisci_al_ranking(stato, podio)
+    return dm.get_torneo_registro(stato, stato["torneo"]["id"])
+
+
+def _voci(stato, torneo):
+    return [(a, v) for a in stato["atleti"] for v in a["stats"]["storico_posizioni"] if v["torneo_id"] == torneo["id"]]
+
+
+def test_punti_dal_numero_di_squadre(stato):
+    piccolo = _chiudi(stato, "Piccolo", 4)
+    grande = _chiudi(stato, "Grande", 16)
+    assert (piccolo["n_squadre"], piccolo["tier"]) == (4, "Challenger")
+    assert (grande["n_squadre"], grande["tier"]) == (16, "Major")
+    vincitori_grande = {v["punti"] for _, v in _voci(stato, grande) if v["pos"] == 1}
+    assert vincitori_grande == {dm.calcola_punti_ranking(1, 16)} == {160}
+    # I punti del torneo piccolo non cambiano dopo quello grande
+    assert {v["punti"] for _, v in _voci(stato, piccolo) if v["pos"] == 1} == {40}
+    fuori_podio = {v["pos"] for _, v in _voci(stato, grande) if v["pos"] > 3}
+    assert fuori_podio == {8}
+
+
+def test_registra_una_volta_sola(stato):
+    voce = dm.registra_torneo(stato)
+    assert dm.registra_torneo(stato) is voce
+    assert len(stato["registro_tornei"]) == 3   # i due della lega sintetica più questo
+    assert stato["torneo"]["id"] == voce["id"]
+
+
+def test_migrazione_storico_congela_i_punti():
+    a = dm.new_atleta("Anna")
+    a["stats"]["storico_posizioni"] = [["Tappa 1", 1], ["Tappa 2", 3], ["Tappa 1", 2]]
+    data = {"atleti": [a], "squadre": [dm.new_squadra(str(i), []) for i in range(6)], "registro_tornei": []}
+    assert dm._migra_storico(data)
+    assert [t["nome"] for t in data["registro_tornei"]] == ["Tappa 1", "Tappa 2"]
+    storico = a["stats"]["storico_posizioni"]
+    assert [(v["torneo"], v["pos"], v["punti"]) for v in storico] == [("Tappa 1", 1, 60), ("Tappa 2", 3, 40), ("Tappa 1", 2, 50)]
+    assert storico[0]["torneo_id"] == storico[2]["torneo_id"]
+    assert not dm._migra_storico(data)
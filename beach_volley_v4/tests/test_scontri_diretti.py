@@ -0,0 +1,67 @@
+"""
+test_scontri_diretti.py — Classifica di girone: a pari punti decidono gli scontri diretti (classifica avulsa)
+"""
+import data_manager as dm
+
+
+def _partita(sq1, sq2, *sets):
+    p = dm.new_partita(sq1, sq2, "girone", 0)
+    s1 = sum(a > b for a, b in sets)
+    p.update({"punteggi": list(sets), "set_sq1": s1, "set_sq2": len(sets) - s1,
+              "vincitore": sq1 if s1 > len(sets) - s1 else sq2, "confermata": True, "in_classifica": True})
+    return p
+
+
+def _girone(*partite, squadre="abcd"):
+    return {"nome": "Girone A", "squadre": list(squadre), "partite": list(partite)}
+
+
+def _ordine(girone):
+    return [sid for sid, _ in dm.ordina_girone(girone)]
+
+
+def test_pari_punti_decide_lo_scontro_diretto():
+    # a ha differenza set e punti migliore, ma ha perso contro b
+    girone = _girone(_partita("b", "a", (21, 19)), _partita("a", "c", (21, 5)), _partita("a", "d", (21, 5)),
+                     _partita("b", "c", (22, 20)), _partita("c", "d", (21, 19)), _partita("d", "b", (21, 19)))
+    assert _ordine(girone) == ["b", "a", "c", "d"]
+    stats = dict(dm.ordina_girone(girone))
+    assert stats["a"]["punti_fatti"] - stats["a"]["punti_subiti"] > stats["b"]["punti_fatti"] - stats["b"]["punti_subiti"]
+
+
+def test_avulsa_a_tre_riapplicata_al_sottogruppo():
+    # Ciclo a>b>c>a: stessi punti e set tra le tre, a esce per differenza punti;
+    # b e c restano pari e li separa lo scontro diretto, non la differenza generale
+    girone = _girone(_partita("a", "b", (21, 19)), _partita("b", "c", (21, 17)), _partita("c", "a", (21, 15)),
+                     _partita("a", "d", (21, 15)), _partita("b", "d", (21, 19)), _partita("c", "d", (21, 11)))
+    stats = dict(dm.ordina_girone(girone))
+    assert stats["c"]["punti_fatti"] - stats["c"]["punti_subiti"] > stats["b"]["punti_fatti"] - stats["b"]["punti_subiti"]
+    assert _ordine(girone) == ["b", "c", "a", "d"]
+
+
+def test_scontri_diretti_in_parita_decide_la_classifica_generale():
+    girone = _girone(_partita("a", "b", (21, 19)), _partita("b", "c", (21, 19)), _partita("c", "a", (21, 19)),
+                     _partita("a", "d", (21, 16)), _partita("b", "d", (21, 12)), _partita("c", "d", (21, 20)))
+    assert _ordine(girone) == ["b", "a", "c", "d"]
+
+
+def test_parita_totale_ordine_del_sorteggio():
+    girone = _girone(_partita("a", "b", (21, 19)), _partita("c", "d", (21, 19)), squadre="dcba")
+    assert _ordine(girone) == ["c", "a", "d", "b"]
+
+
+def test_partite_fuori_classifica_non_contano():
+    simulata = _partita("b", "a", (21, 10))
+    simulata["in_classifica"] = False
+    girone = _girone(simulata, _partita("a", "c", (21, 10)), squadre="abc")
+    assert _ordine(girone) == ["a", "c", "b"]   # la sconfitta vale un punto, la simulata niente
+
+
+def test_classifica_girone_e_teste_di_serie():
+    g1 = _girone(_partita("b", "a", (21, 19)), squadre="ab")
+    g2 = _girone(_partita("c", "d", (21, 5)), squadre="cd")
+    g2["nome"] = "Girone B"
+    state = {"gironi": [g1, g2], "torneo": {}}
+    assert dm.classifica_girone(state, g1) == ["b", "a"]
+    # Prime prima delle seconde; a pari piazzamento il rendimento nel girone
+    assert dm.teste_di_serie_da_gironi([g1, g2], state) == ["c", "b", "a", "d"]
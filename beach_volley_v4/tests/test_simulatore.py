@@ -0,0 +1,75 @@
+"""
+test_simulatore.py — Simulazione vettoriale: punteggi validi, stessa distribuzione del simulatore scalare
+"""
+import random
+
+import numpy as np
+import pytest
+
+import data_manager as dm
+from simulatore import simula_set_batch, simula_partite_batch, simula_partite, CAP_VANTAGGI
+
+
+def _set_valido(a, b, limite):
+    alto, basso = max(a, b), min(a, b)
+    if alto - basso < 2:   # chiusura forzata oltre limite+6, riportata alla squadra 1 come simula_set
+        return a > b and alto == limite + CAP_VANTAGGI + 1
+    return alto == limite or (alto > limite and alto - basso == 2)
+
+
+@pytest.mark.parametrize("limite", [15, 21])
+def test_set_validi(limite):
+    rng = np.random.default_rng(0)
+    p = rng.random(5000)
+    a, b = simula_set_batch(p, limite, rng)
+    assert all(_set_valido(x, y, limite) for x, y in zip(a.tolist(), b.tolist()))
+
+
+def test_probabilita_estreme_e_riproducibilita():
+    a, b = simula_set_batch([1.0, 0.0], 21, np.random.default_rng(1))
+    assert (a.tolist(), b.tolist()) == ([21, 0], [0, 21])
+    uno = simula_partite_batch(np.full(50, 0.5), 21, "Best of 3", np.random.default_rng(7))
+    due = simula_partite_batch(np.full(50, 0.5), 21, "Best of 3", np.random.default_rng(7))
+    assert all(np.array_equal(x, y) for x, y in zip(uno, due))
+
+
+def test_best_of_3():
+    punteggi, set1, set2 = simula_partite_batch(np.full(3000, 0.5), 21, "Best of 3", np.random.default_rng(2))
+    assert set((np.maximum(set1, set2)).tolist()) == {2} and set((np.minimum(set1, set2)).tolist()) == {0, 1}
+    terzo = punteggi[:, 2, 0] >= 0
+    assert np.array_equal(terzo, np.minimum(set1, set2) == 1)
+    assert all(_set_valido(x, y, 15) for x, y in punteggi[terzo, 2].tolist())
+
+
+def test_stessa_distribuzione_del_simulatore_scalare():
+    random.seed(3)
+    n = 20000
+    scalare = [dm.simula_set(21, p=0.55) for _ in range(n)]
+    a, b = simula_set_batch(np.full(n, 0.55), 21, np.random.default_rng(3))
+    vinti_scalare = sum(x > y for x, y in scalare) / n
+    assert abs(vinti_scalare - float((a > b).mean())) < 0.02
+    assert abs(sum(x + y for x, y in scalare) / n - float((a + b).mean())) < 0.5
+
+
+def test_simula_partite_conferma(stato):
+    stato["torneo"].update({"punteggio_max": 21, "formato_set": "Best of 3"})
+    sq = [s["id"] for s in stato["squadre"]]
+    partite = [dm.new_partita(sq[i], sq[i + 1]) for i in range(0, 8, 2)]
+    simula_partite(stato, partite, rng=np.random.default_rng(4))
+    for p in partite:
+        assert p["confermata"] and 2 <= len(p["punteggi"]) <= 3
+        assert p["vincitore"] == (p["sq1"] if p["set_sq1"] == 2 else p["sq2"])
+        assert all(isinstance(x, int) for s in p["punteggi"] for x in s)
+    assert simula_partite(stato, []) == []
+
+
+def test_probabilita_dal_modello_attributi(stato):
+    a, b = (s["id"] for s in stato["squadre"][:2])
+    assert dm.probabilita_scambio(stato, a, b) == 0.5
+    stato["torneo"]["modello_simulazione"] = "Attributi"
+    for aid in dm.get_squadra_by_id(stato, a)["atleti"]:
+        for attr in dm.ATTRIBUTI_FIFA:
+            dm.get_atleta_by_id(stato, aid)["stats"][attr] = 95
+    p = dm.probabilita_scambio(stato, a, b)
+    assert 0.5 < p < 1 and dm.probabilita_scambio(stato, b, a) == pytest.approx(1 - p)
+    assert dm.probabilita_scambio(stato, a, a) == 0.5
@@ -0,0 +1,134 @@
+"""
+test_spettatori.py — Server spettatori: diffusione per partita, stato iniziale, spettatori lenti, HTTP e UDP
+"""
+import asyncio, json, socket
+
+import spettatori
+from registro_scambi import RegistroScambi
+
+TEMA = {"text1": "#fff", "text2": "#eee", "bg": "#000", "border_style": "none", "extra": "",
+        "team_size": "2rem", "score_size": "5rem", "score_color": "#fff", "score_bg": "#111"}
+
+
+class _Trasporto:
+    def __init__(self):
+        self.buffer = 0
+        self.abortito = False
+
+    def get_write_buffer_size(self):
+        return self.buffer
+
+    def abort(self):
+        self.abortito = True
+
+
+class _Writer:
+    """Writer finto: tiene gli eventi SSE scritti."""
+
+    def __init__(self):
+        self.transport = _Trasporto()
+        self.frame = []
+
+    def write(self, frame):
+        self.frame.append(frame)
+
+    def eventi(self):
+        return [json.loads(f.split(b"data: ", 1)[1]) for f in self.frame if b"data: " in f]
+
+
+def _porta_libera(tipo=socket.SOCK_STREAM):
+    with socket.socket(socket.AF_INET, tipo) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_diffusione_per_partita():
+    d = spettatori.Diffusore()
+    tutte, solo_a = _Writer(), _Writer()
+    d.aggiungi(tutte); d.aggiungi(solo_a, "a")
+    d.pubblica({"id": "a", "p1": 1}); d.pubblica({"id": "b", "p1": 2}); d.pubblica({"p1": 3})
+    assert [e["id"] for e in tutte.eventi()] == ["a", "b"]
+    assert [e["id"] for e in solo_a.eventi()] == ["a"]
+    assert d.spettatori() == 2 and d.eventi == 2
+    d.rimuovi(solo_a)
+    assert "a" not in d.canali and d.spettatori() == 1
+
+
+def test_nuovo_spettatore_riceve_lo_stato_corrente():
+    d = spettatori.Diffusore()
+    for p1 in range(3):
+        d.pubblica({"id": "a", "p1": p1})
+    d.pubblica({"id": "b", "p1": 9})
+    d.pubblica({"id": "b", "chiusa": True})
+    w = _Writer()
+    d.aggiungi(w)
+    assert w.eventi() == [{"id": "a", "p1": 2}]
+    filtrato = _Writer()
+    d.aggiungi(filtrato, "b")
+    assert filtrato.frame == []
+
+
+def test_spettatore_lento_scollegato():
+    d = spettatori.Diffusore(limite_buffer=100)
+    lento, veloce = _Writer(), _Writer()
+    d.aggiungi(lento); d.aggiungi(veloce)
+    lento.transport.buffer = 101
+    d.pubblica({"id": "a"})
+    assert lento.transport.abortito and lento.frame == []
+    assert d.spettatori() == 1 and d.scollegati == 1
+    d.battito()
+    assert veloce.frame[-1] == b": battito\n\n"
+
+
+def test_evento_partita_dal_registro():
+    r = RegistroScambi(21, "Best of 3")
+    for _ in range(21):
+        r.segna(2)
+    e = spettatori.evento_partita("p1", "A", "B", r, campo=3)
+    assert (e["s2"], e["sets"], e["battuta"], e["max"], e["conclusa"], e["campo"]) == (1, [[0, 21]], 2, 21, False, 3)
+
+
+async def _get(porta, percorso):
+    reader, writer = await asyncio.open_connection("127.0.0.1", porta)
+    writer.write(f"GET {percorso} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+    risposta = await reader.read()
+    writer.close()
+    return risposta.split(b"\r\n", 1)[0], risposta.split(b"\r\n\r\n", 1)[1]
+
+
+def test_server_http_e_udp(monkeypatch):
+    porta, udp = _porta_libera(), _porta_libera(socket.SOCK_DGRAM)
+    monkeypatch.setattr(spettatori, "SPETTATORI", f"127.0.0.1:{udp}")
+
+    async def prova():
+        diffusore, _, chiudi = await spettatori.servi("127.0.0.1", porta, f"127.0.0.1:{udp}",
+                                                     spettatori.pagina_html(TEMA))
+        try:
+            stato, corpo = await _get(porta, "/")
+            assert stato.endswith(b"200 OK") and b"EventSource" in corpo
+            assert (await _get(porta, "/altro"))[0].endswith(b"404 Not Found")
+
+            diffusore.pubblica({"id": "a", "p1": 1})
+            flusso_a = spettatori.spettatore("127.0.0.1", porta, "a")
+            flusso_b = spettatori.spettatore("127.0.0.1", porta, "b")
+            assert (await asyncio.wait_for(anext(flusso_a), 2)) == {"id": "a", "p1": 1}
+            attesa_b = asyncio.ensure_future(anext(flusso_b))
+            while diffusore.spettatori() < 2:
+                await asyncio.sleep(0.01)
+
+            spettatori.pubblica({"id": "b", "p1": 7})   # via UDP, come il segnapunti
+            assert (await asyncio.wait_for(attesa_b, 2)) == {"id": "b", "p1": 7}
+            _, corpo = await _get(porta, "/stato")
+            assert json.loads(corpo) == {"spettatori": 2, "partite": ["a", "b"], "eventi": 2, "scollegati": 0}
+            await flusso_a.aclose(); await flusso_b.aclose()
+        finally:
+            await asyncio.wait_for(chiudi(), 2)
+
+    asyncio.run(prova())
+
+
+def test_pubblica_senza_server_non_solleva(monkeypatch):
+    monkeypatch.setattr(spettatori, "SPETTATORI", f"127.0.0.1:{_porta_libera(socket.SOCK_DGRAM)}")
+    spettatori.pubblica({"id": "a"})
+    monkeypatch.setattr(spettatori, "SPETTATORI", "")
+    spettatori.pubblica({"id": "a"})
@@ -0,0 +1,103 @@
+"""
+test_stato.py — StatoTorneo: versioni, sezioni sporche e contratto di copia all'inserimento
+"""
+import data_manager as dm
+
+
+def _stato():
+    s = dm.empty_state()
+    s["squadre"] = [dm.new_squadra("A", []), dm.new_squadra("B", [])]
+    s["gironi"] = [{"nome": "Girone A", "squadre": [], "partite": [dm.new_partita("x", "y", "girone", 0)]}]
+    s.pulisci()
+    return s
+
+
+def test_modifica_di_record_segna_solo_il_record():
+    s = _stato()
+    sid = s["squadre"][1]["id"]
+    v = s.versione
+    s["squadre"][1]["vittorie"] += 1
+    assert s.versione == v + 1
+    assert s._sporche == {"squadre": {sid}}
+    assert s.versione_sezione("squadre") == s.versione
+    assert s.versione_struttura("squadre") < s.versione
+
+
+def test_modifica_di_partita_segna_la_partita():
+    s = _stato()
+    p = s["gironi"][0]["partite"][0]
+    p["punteggi"].append((21, 10))
+    assert s._sporche == {"gironi": {p["id"]}}
+
+
+def test_append_e_modifica_strutturale():
+    s = _stato()
+    v = s.versione
+    s["squadre"].append(dm.new_squadra("C", []))
+    assert s._sporche["squadre"] == {None, s["squadre"][-1]["id"]}
+    assert s.versione_struttura("squadre") > v
+
+
+def test_assegnare_lo_stesso_valore_non_sporca():
+    s = _stato()
+    s["torneo"]["nome"] = s["torneo"]["nome"]
+    assert not s.sporco()
+
+
+def test_pulisci_azzera_le_sporche_non_la_versione():
+    s = _stato()
+    s["fase"] = "gironi"
+    v = s.versione
+    s.pulisci()
+    assert not s.sporco() and s.versione == v
+
+
+def test_inserimento_copia_il_valore():
+    """Il riferimento del chiamante non è lo stato: le modifiche vanno fatte sul record tracciato."""
+    s = _stato()
+    sq = dm.new_squadra("C", [])
+    s["squadre"].append(sq)
+    sq["nome"] = "Persa"
+    assert s["squadre"][-1]["nome"] == "C"
+    s["squadre"][-1]["nome"] = "D"
+    assert s["squadre"][-1]["nome"] == "D" and sq["id"] in s._sporche["squadre"]
+
+
+def test_registra_torneo_restituisce_il_record_tracciato():
+    s = _stato()
+    s["torneo"]["nome"] = "Open"
+    voce = dm.registra_torneo(s)
+    assert voce is s["registro_tornei"][-1]
+    assert dm.registra_torneo(s) is voce
+
+
+def test_versione_campi():
+    s = _stato()
+    sq = s["squadre"][0]
+    rosa = s.versione_campi("squadre", ("atleti",))
+    sq["vittorie"] += 1
+    assert s.versione_campi("squadre", ("atleti",)) == rosa
+    sq["atleti"].append("a_1")
+    assert s.versione_campi("squadre", ("atleti",)) > rosa
+
+
+def test_forze_restano_in_cache_dopo_un_risultato(stato):
+    from motore_torneo import TournamentEngine
+    stato["torneo"]["modello_simulazione"] = "Attributi"
+    motore = TournamentEngine(stato)
+    motore.avvia()
+    forze = dm.forze_squadre(stato)
+    motore.simula_tutti()
+    assert dm.forze_squadre(stato) is forze
+
+
+def test_forze_ricalcolate_se_cambiano_attributi_o_rose(stato):
+    forze = dm.forze_squadre(stato)
+    stato["atleti"][0]["stats"]["tornei"] += 1
+    assert dm.forze_squadre(stato) is forze
+    aid = stato["squadre"][0]["atleti"][0]
+    dm.get_atleta_by_id(stato, aid)["stats"]["attacco"] = 99
+    nuove = dm.forze_squadre(stato)
+    assert nuove is not forze and nuove[stato["squadre"][0]["id"]] != forze[stato["squadre"][0]["id"]]
+    stato["squadre"][1]["atleti"][0] = aid
+    assert dm.forze_squadre(stato) is not nuove
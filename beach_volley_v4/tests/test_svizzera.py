@@ -0,0 +1,74 @@
+"""
+test_svizzera.py — Sistema svizzero: turni, abbinamenti senza rivincite, bye e Buchholz
+"""
+import random
+
+import numpy as np
+import pytest
+
+import data_manager as dm
+from motore_torneo import TournamentEngine, SVIZZERA
+
+
+def _chiudi_turno(partite, rng):
+    for p in partite:
+        vince1 = rng.random() < 0.5
+        p.update({"punteggi": [(21, 15) if vince1 else (15, 21)], "set_sq1": int(vince1),
+                  "set_sq2": int(not vince1), "vincitore": p["sq1"] if vince1 else p["sq2"],
+                  "confermata": True})
+
+
+def _svizzera(n, seme=0):
+    rng = random.Random(seme)
+    girone = dm.crea_svizzera([f"s{i}" for i in range(n)])
+    for _ in range(girone["turni"]):
+        _chiudi_turno(dm.genera_turno_svizzero(girone), rng)
+    return girone
+
+
+def test_turni_consigliati():
+    assert [dm.turni_svizzera(n) for n in (2, 8, 9, 16, 100)] == [1, 3, 4, 4, 7]
+    assert dm.crea_svizzera(list("abcd"), turni=10)["turni"] == 3
+
+
+@pytest.mark.parametrize("n", [8, 9, 16, 23, 64])
+def test_nessuna_rivincita_e_un_turno_a_testa(n):
+    girone = _svizzera(n, seme=n)
+    coppie = [frozenset((p["sq1"], p["sq2"])) for p in girone["partite"]]
+    assert len(set(coppie)) == len(coppie)
+    for turno in range(1, girone["turni"] + 1):
+        in_campo = [sid for p in girone["partite"] if p["turno"] == turno for sid in (p["sq1"], p["sq2"])]
+        assert len(in_campo) == len(set(in_campo)) == n - n % 2
+    assert len(girone["bye"]) == (girone["turni"] if n % 2 else 0)
+    assert len(set(girone["bye"])) == len(girone["bye"])
+
+
+def test_primo_turno_meta_alta_contro_meta_bassa():
+    girone = dm.crea_svizzera([f"s{i}" for i in range(8)])
+    partite = dm.genera_turno_svizzero(girone)
+    assert [(p["sq1"], p["sq2"]) for p in partite] == [("s0", "s4"), ("s1", "s5"), ("s2", "s6"), ("s3", "s7")]
+
+
+def test_punti_e_buchholz():
+    girone = _svizzera(9, seme=1)
+    stats = dm.statistiche_svizzera(girone)
+    for sid, s in stats.items():
+        giocate = sum(sid in (p["sq1"], p["sq2"]) for p in girone["partite"])
+        assert s["punti"] == 3 * s["vittorie"] + (giocate - (s["vittorie"] - girone["bye"].count(sid)))
+        assert s["buchholz"] == sum(stats[a]["punti"] for a in s["avversari"])
+    ordine = dm.classifica_svizzera(girone, stats)
+    chiavi = [(stats[sid]["punti"], stats[sid]["buchholz"]) for sid in ordine]
+    assert chiavi == sorted(chiavi, reverse=True)
+
+
+def test_motore_genera_i_turni_e_qualifica(stato):
+    stato["torneo"].update({"tipo_tabellone": SVIZZERA, "qualificate_svizzera": 4})
+    motore = TournamentEngine(stato, rng=np.random.default_rng(0))
+    motore.avvia()
+    svizzera = motore.svizzera()
+    assert svizzera["turni"] == 3 and dm.turno_svizzero(svizzera) == 1
+    motore.simula_tutti()
+    assert dm.turno_svizzero(svizzera) == 3 and motore.gironi_completi()
+    motore.avvia_eliminazione()
+    qualificate = {sid for p in stato["bracket"] for sid in (p["sq1"], p["sq2"]) if sid}
+    assert qualificate == set(dm.classifica_svizzera(svizzera)[:4])
@@ -0,0 +1,66 @@
+"""
+test_trofei.py — Trofei sbloccati una volta sola, con torneo e data, e prossimo trofeo con il progresso
+"""
+import data_manager as dm
+
+TORNEO = {"id": "t_finale_1", "nome": "Finale"}
+
+
+def _atleta(**stats):
+    a = dm.new_atleta("Anna")
+    a["stats"].update(stats)
+    return a
+
+
+def test_sblocco_con_torneo_e_una_volta_sola():
+    a = _atleta(tornei=1, vittorie=1, storico_posizioni=[{"torneo_id": "t", "torneo": "T", "pos": 1, "punti": 80}])
+    assert dm.valuta_trofei(a, TORNEO) == ["principiante", "esordiente", "esperto"]
+    info = a["trofei"]["esperto"]
+    assert (info["torneo_id"], info["torneo"]) == ("t_finale_1", "Finale") and info["data"]
+    assert dm.valuta_trofei(a, {"id": "altro", "nome": "Altro"}) == []
+    assert a["trofei"]["esperto"] is info
+
+
+def test_prossimo_trofeo_e_progresso():
+    a = _atleta(tornei=2)
+    dm.valuta_trofei(a)
+    trofeo, progresso = dm.get_prossimo_trofeo(a)
+    assert trofeo["id"] == "dilettante" and progresso == 0.4
+    assert [t["id"] for t, ok in dm.get_trofei_atleta(a) if ok] == ["principiante"]
+
+
+def test_tutti_sbloccati_nessun_prossimo():
+    a = _atleta(tornei=20, vittorie=20, set_vinti=100, set_persi=5, punti_fatti=2000,
+                storico_posizioni=[{"torneo_id": "t", "torneo": "T", "pos": 1, "punti": 80}] * 20)
+    assert len(dm.valuta_trofei(a)) == len(dm.TROFEI_DEFINIZIONE)
+    assert dm.get_prossimo_trofeo(a) is None
+
+
+def test_trofei_recenti_dal_piu_recente():
+    vecchio, nuovo = _atleta(tornei=1), _atleta(tornei=1)
+    dm.valuta_trofei(vecchio); dm.valuta_trofei(nuovo)
+    vecchio["trofei"]["principiante"]["data"] = "2020-01-01T00:00:00"
+    migrato = _atleta(tornei=5)
+    migrato["trofei"] = {"dilettante": {"torneo_id": None, "torneo": None, "data": None}}
+    feed = dm.trofei_recenti({"atleti": [vecchio, nuovo, migrato]})
+    assert [(a is nuovo, t["id"]) for a, t, _ in feed] == [(True, "principiante"), (False, "principiante")]
+
+
+def test_trasferimento_al_ranking_valuta_i_trofei(stato):
+    vincitori = stato["squadre"][0]
+    prima = {aid: dict(dm.get_atleta_by_id(stato, aid)["trofei"]) for aid in vincitori["atleti"]}
+    dm.trasferisci_al_ranking(stato, [(1, vincitori["id"])])
+    torneo_id = stato["torneo"]["id"]
+    for aid, vecchi in prima.items():
+        trofei = dm.get_atleta_by_id(stato, aid)["trofei"]
+        assert "esperto" in trofei
+        assert all(trofei[t] == info for t, info in vecchi.items())   # i vecchi sblocchi non cambiano
+        assert all(info["torneo_id"] == torneo_id for t, info in trofei.items() if t not in vecchi)
+
+
+def test_migrazione_trofei_senza_data():
+    a = _atleta(tornei=1)
+    a.pop("trofei"); a.pop("prossimo_trofeo")
+    assert dm._migra_trofei({"atleti": [a]})
+    assert a["trofei"]["principiante"] == {"torneo_id": None, "torneo": None, "data": None}
+    assert a["prossimo_trofeo"]["id"] == "dilettante"
@@ -2,8 +2,9 @@
 theme_manager.py — Sistema temi avanzato: 8 temi unici + 8 tabelloni LIVE + sponsor/banner
 """
 import streamlit as st
-import json, base64
+import json
 from pathlib import Path
+from blob_store import salva_upload, salva_b64, blob_data_uri
 
 THEMES = {
     "Dynamic DAZN": {
@@ -202,19 +203,38 @@ THEME_FILE = "beach_volley_theme.json"
 def load_theme_config():
     if Path(THEME_FILE).exists():
         with open(THEME_FILE, "r") as f:
-            return json.load(f)
+            cfg = json.load(f)
+        if _migra_immagini_inline(cfg):
+            save_theme_config(cfg)
+        return cfg
     return {
         "theme_name": "Dynamic DAZN",
         "color_primary": "#e8002d", "color_secondary": "#0070f3", "color_detail": "#ffd700",
-        "logo_b64": None, "logo_name": None,
+        "logo_blob": None, "logo_name": None,
         "scoreboard_style": "DAZN Live",
-        "sponsors": [], "banner_b64": None,
+        "sponsors": [], "banner_blob": None,
         "banner_position": "Sotto l'header",
         "sidebar_width": "normale", "card_size": "normale",
         "show_bottom_nav": True, "show_sponsors_sidebar": True,
         "header_style": "Grande con gradiente", "animations": True, "show_weather": False,
     }
 
+def _migra_immagini_inline(cfg):
+    """Sposta logo, banner e loghi sponsor base64 (formato precedente) nell'archivio blob."""
+    migrato = False
+    for vecchia, nuova in [("logo_b64", "logo_blob"), ("banner_b64", "banner_blob")]:
+        if vecchia in cfg:
+            if cfg[vecchia]:
+                cfg[nuova] = salva_b64(cfg[vecchia])
+            del cfg[vecchia]
+            migrato = True
+    for sp in cfg.get("sponsors", []):
+        if "logo" in sp:
+            logo = sp.pop("logo")
+            sp["logo_blob"] = salva_b64(logo) if logo else None
+            migrato = True
+    return migrato
+
 def save_theme_config(cfg):
     with open(THEME_FILE, "w") as f:
         json.dump(cfg, f)
@@ -229,13 +249,15 @@ def get_active_theme(cfg):
 def get_active_scoreboard(cfg):
     return SCOREBOARD_STYLES.get(cfg.get("scoreboard_style", "DAZN Live"), SCOREBOARD_STYLES["DAZN Live"])
 
+def _img_blob(h, stile):
+    """<img> di un'immagine dell'archivio; stringa vuota se non è stata caricata o manca il file."""
+    uri = blob_data_uri(h)
+    return f'<img src="{uri}" style="{stile}">' if uri else ""
+
 def inject_theme_css(cfg):
     t = get_active_theme(cfg)
-    logo_b64 = cfg.get("logo_b64")
-    if logo_b64:
-        logo_html = f'<img src="data:image/png;base64,{logo_b64}" style="height:60px;object-fit:contain;margin-bottom:8px">'
-    else:
-        logo_html = '<div style="font-size:3rem">🏐</div>'
+    logo_html = (_img_blob(cfg.get("logo_blob"), "height:60px;object-fit:contain;margin-bottom:8px")
+                 or '<div style="font-size:3rem">🏐</div>')
 
     css = f"""
     <style>
@@ -369,10 +391,10 @@ def inject_theme_css(cfg):
 
 def render_banner(cfg):
     """Renderizza il banner sponsor se presente."""
-    if cfg.get("banner_b64") and cfg.get("banner_position") == "Sotto l'header":
+    if cfg.get("banner_blob") and cfg.get("banner_position") == "Sotto l'header":
         st.markdown(f"""
         <div style="text-align:center;margin:-10px 0 20px">
-            <img src="data:image/png;base64,{cfg['banner_b64']}"
+            <img src="{blob_data_uri(cfg['banner_blob'])}"
                 style="max-width:100%;max-height:120px;object-fit:contain;border-radius:8px">
         </div>
         """, unsafe_allow_html=True)
@@ -397,8 +419,7 @@ def render_sponsors_sidebar(cfg):
             st.markdown(f"""
             <div style="background:var(--bg-card2);border:1px solid var(--border);
                 border-radius:var(--radius);padding:8px;text-align:center;margin-bottom:8px">
-                <img src="data:image/png;base64,{sp['logo']}"
-                    style="max-height:36px;max-width:100%;object-fit:contain">
+                {_img_blob(sp.get('logo_blob'), "max-height:36px;max-width:100%;object-fit:contain")}
                 <div style="font-size:0.55rem;color:var(--text-secondary);margin-top:4px">{sp['nome']}</div>
             </div>
             """, unsafe_allow_html=True)
@@ -576,17 +597,16 @@ def render_personalization_page(cfg):
         st.markdown("### 🖼️ Logo Personalizzato")
         col_l, col_r = st.columns(2)
         with col_l:
-            if cfg.get("logo_b64"):
+            if cfg.get("logo_blob"):
                 st.markdown("**Logo attuale:**")
-                st.markdown(f'<img src="data:image/png;base64,{cfg["logo_b64"]}" style="max-height:80px;border-radius:8px;border:1px solid #333">', unsafe_allow_html=True)
+                st.markdown(f'<img src="{blob_data_uri(cfg["logo_blob"])}" style="max-height:80px;border-radius:8px;border:1px solid #333">', unsafe_allow_html=True)
                 if st.button("🗑️ Rimuovi Logo"):
-                    cfg["logo_b64"] = None; cfg["logo_name"] = None
+                    cfg["logo_blob"] = None; cfg["logo_name"] = None
                     save_theme_config(cfg); st.rerun()
         with col_r:
             logo_file = st.file_uploader("Carica Logo (PNG/JPG/WebP)", type=["png","jpg","jpeg","webp"], key="logo_uploader")
             if logo_file:
-                b64 = base64.b64encode(logo_file.read()).decode()
-                cfg["logo_b64"] = b64; cfg["logo_name"] = logo_file.name
+                cfg["logo_blob"] = salva_upload(logo_file); cfg["logo_name"] = logo_file.name
                 st.success(f"✅ Logo '{logo_file.name}' caricato!")
 
     with tabs[1]:
@@ -635,14 +655,13 @@ def render_personalization_page(cfg):
         col_s1, col_s2 = st.columns(2)
         with col_s1:
             st.markdown("#### 📸 Banner Principale")
-            if cfg.get("banner_b64"):
-                st.markdown(f'<img src="data:image/png;base64,{cfg["banner_b64"]}" style="width:100%;border-radius:8px;border:1px solid #333;margin-bottom:8px">', unsafe_allow_html=True)
+            if cfg.get("banner_blob"):
+                st.markdown(f'<img src="{blob_data_uri(cfg["banner_blob"])}" style="width:100%;border-radius:8px;border:1px solid #333;margin-bottom:8px">', unsafe_allow_html=True)
                 if st.button("🗑️ Rimuovi Banner"):
-                    cfg["banner_b64"] = None; save_theme_config(cfg); st.rerun()
+                    cfg["banner_blob"] = None; save_theme_config(cfg); st.rerun()
             banner_file = st.file_uploader("Carica Banner (ideale 1200×200px)", type=["png","jpg","jpeg","webp"], key="banner_uploader")
             if banner_file:
-                b64 = base64.b64encode(banner_file.read()).decode()
-                cfg["banner_b64"] = b64; st.success("✅ Banner caricato!")
+                cfg["banner_blob"] = salva_upload(banner_file); st.success("✅ Banner caricato!")
             pos_opts = ["Sopra l'header", "Sotto l'header", "Nella sidebar", "In fondo alla pagina"]
             banner_position = st.selectbox("Posizione Banner", pos_opts,
                 index=pos_opts.index(cfg.get("banner_position", "Sotto l'header")))
@@ -654,7 +673,7 @@ def render_personalization_page(cfg):
                 col_sp, col_del = st.columns([3, 1])
                 with col_sp:
                     st.markdown(f"""<div style="display:flex;align-items:center;gap:8px;background:var(--bg-card2);border-radius:8px;padding:8px;margin-bottom:4px">
-                        <img src="data:image/png;base64,{sp['logo']}" style="height:28px;object-fit:contain">
+                        {_img_blob(sp.get('logo_blob'), "height:28px;object-fit:contain")}
                         <span style="font-size:0.8rem">{sp['nome']}</span></div>""", unsafe_allow_html=True)
                 with col_del:
                     if st.button("🗑️", key=f"del_sp_{i}"):
@@ -663,8 +682,7 @@ def render_personalization_page(cfg):
                 sp_nome = st.text_input("Nome sponsor", key="sp_nome", placeholder="es. Decathlon")
                 sp_file = st.file_uploader("Logo sponsor", type=["png","jpg","jpeg","webp"], key="sp_logo")
                 if st.button("➕ Aggiungi Sponsor") and sp_nome and sp_file:
-                    b64 = base64.b64encode(sp_file.read()).decode()
-                    sponsors.append({"nome": sp_nome, "logo": b64})
+                    sponsors.append({"nome": sp_nome, "logo_blob": salva_upload(sp_file)})
                     cfg["sponsors"] = sponsors; save_theme_config(cfg)
                     st.success(f"✅ Sponsor '{sp_nome}' aggiunto!"); st.rerun()
 
@@ -737,8 +755,8 @@ def render_personalization_page(cfg):
             default = {
                 "theme_name": "Dynamic DAZN", "color_primary": "#e8002d",
                 "color_secondary": "#0070f3", "color_detail": "#ffd700",
-                "logo_b64": None, "logo_name": None,
-                "scoreboard_style": "DAZN Live", "sponsors": [], "banner_b64": None,
+                "logo_blob": None, "logo_name": None,
+                "scoreboard_style": "DAZN Live", "sponsors": [], "banner_blob": None,
                 "banner_position": "Sotto l'header", "sidebar_width": "normale",
                 "card_size": "normale", "show_bottom_nav": True, "show_sponsors_sidebar": True,
                 "header_style": "Grande con gradiente", "animations": True, "show_weather": False,
@@ -2,7 +2,7 @@
 ui_components.py — Stile DAZN Dark Mode + componenti riutilizzabili
 """
 import streamlit as st
-from data_manager import nome_squadra, get_squadra_by_id
+from data_manager import nome_squadra, get_squadra_by_id, nomi_atleti_squadra
 
 # ─── CSS DARK MODE STILE DAZN ────────────────────────────────────────────────
 
@@ -393,12 +393,12 @@ def render_match_card(state, partita, label=""):
         return
     
     def players_str(sq):
-        from data_manager import get_atleta_by_id
-        names = [get_atleta_by_id(state, aid)["nome"] for aid in sq["atleti"] if get_atleta_by_id(state, aid)]
-        return " / ".join(names)
+        return " / ".join(nomi_atleti_squadra(state, sq))
     
     parziali = " | ".join([f"{p[0]}-{p[1]}" for p in partita["punteggi"]]) if partita["punteggi"] else "—"
     confirmed_class = "confirmed" if partita["confermata"] else ""
+    if partita.get("orario"):
+        label = f"{label} · 🕘 {partita['orario']} Campo {partita['campo']}"
     
     st.markdown(f"""
     <div class="match-card {confirmed_class}">
@@ -425,16 +425,46 @@ def render_match_card(state, partita, label=""):
     """, unsafe_allow_html=True)
 
 
+# ─── CALENDARIO ──────────────────────────────────────────────────────────────
+
+def render_calendario(state):
+    """Fine stimata della giornata, utilizzo dei campi e prossime partite in programma."""
+    from motore_torneo import TournamentEngine
+    riepilogo = TournamentEngine(state).pianifica(assegna=False)
+    ore, minuti = divmod(riepilogo["durata_totale"], 60)
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("🏁 Fine Stimata", riepilogo["fine"], f"inizio {riepilogo['inizio']}", delta_color="off")
+    c2.metric("⏱️ Durata", f"{ore}h {minuti:02d}m")
+    c3.metric("🏟️ Utilizzo Campi", f"{riepilogo['utilizzo']:.0%}", f"{riepilogo['campi']} campi", delta_color="off")
+    c4.metric("🏐 Partite", riepilogo["partite"],
+              f"{riepilogo['previste']} da definire" if riepilogo["previste"] else None, delta_color="off")
+    st.caption(f"{riepilogo['durata_partita']} min a partita · riposo minimo {riepilogo['riposo']} min tra due partite della stessa squadra")
+
+    partite = [p for p in [p for g in state["gironi"] for p in g["partite"]] + list(state["bracket"])
+               if p.get("orario") and not p["confermata"]]
+    if not partite:
+        return
+    html = """
+    <table class="rank-table">
+    <tr><th>ORARIO</th><th>CAMPO</th><th style="text-align:left">PARTITA</th></tr>"""
+    for p in sorted(partite, key=lambda p: (p["orario"], p["campo"]))[:12]:
+        sfida = (f"{nome_squadra(state, p['sq1'])} vs {nome_squadra(state, p['sq2'])}"
+                 if p["sq1"] and p["sq2"] else "<span style='color:var(--text-secondary)'>da definire</span>")
+        html += f"""
+        <tr><td style="font-weight:700">{p['orario']}</td><td>{p['campo']}</td>
+            <td style="text-align:left">{sfida}</td></tr>"""
+    html += "</table>"
+    st.markdown(html, unsafe_allow_html=True)
+
+
 # ─── PODIO ───────────────────────────────────────────────────────────────────
 
 def render_podio(state, podio):
     """podio = [(pos, sq_id), ...]"""
     def sq_info(sid):
         sq = get_squadra_by_id(state, sid)
-        from data_manager import get_atleta_by_id
         if not sq: return "?", "?"
-        names = [get_atleta_by_id(state, aid)["nome"] for aid in sq["atleti"] if get_atleta_by_id(state, aid)]
-        return sq["nome"], " / ".join(names)
+        return sq["nome"], " / ".join(nomi_atleti_squadra(state, sq))
     
     podio_dict = {pos: sid for pos, sid in podio}
     
@@ -463,8 +493,7 @@ def render_podio(state, podio):
 def render_winner_banner(state, vincitore_sq_id):
     sq = get_squadra_by_id(state, vincitore_sq_id)
     if not sq: return
-    from data_manager import get_atleta_by_id
-    names = [get_atleta_by_id(state, aid)["nome"] for aid in sq["atleti"] if get_atleta_by_id(state, aid)]
+    names = nomi_atleti_squadra(state, sq)
     st.markdown(f"""
     <div class="winner-banner">
         <div class="winner-title">🏆 Campioni del Torneo 🏆</div>